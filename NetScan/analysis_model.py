@@ -0,0 +1,181 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+class Record:
+    """Slotted record with the dict-style access templates and older callers use
+
+    Subclasses list their fields in __slots__ (also the serialization order);
+    `_defaults` holds non-None defaults, called when they are factories, and
+    `_nested` the Record type of fields that hold another record.
+    """
+
+    __slots__ = ()
+    _defaults = {}
+    _nested = {}
+
+    def __init__(self, **values):
+        defaults = self._defaults
+        for name in self.__slots__:
+            if name in values:
+                value = values[name]
+            else:
+                value = defaults.get(name)
+                if callable(value):
+                    value = value()
+            setattr(self, name, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def update(self, values):
+        for key, value in values.items():
+            self[key] = value
+
+    def to_dict(self):
+        return {
+            name: value.to_dict() if isinstance(value, Record) else value
+            for name, value in ((name, getattr(self, name)) for name in self.__slots__)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        values = {}
+        for name in cls.__slots__:
+            if name in data:
+                value = data[name]
+                nested = cls._nested.get(name)
+                values[name] = nested.from_dict(value) if nested and isinstance(value, dict) else value
+        return cls(**values)
+
+class Basic(Record):
+    __slots__ = ('ip_type', 'reverse_dns', 'domain', 'ptr_record')
+
+class Coordinates(Record):
+    __slots__ = ('lat', 'lon')
+
+class Geographic(Record):
+    __slots__ = ('country_code', 'country_name', 'continent', 'continent_code', 'region', 'city',
+                 'district', 'postal_code', 'coordinates', 'accuracy_radius')
+    _defaults = {'coordinates': Coordinates}
+    _nested = {'coordinates': Coordinates}
+
+class TimeInfo(Record):
+    __slots__ = ('timezone', 'utc_offset', 'utc_offset_formatted', 'local_time', 'utc_time', 'is_dst', 'dst_offset')
+
+class Currency(Record):
+    __slots__ = ('code', 'name', 'symbol')
+
+class Network(Record):
+    __slots__ = ('asn', 'asn_description', 'asn_country', 'asn_registry', 'organization', 'isp',
+                 'network_name', 'cidr', 'network_type', 'usage_type',
+                 'is_mobile', 'is_proxy', 'is_hosting', 'is_datacenter')
+    _defaults = {'is_mobile': False, 'is_proxy': False, 'is_hosting': False, 'is_datacenter': False}
+
+class Security(Record):
+    __slots__ = ('threat_analysis', 'is_tor', 'is_vpn', 'is_malicious', 'reputation_score',
+                 'threat_types', 'blacklist_status')
+    _defaults = {'threat_analysis': dict, 'is_tor': False, 'is_vpn': False, 'is_malicious': False,
+                 'reputation_score': 0, 'threat_types': list, 'blacklist_status': list}
+
+# Response sections a client can select with ?fields= / ?exclude=, and the result keys each covers
+SECTIONS = ('basic', 'geographic', 'time', 'weather', 'network', 'security', 'performance')
+ALL_SECTIONS = frozenset(SECTIONS)
+SECTION_KEYS = {'geographic': ('geographic', 'currency')}
+
+def parse_sections(fields=None, exclude=None):
+    """Section set from comma-separated ?fields= and ?exclude= values; unknown names raise ValueError"""
+    selected = {name.strip() for name in fields.split(',') if name.strip()} if fields else set(SECTIONS)
+    excluded = {name.strip() for name in exclude.split(',') if name.strip()} if exclude else set()
+    unknown = (selected | excluded) - ALL_SECTIONS
+    if unknown:
+        raise ValueError(f"Unknown section(s): {', '.join(sorted(unknown))}")
+    return frozenset(selected - excluded)
+
+def _empty_sources():
+    return {"whois": {}, "geolocation": []}
+
+class AnalysisResult(Record):
+    """One IP analysis; weather, performance and the raw sources stay provider-shaped dicts
+
+    `sections` is None for a full analysis, else the sorted list of sections
+    it was computed for; the others are left out when serializing.
+    """
+
+    __slots__ = ('ip', 'analysis_timestamp', 'analysis_duration', 'partial', 'pending_stages',
+                 'basic', 'geographic', 'time', 'currency', 'weather', 'network', 'security',
+                 'performance', 'sources', 'sections')
+    _defaults = {
+        'analysis_duration': 0, 'partial': False, 'pending_stages': list,
+        'basic': Basic, 'geographic': Geographic, 'time': TimeInfo, 'currency': Currency,
+        'weather': lambda: {"available": False}, 'network': Network, 'security': Security,
+        'performance': dict, 'sources': _empty_sources
+    }
+    _nested = {'basic': Basic, 'geographic': Geographic, 'time': TimeInfo, 'currency': Currency,
+               'network': Network, 'security': Security}
+
+    def to_dict(self, include_sources=True):
+        """Plain dict for JSON; raw provider payloads are referenced, not copied"""
+        data = Record.to_dict(self)
+        if not include_sources or self.sources is None:
+            del data['sources']
+        if self.sections is None:
+            del data['sections']
+        else:
+            for section in ALL_SECTIONS.difference(self.sections):
+                for key in SECTION_KEYS.get(section, (section,)):
+                    del data[key]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        result = super().from_dict(data)
+        if 'sources' not in data:
+            result.sources = None  # stored without raw sources (ANALYSIS_RAW_SOURCES=false), keep it that way
+        return result
+
+    def select(self, sections):
+        """Shallow view of this result limited to `sections` (a subset of what it covers)"""
+        view = type(self)(**{name: getattr(self, name) for name in self.__slots__})
+        view.sections = None if sections == ALL_SECTIONS else sorted(sections)
+        return view
+
+def plain(data, include_sources=True):
+    """JSON-ready form of an analysis result; error dicts pass through unchanged"""
+    if isinstance(data, AnalysisResult):
+        return data.to_dict(include_sources)
+    return data
+
+def dumps(value):
+    """Compact JSON bytes, through orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:  # e.g. integers beyond 64 bits; the standard encoder handles them
+            pass
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
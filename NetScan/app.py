@@ -3,25 +3,33 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file
-import socket
-import json
-import requests
-from ipwhois import IPWhois
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file, Response, stream_with_context
 from pytz import country_timezones, timezone
 from datetime import datetime as dt, timedelta
 import ipaddress
 import re
+import math
 import time
 import threading
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
 import csv
 import io
 
 # Production imports
 from config import config
 from firebase_service import init_firebase, get_firebase_service
-from security import SecurityMiddleware, validate_ip_input, sanitize_output
+from cache import init_cache, MemoryCache, TieredCache, MISS
+from http_client import init_http_client, get_async_http_client
+from provider_scheduler import init_scheduler
+from tor_exits import init_tor_index
+from prefix_index import PrefixIndex
+from geo_db import open_geo_database
+from dns_resolver import init_resolver
+from singleflight import SingleFlight
+from analysis_model import AnalysisResult, Currency, Coordinates, ALL_SECTIONS, parse_sections, plain
+from classifier import classify_usage_type, classify_threats, classify_performance, is_datacenter
+from security import SecurityMiddleware, validate_ip_input, validate_ip_list, sanitized_dumps, IPV4, IPV6, HOSTNAME
 from logging_config import setup_logging, log_user_activity, log_security_event, monitor_performance
 
 app = Flask(__name__)
@@ -37,13 +45,73 @@ loggers = setup_logging(app)
 security = SecurityMiddleware(app)
 
 # Initialize Firebase service
-firebase_service = init_firebase(app.config)
+firebase_service = init_firebase(app.config, lazy=app.config.get('LAZY_INIT', False))
+
+# Initialize upstream response cache
+response_cache = init_cache(app.config)
+
+# Rate limits and blocks shared by every worker through the cache's shared tier
+if app.config.get('RATE_LIMIT_SHARED', True) and response_cache.shared is not None:
+    security.use_shared_state(response_cache.shared)
+
+# Runtime blocks from /admin/blocklist reach every worker through the shared tier
+if response_cache.shared is not None:
+    security.blocklist.use_shared(response_cache.shared)
+
+# Pooled keep-alive HTTP client shared by every upstream call
+http_client = init_http_client(app.config)
+
+# Per-provider quota buckets (one per deployment with Redis) and circuit breakers
+provider_scheduler = init_scheduler(app.config, shared=response_cache.shared)
+
+# Initialize background-refreshed Tor exit node index
+tor_exit_index = init_tor_index(app.config, http=http_client, start=not app.config.get('LAZY_INIT', False))
+
+# Asynchronous PTR resolver with positive/negative caching
+dns_resolver = init_resolver(app.config)
+
+# Finished analyses, shared across workers through the response cache's shared tier
+analysis_cache = TieredCache(
+    MemoryCache(max_entries=app.config.get('ANALYSIS_CACHE_MAX_ENTRIES', 2000)),
+    response_cache.shared,
+    namespace='netscan:analysis:',
+    encode=AnalysisResult.to_dict,
+    decode=AnalysisResult.from_dict
+)
+
+# Optional offline geolocation database (compiled with geo_db.py)
+geo_database = open_geo_database(app.config.get('GEO_DB_PATH'))
+
+# RDAP results are per network, so they are cached by CIDR and served by longest-prefix match
+whois_cache = PrefixIndex(
+    max_entries=app.config.get('WHOIS_CACHE_MAX_ENTRIES', 50000),
+    default_ttl=app.config.get('WHOIS_CACHE_TTL', 7 * 24 * 3600)
+)
 
 app.secret_key = 'netscan_pro_2025_ultimate_secret_key'
 
 # Configuration
 OPENWEATHER_API_KEY = "your_openweather_api_key_here"  # Get from openweathermap.org
 
+# Shared pool for the independent enrichment stages of an analysis
+analysis_executor = ThreadPoolExecutor(
+    max_workers=app.config.get('ANALYSIS_MAX_WORKERS', 64),
+    thread_name_prefix='netscan-stage'
+)
+
+# Geolocation provider requests (and their hedges) get their own pool: run from a
+# stage task in analysis_executor, they must not queue behind the stages waiting on them
+geo_request_executor = ThreadPoolExecutor(
+    max_workers=app.config.get('GEO_REQUEST_WORKERS', 32),
+    thread_name_prefix='netscan-geo'
+)
+
+# Bounded pool shared by all bulk jobs, so concurrent batches cannot exhaust upstreams
+bulk_executor = ThreadPoolExecutor(
+    max_workers=app.config.get('BULK_CONCURRENCY', 16),
+    thread_name_prefix='netscan-bulk'
+)
+
 # Enhanced mappings
 continent_map = {
     "US": "North America", "CA": "North America", "MX": "North America",
@@ -102,402 +170,404 @@ country_timezones_map = {
     "RU": "Europe/Moscow"
 }
 
-# Multi-language support
-TRANSLATIONS = {
-    'en': {
-        'title': 'NetScan Pro - Advanced Network Intelligence Platform',
-        'subtitle': 'Advanced Network Intelligence & Threat Analysis Platform',
-        'search_placeholder': 'Enter IP address for comprehensive network intelligence analysis...',
-        'analyze_btn': 'Analyze Network',
-        'basic_info': 'Basic Information',
-        'geographic_intel': 'Geographic Intelligence',
-        'time_intel': 'Time Intelligence',
-        'network_intel': 'Network Intelligence',
-        'security_intel': 'Security & Threat Intelligence',
-        'performance_analysis': 'Performance Analysis',
-        'weather_info': 'Weather Information',
-        'currency_info': 'Currency Information',
-        'country': 'Country',
-        'city': 'City',
-        'timezone': 'Timezone',
-        'risk_score': 'Risk Score',
-        'export_report': 'Export Report',
-        'login': 'Login',
-        'register': 'Register',
-        'dashboard': 'Dashboard',
-        'bulk_analysis': 'Bulk Analysis',
-        'history': 'History'
-    },
-    'pt': {
-        'title': 'NetScan Pro - Plataforma Avançada de Inteligência de Rede',
-        'subtitle': 'Plataforma Avançada de Inteligência de Rede e Análise de Ameaças',
-        'search_placeholder': 'Digite o endereço IP para análise abrangente de inteligência de rede...',
-        'analyze_btn': 'Analisar Rede',
-        'basic_info': 'Informações Básicas',
-        'geographic_intel': 'Inteligência Geográfica',
-        'time_intel': 'Inteligência Temporal',
-        'network_intel': 'Inteligência de Rede',
-        'security_intel': 'Inteligência de Segurança e Ameaças',
-        'performance_analysis': 'Análise de Performance',
-        'weather_info': 'Informações Meteorológicas',
-        'currency_info': 'Informações de Moeda',
-        'country': 'País',
-        'city': 'Cidade',
-        'timezone': 'Fuso Horário',
-        'risk_score': 'Pontuação de Risco',
-        'export_report': 'Exportar Relatório',
-        'login': 'Entrar',
-        'register': 'Registrar',
-        'dashboard': 'Painel',
-        'bulk_analysis': 'Análise em Lote',
-        'history': 'Histórico'
-    },
-    'es': {
-        'title': 'NetScan Pro - Plataforma Avanzada de Inteligencia de Red',
-        'subtitle': 'Plataforma Avanzada de Inteligencia de Red y Análisis de Amenazas',
-        'search_placeholder': 'Ingrese la dirección IP para análisis integral de inteligencia de red...',
-        'analyze_btn': 'Analizar Red',
-        'basic_info': 'Información Básica',
-        'geographic_intel': 'Inteligencia Geográfica',
-        'time_intel': 'Inteligencia Temporal',
-        'network_intel': 'Inteligencia de Red',
-        'security_intel': 'Inteligencia de Seguridad y Amenazas',
-        'performance_analysis': 'Análisis de Rendimiento',
-        'weather_info': 'Información Meteorológica',
-        'currency_info': 'Información de Moneda',
-        'country': 'País',
-        'city': 'Ciudad',
-        'timezone': 'Zona Horaria',
-        'risk_score': 'Puntuación de Riesgo',
-        'export_report': 'Exportar Informe',
-        'login': 'Iniciar Sesión',
-        'register': 'Registrarse',
-        'dashboard': 'Panel',
-        'bulk_analysis': 'Análisis en Lote',
-        'history': 'Historial'
-    },
-    'fr': {
-        'title': 'NetScan Pro - Plateforme Avancée d\'Intelligence Réseau',
-        'subtitle': 'Plateforme Avancée d\'Intelligence Réseau et d\'Analyse des Menaces',
-        'search_placeholder': 'Entrez l\'adresse IP pour une analyse complète de l\'intelligence réseau...',
-        'analyze_btn': 'Analyser le Réseau',
-        'basic_info': 'Informations de Base',
-        'geographic_intel': 'Intelligence Géographique',
-        'time_intel': 'Intelligence Temporelle',
-        'network_intel': 'Intelligence Réseau',
-        'security_intel': 'Intelligence de Sécurité et Menaces',
-        'performance_analysis': 'Analyse de Performance',
-        'weather_info': 'Informations Météorologiques',
-        'currency_info': 'Informations Monétaires',
-        'country': 'Pays',
-        'city': 'Ville',
-        'timezone': 'Fuseau Horaire',
-        'risk_score': 'Score de Risque',
-        'export_report': 'Exporter le Rapport',
-        'login': 'Connexion',
-        'register': 'S\'inscrire',
-        'dashboard': 'Tableau de Bord',
-        'bulk_analysis': 'Analyse en Lot',
-        'history': 'Historique'
-    },
-    'de': {
-        'title': 'NetScan Pro - Erweiterte Netzwerk-Intelligence-Plattform',
-        'subtitle': 'Erweiterte Netzwerk-Intelligence und Bedrohungsanalyse-Plattform',
-        'search_placeholder': 'IP-Adresse für umfassende Netzwerk-Intelligence-Analyse eingeben...',
-        'analyze_btn': 'Netzwerk Analysieren',
-        'basic_info': 'Grundinformationen',
-        'geographic_intel': 'Geografische Intelligence',
-        'time_intel': 'Zeit-Intelligence',
-        'network_intel': 'Netzwerk-Intelligence',
-        'security_intel': 'Sicherheits- und Bedrohungs-Intelligence',
-        'performance_analysis': 'Leistungsanalyse',
-        'weather_info': 'Wetterinformationen',
-        'currency_info': 'Währungsinformationen',
-        'country': 'Land',
-        'city': 'Stadt',
-        'timezone': 'Zeitzone',
-        'risk_score': 'Risiko-Score',
-        'export_report': 'Bericht Exportieren',
-        'login': 'Anmelden',
-        'register': 'Registrieren',
-        'dashboard': 'Dashboard',
-        'bulk_analysis': 'Massenanalyse',
-        'history': 'Verlauf'
-    },
-    'ja': {
-        'title': 'NetScan Pro - 高度なネットワークインテリジェンスプラットフォーム',
-        'subtitle': '高度なネットワークインテリジェンスと脅威分析プラットフォーム',
-        'search_placeholder': '包括的なネットワークインテリジェンス分析のためのIPアドレスを入力...',
-        'analyze_btn': 'ネットワーク分析',
-        'basic_info': '基本情報',
-        'geographic_intel': '地理的インテリジェンス',
-        'time_intel': '時間インテリジェンス',
-        'network_intel': 'ネットワークインテリジェンス',
-        'security_intel': 'セキュリティ・脅威インテリジェンス',
-        'performance_analysis': 'パフォーマンス分析',
-        'weather_info': '天気情報',
-        'currency_info': '通貨情報',
-        'country': '国',
-        'city': '都市',
-        'timezone': 'タイムゾーン',
-        'risk_score': 'リスクスコア',
-        'export_report': 'レポートエクスポート',
-        'login': 'ログイン',
-        'register': '登録',
-        'dashboard': 'ダッシュボード',
-        'bulk_analysis': 'バルク分析',
-        'history': '履歴'
-    },
-    'ko': {
-        'title': 'NetScan Pro - 고급 네트워크 인텔리전스 플랫폼',
-        'subtitle': '고급 네트워크 인텔리전스 및 위협 분석 플랫폼',
-        'search_placeholder': '포괄적인 네트워크 인텔리전스 분석을 위한 IP 주소 입력...',
-        'analyze_btn': '네트워크 분석',
-        'basic_info': '기본 정보',
-        'geographic_intel': '지리적 인텔리전스',
-        'time_intel': '시간 인텔리전스',
-        'network_intel': '네트워크 인텔리전스',
-        'security_intel': '보안 및 위협 인텔리전스',
-        'performance_analysis': '성능 분석',
-        'weather_info': '날씨 정보',
-        'currency_info': '통화 정보',
-        'country': '국가',
-        'city': '도시',
-        'timezone': '시간대',
-        'risk_score': '위험 점수',
-        'export_report': '보고서 내보내기',
-        'login': '로그인',
-        'register': '등록',
-        'dashboard': '대시보드',
-        'bulk_analysis': '대량 분석',
-        'history': '기록'
-    },
-    'zh': {
-        'title': 'NetScan Pro - 高级网络情报平台',
-        'subtitle': '高级网络情报和威胁分析平台',
-        'search_placeholder': '输入IP地址进行全面网络情报分析...',
-        'analyze_btn': '分析网络',
-        'basic_info': '基本信息',
-        'geographic_intel': '地理情报',
-        'time_intel': '时间情报',
-        'network_intel': '网络情报',
-        'security_intel': '安全和威胁情报',
-        'performance_analysis': '性能分析',
-        'weather_info': '天气信息',
-        'currency_info': '货币信息',
-        'country': '国家',
-        'city': '城市',
-        'timezone': '时区',
-        'risk_score': '风险评分',
-        'export_report': '导出报告',
-        'login': '登录',
-        'register': '注册',
-        'dashboard': '仪表板',
-        'bulk_analysis': '批量分析',
-        'history': '历史'
-    },
-    'sv': {
-        'title': 'NetScan Pro - Avancerad Nätverksintelligensplattform',
-        'subtitle': 'Avancerad Nätverksintelligens och Hotanalysplattform',
-        'search_placeholder': 'Ange IP-adress för omfattande nätverksintelligensanalys...',
-        'analyze_btn': 'Analysera Nätverk',
-        'basic_info': 'Grundläggande Information',
-        'geographic_intel': 'Geografisk Intelligens',
-        'time_intel': 'Tidsintelligens',
-        'network_intel': 'Nätverksintelligens',
-        'security_intel': 'Säkerhets- och Hotintelligens',
-        'performance_analysis': 'Prestandaanalys',
-        'weather_info': 'Väderinformation',
-        'currency_info': 'Valutainformation',
-        'country': 'Land',
-        'city': 'Stad',
-        'timezone': 'Tidszon',
-        'risk_score': 'Riskpoäng',
-        'export_report': 'Exportera Rapport',
-        'login': 'Logga In',
-        'register': 'Registrera',
-        'dashboard': 'Instrumentpanel',
-        'bulk_analysis': 'Massanalys',
-        'history': 'Historik'
-    },
-    'ru': {
-        'title': 'NetScan Pro - Продвинутая Платформа Сетевой Разведки',
-        'subtitle': 'Продвинутая Платформа Сетевой Разведки и Анализа Угроз',
-        'search_placeholder': 'Введите IP-адрес для комплексного анализа сетевой разведки...',
-        'analyze_btn': 'Анализировать Сеть',
-        'basic_info': 'Основная Информация',
-        'geographic_intel': 'Географическая Разведка',
-        'time_intel': 'Временная Разведка',
-        'network_intel': 'Сетевая Разведка',
-        'security_intel': 'Разведка Безопасности и Угроз',
-        'performance_analysis': 'Анализ Производительности',
-        'weather_info': 'Информация о Погоде',
-        'currency_info': 'Информация о Валюте',
-        'country': 'Страна',
-        'city': 'Город',
-        'timezone': 'Часовой Пояс',
-        'risk_score': 'Оценка Риска',
-        'export_report': 'Экспорт Отчета',
-        'login': 'Вход',
-        'register': 'Регистрация',
-        'dashboard': 'Панель',
-        'bulk_analysis': 'Массовый Анализ',
-        'history': 'История'
-    },
-    'nl': {
-        'title': 'NetScan Pro - Geavanceerd Netwerk Intelligence Platform',
-        'subtitle': 'Geavanceerd Netwerk Intelligence en Dreigingsanalyse Platform',
-        'search_placeholder': 'Voer IP-adres in voor uitgebreide netwerk intelligence analyse...',
-        'analyze_btn': 'Netwerk Analyseren',
-        'basic_info': 'Basisinformatie',
-        'geographic_intel': 'Geografische Intelligence',
-        'time_intel': 'Tijd Intelligence',
-        'network_intel': 'Netwerk Intelligence',
-        'security_intel': 'Beveiligings- en Dreigingsintelligence',
-        'performance_analysis': 'Prestatie-analyse',
-        'weather_info': 'Weerinformatie',
-        'currency_info': 'Valuta-informatie',
-        'country': 'Land',
-        'city': 'Stad',
-        'timezone': 'Tijdzone',
-        'risk_score': 'Risicoscore',
-        'export_report': 'Rapport Exporteren',
-        'login': 'Inloggen',
-        'register': 'Registreren',
-        'dashboard': 'Dashboard',
-        'bulk_analysis': 'Bulk Analyse',
-        'history': 'Geschiedenis'
-    },
-    'hi': {
-        'title': 'NetScan Pro - उन्नत नेटवर्क इंटेलिजेंस प्लेटफ़ॉर्म',
-        'subtitle': 'उन्नत नेटवर्क इंटेलिजेंस और खतरा विश्लेषण प्लेटफ़ॉर्म',
-        'search_placeholder': 'व्यापक नेटवर्क इंटेलिजेंस विश्लेषण के लिए IP पता दर्ज करें...',
-        'analyze_btn': 'नेटवर्क का विश्लेषण करें',
-        'basic_info': 'बुनियादी जानकारी',
-        'geographic_intel': 'भौगोलिक इंटेलिजेंस',
-        'time_intel': 'समय इंटेलिजेंस',
-        'network_intel': 'नेटवर्क इंटेलिजेंस',
-        'security_intel': 'सुरक्षा और खतरा इंटेलिजेंस',
-        'performance_analysis': 'प्रदर्शन विश्लेषण',
-        'weather_info': 'मौसम की जानकारी',
-        'currency_info': 'मुद्रा की जानकारी',
-        'country': 'देश',
-        'city': 'शहर',
-        'timezone': 'समय क्षेत्र',
-        'risk_score': 'जोखिम स्कोर',
-        'export_report': 'रिपोर्ट निर्यात करें',
-        'login': 'लॉगिन',
-        'register': 'पंजीकरण',
-        'dashboard': 'डैशबोर्ड',
-        'bulk_analysis': 'बल्क विश्लेषण',
-        'history': 'इतिहास'
-    }
-}
+# Multi-language support (the string table lives in translations.py and loads on first use)
+def get_translations(lang):
+    """UI strings for lang, or None when the language is not supported"""
+    from translations import TRANSLATIONS
+    return TRANSLATIONS.get(lang)
 
 # Global cache for better performance
-@lru_cache(maxsize=1000)
-def cached_request(url, timeout=10):
+def cached_request(url, timeout=10, source='default', provider=None):
+    """GET a JSON document, caching successes per source TTL and failures briefly
+
+    With a provider name the call is gated by its quota bucket and circuit
+    breaker: a throttled or failing provider is skipped instead of waited on.
+    """
+    data = response_cache.get(url)
+    if data is not MISS:
+        return data
+    
+    if provider and not provider_scheduler.acquire(provider):
+        return None
+    
+    status, headers = None, None
+    started = time.perf_counter()
     try:
-        response = requests.get(url, timeout=timeout)
-        return response.json() if response.status_code == 200 else None
+        response = http_client.get(url, timeout=timeout)
+        status, headers = response.status_code, response.headers
+        data = response.json() if status == 200 else None
     except:
-        return None
+        data = None
+    
+    return store_response(url, data, source, provider, status, headers, time.perf_counter() - started)
 
-# Enhanced detection functions
-def detect_usage_type(asn_description, org_name, isp_name):
-    text = f"{asn_description or ''} {org_name or ''} {isp_name or ''}".lower()
+def store_response(url, data, source, provider, status, headers, latency):
+    """Report an upstream outcome to the provider scheduler and cache it"""
+    if provider:
+        provider_scheduler.record(provider, status, headers, latency=latency)
+        if status == 429:
+            return None  # quota, not an answer about this URL - nothing to cache
     
-    if any(keyword in text for keyword in ['google', 'amazon', 'microsoft', 'cloudflare', 'digital ocean', 'linode', 'vultr']):
-        return "DCH"  # Data Center/Hosting
-    elif any(keyword in text for keyword in ['mobile', 'cellular', 'wireless', 'gsm', 'lte', 'vivo', 'claro', 'tim', 'oi', 'vodafone', 'at&t', 'verizon']):
-        return "MOB"  # Mobile
-    elif any(keyword in text for keyword in ['university', 'education', 'school', 'college', 'academic']):
-        return "EDU"  # Educational
-    elif any(keyword in text for keyword in ['government', 'military', 'gov', 'defense']):
-        return "GOV"  # Government
-    elif any(keyword in text for keyword in ['business', 'enterprise', 'corporate']):
-        return "COM"  # Commercial
+    ttls = app.config.get('CACHE_TTLS', {})
+    if data is None:
+        ttl = app.config.get('CACHE_NEGATIVE_TTL', 60)
     else:
-        return "ISP"  # Internet Service Provider
+        ttl = ttls.get(source, ttls.get('default', 3600))
+    response_cache.set(url, data, ttl)
+    return data
+
+# Enhanced detection functions
+def detect_usage_type(asn_description, org_name, isp_name):
+    # Keyword rules live in classifier.USAGE_TYPE_RULES
+    return classify_usage_type(asn_description, org_name, isp_name)
 
 def reverse_dns(ip):
     try:
-        result = socket.gethostbyaddr(ip)[0]
-        return result
+        return dns_resolver.lookup(ip)
     except:
         return None
 
 # Enhanced geolocation with multiple sources
-def get_comprehensive_geo_data(ip):
-    print(f"🌍 Getting comprehensive geo data for {ip}")
-    geo_sources = []
-    
-    # Source 1: ip-api.com (most comprehensive)
+def _split_asn(value):
+    """'AS15169 Google LLC' -> ('15169', 'Google LLC')"""
+    if not value:
+        return None, None
+    number, _, name = value.partition(" ")
+    return number.upper().replace("AS", "") or None, name or None
+
+def _normalize_ip_api(data):
+    asn, _ = _split_asn(data.get("as"))
+    return {
+        "country_code": data.get("countryCode"),
+        "country_name": data.get("country"),
+        "continent": data.get("continent"),
+        "continent_code": data.get("continentCode"),
+        "region": data.get("regionName"),
+        "city": data.get("city"),
+        "district": data.get("district"),
+        "postal_code": data.get("zip"),
+        "latitude": data.get("lat"),
+        "longitude": data.get("lon"),
+        "timezone": data.get("timezone"),
+        "utc_offset": data.get("offset"),
+        "asn": asn,
+        "organization": data.get("org"),
+        "isp": data.get("isp"),
+        "is_mobile": data.get("mobile", False),
+        "is_proxy": data.get("proxy", False),
+        "is_hosting": data.get("hosting", False)
+    }
+
+def _normalize_ipapi_co(data):
+    asn, _ = _split_asn(data.get("asn"))
+    return {
+        "country_code": data.get("country_code"),
+        "country_name": data.get("country_name"),
+        "continent_code": data.get("continent_code"),
+        "region": data.get("region"),
+        "city": data.get("city"),
+        "postal_code": data.get("postal"),
+        "latitude": data.get("latitude"),
+        "longitude": data.get("longitude"),
+        "timezone": data.get("timezone"),
+        "asn": asn,
+        "organization": data.get("org")
+    }
+
+def _normalize_ipinfo(data):
+    asn, organization = _split_asn(data.get("org"))
+    lat, _, lon = (data.get("loc") or "").partition(",")
     try:
-        url = f"http://ip-api.com/json/{ip}?fields=status,continent,continentCode,country,countryCode,region,regionName,city,district,zip,lat,lon,timezone,offset,currency,isp,org,as,asname,mobile,proxy,hosting,query"
-        data = cached_request(url)
-        if data and data.get("status") == "success":
-            geo_sources.append(("ip-api.com", data))
-    except Exception as e:
-        print(f"Error with ip-api.com: {e}")
+        lat, lon = float(lat), float(lon)
+    except ValueError:
+        lat = lon = None
+    return {
+        "country_code": data.get("country"),
+        "region": data.get("region"),
+        "city": data.get("city"),
+        "postal_code": data.get("postal"),
+        "latitude": lat,
+        "longitude": lon,
+        "timezone": data.get("timezone"),
+        "asn": asn,
+        "organization": organization
+    }
+
+IP_API_FIELDS = "status,continent,continentCode,country,countryCode,region,regionName,city,district,zip,lat,lon,timezone,offset,currency,isp,org,as,asname,mobile,proxy,hosting,query"
+IP_API_URL = "http://ip-api.com/json/{ip}?fields=" + IP_API_FIELDS
+IP_API_BATCH_URL = "http://ip-api.com/batch?fields=" + IP_API_FIELDS
+IP_API_BATCH_SIZE = 100  # provider limit per batch request
+
+GEO_PROVIDERS = [
+    # (name, url template, validity check, normalizer) - listed by preference when equally fast
+    ("ip-api.com", IP_API_URL, lambda data: data.get("status") == "success", _normalize_ip_api),
+    ("ipapi.co", "http://ipapi.co/{ip}/json/", lambda data: 'error' not in data, _normalize_ipapi_co),
+    ("ipinfo.io", "http://ipinfo.io/{ip}/json", lambda data: 'bogon' not in data, _normalize_ipinfo),
+]
+
+# Output fields the analysis needs from geolocation; anything else has local fallbacks
+GEO_REQUIRED_FIELDS = ("country_code", "region", "city", "latitude", "longitude", "timezone")
+
+# Fields each provider is able to supply, taken from its normalizer
+GEO_PROVIDER_FIELDS = {name: frozenset(normalize({})) for name, _, _, normalize in GEO_PROVIDERS}
+
+def normalize_geo_source(provider, data):
+    """Map a provider payload onto the local-db field names used by the merge"""
+    for name, _, _, normalize in GEO_PROVIDERS:
+        if name == provider:
+            return normalize(data)
+    return data
+
+def fetch_geo_source(provider, ip):
+    """Query a single geolocation provider, returning its payload or None"""
+    for name, url_template, is_valid, _ in GEO_PROVIDERS:
+        if name != provider:
+            continue
+        try:
+            data = cached_request(url_template.format(ip=ip), source='geolocation', provider=name)
+            if data and is_valid(data):
+                return data
+        except Exception as e:
+            print(f"Error with {name}: {e}")
+        return None
+    return None
+
+def peek_geo_source(provider, ip):
+    """Valid provider payload already in the response cache, without any network call"""
+    for name, url_template, is_valid, _ in GEO_PROVIDERS:
+        if name == provider:
+            data = response_cache.get(url_template.format(ip=ip))
+            return data if data is not MISS and data and is_valid(data) else None
+    return None
+
+def prefetch_ip_api_batch(ips):
+    """Geolocate up to IP_API_BATCH_SIZE addresses with one ip-api.com batch POST
+
+    Each answer is stored under the single-IP URL, so the per-IP analyses that
+    follow find it in the response cache instead of calling the provider.
+    """
+    wanted = []
+    for ip in dict.fromkeys(ips):
+        try:
+            ipaddress.ip_address(ip)
+        except ValueError:
+            continue  # hostnames and invalid input take the normal path
+        if response_cache.get(IP_API_URL.format(ip=ip)) is MISS:
+            wanted.append(ip)
+    if not wanted or not provider_scheduler.acquire("ip-api.com/batch"):
+        return 0
     
-    # Source 2: ipapi.co
+    status, headers, results = None, None, []
+    started = time.perf_counter()
     try:
-        url = f"http://ipapi.co/{ip}/json/"
-        data = cached_request(url)
-        if data and 'error' not in data:
-            geo_sources.append(("ipapi.co", data))
+        response = http_client.post(IP_API_BATCH_URL, json=wanted[:IP_API_BATCH_SIZE], timeout=10)
+        status, headers = response.status_code, response.headers
+        if status == 200:
+            results = response.json()
     except Exception as e:
-        print(f"Error with ipapi.co: {e}")
+        print(f"ip-api batch error: {e}")
+    provider_scheduler.record("ip-api.com/batch", status, headers, latency=time.perf_counter() - started)
     
-    # Source 3: ipinfo.io (free tier)
-    try:
-        url = f"http://ipinfo.io/{ip}/json"
-        data = cached_request(url)
-        if data and 'bogon' not in data:
-            geo_sources.append(("ipinfo.io", data))
-    except Exception as e:
-        print(f"Error with ipinfo.io: {e}")
+    ttls = app.config.get('CACHE_TTLS', {})
+    seeded = 0
+    for data in results if isinstance(results, list) else []:
+        if not isinstance(data, dict) or not data.get("query"):
+            continue
+        if data.get("status") == "success":
+            response_cache.set(IP_API_URL.format(ip=data["query"]), data, ttls.get('geolocation', ttls.get('default', 3600)))
+            seeded += 1
+        else:
+            response_cache.set(IP_API_URL.format(ip=data["query"]), data, app.config.get('CACHE_NEGATIVE_TTL', 60))
+    print(f"🌍 ip-api batch geolocated {seeded}/{len(wanted)} IPs")
+    return seeded
+
+def get_hedged_geo_data(ip, providers, deadline):
+    """First valid answer from the providers, fastest first, hedging after each one's p90
+
+    The next-ranked provider is asked when the current one fails or has not
+    answered within its recent p90 latency; whichever answers first wins.
+    Requests not yet started are cancelled, but a losing request already in
+    flight cannot be: it keeps its geo_request_executor thread and the quota
+    token it took until the provider answers or the HTTP budget runs out, and
+    its answer is still cached for later analyses. (The ASGI pipeline cancels
+    losers outright.)
+    """
+    ranked = provider_scheduler.rank(providers)
+    # An answer already cached (e.g. seeded by a bulk batch) beats any network call
+    for name in ranked:
+        data = peek_geo_source(name, ip)
+        if data:
+            return [(name, data)]
     
+    in_flight = {}
+    asked = 0
+    try:
+        while time.time() < deadline and (ranked or in_flight):
+            hedge_at = deadline
+            if ranked:
+                name = ranked.pop(0)
+                in_flight[geo_request_executor.submit(fetch_geo_source, name, ip)] = (name, asked)
+                asked += 1
+                hedge_at = min(deadline, time.time() + provider_scheduler.hedge_delay(name))
+            done, _ = wait(list(in_flight), timeout=max(0, hedge_at - time.time()), return_when=FIRST_COMPLETED)
+            for future in done:
+                name, order = in_flight.pop(future)
+                data = future.result()
+                if data:
+                    provider_scheduler.record_win(name, hedged=order > 0)
+                    return [(name, data)]
+        return []
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+def covered_geo_fields(geo_data):
+    """Required fields a normalized record actually fills, by the same truthiness the merge uses
+
+    Empty strings (ip-api's unknown region/city) count as missing, and so do
+    coordinates unless both are set, as in _geo_coordinates (0/0 is no fix).
+    """
+    covered = {field for field in GEO_REQUIRED_FIELDS if geo_data.get(field)}
+    if not ("latitude" in covered and "longitude" in covered):
+        covered -= {"latitude", "longitude"}
+    return covered
+
+def get_geo_by_coverage(ip, providers, deadline, covered=()):
+    """Query providers only while required fields are missing
+
+    The primary answer comes from the hedged fastest provider; afterwards only
+    providers able to supply a still-missing field are asked, one at a time.
+    """
+    missing = set(GEO_REQUIRED_FIELDS) - set(covered)
+    remaining = list(providers)
+    geo_sources = []
+    while missing and remaining and time.time() < deadline:
+        candidates = [name for name in remaining if GEO_PROVIDER_FIELDS.get(name, frozenset()) & missing]
+        if not candidates:
+            break
+        answer = get_hedged_geo_data(ip, candidates, deadline)
+        if not answer:
+            break
+        name, data = answer[0]
+        geo_sources.append((name, data))
+        remaining.remove(name)
+        missing -= covered_geo_fields(normalize_geo_source(name, data))
     return geo_sources
 
+def get_comprehensive_geo_data(ip):
+    print(f"🌍 Getting comprehensive geo data for {ip}")
+    providers = [name for name, _, _, _ in GEO_PROVIDERS]
+    return get_geo_by_coverage(ip, providers, time.time() + app.config.get('ANALYSIS_DEADLINE', 8))
+
 # Weather data integration
+def weather_tile(lat, lon):
+    """Center of the grid cell containing the coordinates (WEATHER_TILE_DEGREES wide)"""
+    size = app.config.get('WEATHER_TILE_DEGREES', 0.1)
+    # Longitudes wrap (180 is -180); the polar cells' centers are clamped onto the globe
+    lon = (float(lon) + 180) % 360 - 180
+    return (
+        round(min(max((math.floor(float(lat) / size) + 0.5) * size, -90.0), 90.0), 4),
+        round(min(max((math.floor(lon / size) + 0.5) * size, -180.0), 180.0), 4)
+    )
+
+WEATHER_UNAVAILABLE = {
+    "temperature": "N/A",
+    "description": "Weather data unavailable",
+    "humidity": "N/A",
+    "available": False
+}
+
+def weather_url(lat, lon):
+    """OpenWeather URL for the coordinates' tile, or None without an API key"""
+    if not OPENWEATHER_API_KEY or OPENWEATHER_API_KEY == "your_openweather_api_key_here":
+        return None
+    # Every IP in the same tile shares one cached upstream answer
+    lat, lon = weather_tile(lat, lon)
+    return f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
+
+def format_weather(data):
+    return {
+        "temperature": f"{data['main']['temp']}°C",
+        "description": data['weather'][0]['description'].title(),
+        "humidity": f"{data['main']['humidity']}%",
+        "pressure": f"{data['main']['pressure']} hPa",
+        "wind_speed": f"{data.get('wind', {}).get('speed', 0)} m/s",
+        "available": True
+    }
+
 def get_real_weather_data(lat, lon):
     try:
-        if OPENWEATHER_API_KEY and OPENWEATHER_API_KEY != "your_openweather_api_key_here":
-            url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_API_KEY}&units=metric"
-            data = cached_request(url)
-            
+        url = weather_url(lat, lon)
+        if url:
+            data = cached_request(url, source='weather', provider='openweathermap')
             if data:
-                return {
-                    "temperature": f"{data['main']['temp']}°C",
-                    "description": data['weather'][0]['description'].title(),
-                    "humidity": f"{data['main']['humidity']}%",
-                    "pressure": f"{data['main']['pressure']} hPa",
-                    "wind_speed": f"{data.get('wind', {}).get('speed', 0)} m/s",
-                    "available": True
-                }
+                return format_weather(data)
     except Exception as e:
         print(f"Weather API error: {e}")
     
-    return {
-        "temperature": "N/A",
-        "description": "Weather data unavailable",
-        "humidity": "N/A",
-        "available": False
-    }
+    return dict(WEATHER_UNAVAILABLE)
 
 # Enhanced WHOIS with more details
+def whois_cache_networks(ip, whois_data):
+    """Networks a WHOIS result may be shared across: the returned CIDRs containing ip, narrowed to its BGP prefix
+
+    The asn* fields describe the route the queried address is announced in
+    (asn_cidr), not the registration block, so a result is never shared wider
+    than that route. Blocks broader than WHOIS_CACHE_MIN_PREFIX are not cached
+    at all: a more-specific route inside one would be answered as its parent.
+    """
+    address = ipaddress.ip_address(ip)
+    try:
+        route = ipaddress.ip_network(whois_data.get("asn_cidr") or "", strict=False)
+    except ValueError:
+        route = None
+    if route is not None and address not in route:
+        route = None
+    min_prefix = app.config.get('WHOIS_CACHE_MIN_PREFIX', {4: 16, 6: 32})[address.version]
+    
+    networks = set()
+    for cidr in (whois_data.get("network_cidr") or "").split(","):
+        try:
+            network = ipaddress.ip_network(cidr.strip(), strict=False)
+        except ValueError:
+            continue
+        if address not in network:
+            continue
+        # Both contain the address, so one is nested in the other: keep the narrower
+        if route is not None and route.prefixlen > network.prefixlen:
+            network = route
+        if network.prefixlen >= min_prefix:
+            networks.add(network)
+    return networks
+
+# Expired networks are dropped on the first lookup after each WHOIS_CACHE_PURGE_INTERVAL
+whois_purged_at = time.time()
+
+def purge_whois_cache():
+    global whois_purged_at
+    now = time.time()
+    if now - whois_purged_at >= app.config.get('WHOIS_CACHE_PURGE_INTERVAL', 3600):
+        whois_purged_at = now
+        whois_cache.purge_expired()
+
 def get_enhanced_whois_data(ip):
     try:
+        purge_whois_cache()
+        cached = whois_cache.lookup(ip)
+        if cached is not None:
+            print(f"🔍 WHOIS served from network cache for {ip}")
+            return dict(cached)
+        
         print(f"🔍 Enhanced WHOIS lookup for {ip}")
+        from ipwhois import IPWhois  # imported on first lookup to keep cold starts fast
         obj = IPWhois(ip)
-        res = obj.lookup_rdap(depth=2)
+        res = obj.lookup_rdap(depth=0)  # referenced entities are never used, only the network and ASN
         
         network = res.get("network", {})
         
-        return {
+        whois_data = {
             "asn": res.get("asn"),
+            "asn_cidr": res.get("asn_cidr"),
             "asn_description": res.get("asn_description"),
             "asn_country_code": res.get("asn_country_code"),
             "asn_date": res.get("asn_date"),
@@ -512,6 +582,9 @@ def get_enhanced_whois_data(ip):
             "network_cidr": network.get("cidr"),
             "network_parent_handle": network.get("parent_handle")
         }
+        for cache_network in whois_cache_networks(ip, whois_data):
+            whois_cache.insert(cache_network, whois_data)
+        return dict(whois_data)
     except Exception as e:
         print(f"Enhanced WHOIS error: {e}")
         return {}
@@ -526,21 +599,10 @@ def analyze_security_threats(ip, domain, org, asn_desc):
         "last_seen": None
     }
     
-    # Basic threat analysis
-    text = f"{domain or ''} {org or ''} {asn_desc or ''}".lower()
-    
-    # Check for known patterns
-    if any(keyword in text for keyword in ['tor', 'proxy', 'vpn']):
-        threats["risk_score"] += 20
-        threats["threat_types"].append("Anonymization Service")
-    
-    if any(keyword in text for keyword in ['botnet', 'malware', 'spam']):
-        threats["risk_score"] += 40
-        threats["threat_types"].append("Malicious Activity")
-    
-    if any(keyword in text for keyword in ['datacenter', 'hosting', 'cloud']):
-        threats["risk_score"] += 10
-        threats["threat_types"].append("Hosting Provider")
+    # Check for known patterns (classifier.THREAT_RULES)
+    for threat_type, score in classify_threats(domain, org, asn_desc):
+        threats["risk_score"] += score
+        threats["threat_types"].append(threat_type)
     
     # Set reputation based on score
     if threats["risk_score"] <= 10:
@@ -556,346 +618,420 @@ def analyze_security_threats(ip, domain, org, asn_desc):
 
 # Network performance analysis
 def analyze_network_performance(ip, country_code, org):
-    performance = {
-        "estimated_speed": "Unknown",
-        "connection_type": "Unknown",
-        "quality_score": 0,
-        "latency_estimate": "Unknown"
-    }
-    
-    text = f"{org or ''}".lower()
-    
-    # Estimate based on provider
-    if any(keyword in text for keyword in ['google', 'cloudflare', 'amazon', 'microsoft']):
-        performance["estimated_speed"] = "Very High (1Gbps+)"
-        performance["connection_type"] = "Fiber/Data Center"
-        performance["quality_score"] = 95
-        performance["latency_estimate"] = "< 10ms"
-    elif any(keyword in text for keyword in ['fiber', 'broadband']):
-        performance["estimated_speed"] = "High (100-1000Mbps)"
-        performance["connection_type"] = "Fiber Broadband"
-        performance["quality_score"] = 85
-        performance["latency_estimate"] = "10-30ms"
-    elif any(keyword in text for keyword in ['mobile', 'cellular', 'lte', '5g']):
-        performance["estimated_speed"] = "Medium (10-100Mbps)"
-        performance["connection_type"] = "Mobile/Cellular"
-        performance["quality_score"] = 70
-        performance["latency_estimate"] = "30-100ms"
+    # Estimate based on provider (classifier.PERFORMANCE_RULES)
+    return classify_performance(org)
+
+# Background analyses started for page views, keyed by IP
+page_executor = ThreadPoolExecutor(
+    max_workers=app.config.get('BACKGROUND_ANALYSIS_WORKERS', 4),
+    thread_name_prefix='netscan-page'
+)
+
+# Concurrent requests for the same analysis share one computation (across workers with a shared tier)
+analysis_flight = SingleFlight(
+    shared=response_cache.shared if app.config.get('SINGLEFLIGHT_SHARED_LOCK', True) else None,
+    lock_ttl=app.config.get('ANALYSIS_DEADLINE', 8) + 5
+)
+
+# Enrichment stages each response section needs (?fields= / ?exclude= skip the rest)
+SECTION_STAGES = {
+    "basic": ("reverse_dns",),
+    "geographic": ("geolocation",),
+    "time": ("geolocation",),
+    "weather": ("geolocation", "weather"),
+    "network": ("whois", "geolocation", "reverse_dns"),  # reverse DNS feeds datacenter detection
+    "security": ("whois", "geolocation", "reverse_dns"),
+    "performance": ("whois", "geolocation")
+}
+
+def analysis_stages(sections):
+    return {stage for section in sections for stage in SECTION_STAGES[section]}
+
+def analysis_key(ip, sections=ALL_SECTIONS):
+    """Cache and single-flight key: the IP, plus the section set when only some were requested"""
+    if sections == ALL_SECTIONS:
+        return ip
+    return f"{ip}|{','.join(sorted(sections))}"
+
+def get_cached_analysis(ip, sections=ALL_SECTIONS):
+    data = analysis_cache.get(analysis_key(ip, sections))
+    if data is MISS and sections != ALL_SECTIONS:
+        # A full analysis answers any section subset
+        data = analysis_cache.get(ip)
+        if data is not MISS:
+            data = data.select(sections)
+    return None if data is MISS else data
+
+def analyze_and_cache(ip, sections=ALL_SECTIONS):
+    """Run an analysis of the requested sections and cache it"""
+    return cache_analysis(ip, comprehensive_ip_analysis(ip, sections))
+
+def cache_analysis(ip, data):
+    """Store a finished analysis (partial results only briefly)"""
+    if data.partial:
+        ttl = app.config.get('ANALYSIS_PARTIAL_TTL', 30)
     else:
-        performance["estimated_speed"] = "Standard (1-50Mbps)"
-        performance["connection_type"] = "Broadband"
-        performance["quality_score"] = 60
-        performance["latency_estimate"] = "20-80ms"
+        ttl = app.config.get('ANALYSIS_CACHE_TTL', 300)
+    sections = ALL_SECTIONS if data.sections is None else frozenset(data.sections)
+    analysis_cache.set(analysis_key(ip, sections), data, ttl)
+    return data
+
+def schedule_analysis(ip):
+    """Start a background analysis for ip unless one is already running"""
+    return analysis_flight.submit(
+        analysis_key(ip), page_executor, analyze_and_cache, ip, check=lambda: get_cached_analysis(ip)
+    )
+
+def get_analysis(ip, sections=ALL_SECTIONS):
+    """Cached analysis, joining any running analysis of the same IP before computing a new one"""
+    data = get_cached_analysis(ip, sections)
+    if data is not None:
+        return data
     
-    return performance
+    return analysis_flight.do(
+        analysis_key(ip, sections), analyze_and_cache, ip, sections, check=lambda: get_cached_analysis(ip, sections)
+    )
 
 # Bulk analysis function
+BULK_ACCEPTED_KINDS = (IPV4, IPV6, HOSTNAME)  # CIDR ranges are not expanded into analyses
+
+def _analyze_bulk_item(ip, sections=ALL_SECTIONS, prefetched=None):
+    try:
+        if prefetched is not None:
+            # The chunk's batch geolocation usually lands first; never wait past the deadline for it
+            wait([prefetched], timeout=app.config.get('ANALYSIS_DEADLINE', 8))
+        return comprehensive_ip_analysis(validate_ip_input(ip), sections)
+    except Exception as e:
+        return {"ip": ip, "error": str(e)}
+
+def _prefetch_bulk_chunk(ips, stages):
+    if "reverse_dns" in stages:
+        dns_resolver.prefetch(ips)
+    if "geolocation" in stages:
+        prefetch_ip_api_batch(ips)
+
+def _with_bulk_prefetch(items, stages):
+    """Pass (index, ip) items through as (index, ip, prefetched), one ip-api batch at a time
+
+    Each chunk's PTR and batch geolocation prefetch runs in the background,
+    started one chunk ahead of the analyses, so it never holds back the
+    results already streaming.
+    """
+    def start(chunk):
+        return chunk, geo_request_executor.submit(_prefetch_bulk_chunk, [ip for _, ip in chunk], stages)
+
+    chunks = iter(lambda: list(islice(items, IP_API_BATCH_SIZE)), [])
+    upcoming = next(chunks, None)
+    upcoming = start(upcoming) if upcoming else None
+    while upcoming is not None:
+        chunk, prefetched = upcoming
+        following = next(chunks, None)
+        upcoming = start(following) if following else None
+        for index, ip in chunk:
+            yield index, ip, prefetched
+
+def iter_bulk_analysis(ip_list, sections=ALL_SECTIONS):
+    """Analyze IPs with bounded concurrency, yielding (index, result) as each completes"""
+    stages = analysis_stages(sections)
+    items = ((index, ip.strip()) for index, ip in enumerate(ip_list) if ip.strip())
+    if stages & {"reverse_dns", "geolocation"}:
+        pending = _with_bulk_prefetch(items, stages)
+    else:
+        pending = ((index, ip, None) for index, ip in items)
+    in_flight = {}
+    
+    def submit_next():
+        for index, ip, prefetched in pending:
+            in_flight[bulk_executor.submit(_analyze_bulk_item, ip, sections, prefetched)] = index
+            return True
+        return False
+    
+    # Keep at most two items queued per worker so huge lists are never fully materialized
+    for _ in range(app.config.get('BULK_CONCURRENCY', 16) * 2):
+        if not submit_next():
+            break
+    
+    try:
+        while in_flight:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                yield index, future.result()
+                submit_next()
+    finally:
+        # Client went away: drop work that has not started yet
+        for future in in_flight:
+            future.cancel()
+
 def analyze_multiple_ips(ip_list):
-    results = []
-    for ip in ip_list:
+    results = sorted(iter_bulk_analysis(ip_list), key=lambda item: item[0])
+    return [result for _, result in results]
+
+def _collect_stages(futures, deadline):
+    """Gather finished stage results, reporting the stages that missed the deadline"""
+    done, _ = wait(list(futures.values()), timeout=max(0, deadline - time.time()))
+    
+    results = {}
+    pending = []
+    for name, future in futures.items():
+        if future not in done:
+            future.cancel()
+            pending.append(name)
+            continue
         try:
-            analysis = comprehensive_ip_analysis(ip.strip())
-            results.append(analysis)
+            results[name] = future.result()
         except Exception as e:
-            results.append({"ip": ip, "error": str(e)})
-    return results
+            print(f"Stage {name} failed: {e}")
+    
+    return results, pending
+
+def lookup_local_geo(ip):
+    """Offline geolocation record for ip, or None when no database is configured"""
+    if geo_database is None:
+        return None
+    try:
+        return geo_database.lookup(ip)
+    except Exception as e:
+        print(f"Local geo database error: {e}")
+        return None
+
+def _geo_coordinates(geo_sources):
+    """First coordinates in merge priority order from normalized sources"""
+    for _, geo_data in geo_sources:
+        if geo_data.get("latitude") and geo_data.get("longitude"):
+            return geo_data["latitude"], geo_data["longitude"]
+    return None, None
+
+def _new_analysis(ip):
+    """Empty analysis structure, also used as the page skeleton while an analysis runs"""
+    return AnalysisResult(ip=ip, analysis_timestamp=dt.utcnow().isoformat() + "Z")
 
 # Main enhanced IP analysis function
 @monitor_performance
-def comprehensive_ip_analysis(ip):
+def comprehensive_ip_analysis(ip, sections=ALL_SECTIONS):
     print(f"\n🚀 COMPREHENSIVE ANALYSIS STARTING FOR: {ip}")
     start_time = time.time()
+    deadline = start_time + app.config.get('ANALYSIS_DEADLINE', 8)
+    stages = analysis_stages(sections)
+    
+    # Independent enrichment stages run concurrently within the deadline budget
+    print("⚡ Dispatching enrichment stages...")
+    futures = {}
+    if "reverse_dns" in stages:
+        futures["reverse_dns"] = analysis_executor.submit(reverse_dns, ip)
+    if "whois" in stages:
+        futures["whois"] = analysis_executor.submit(get_enhanced_whois_data, ip)
+    
+    # Offline database first (no network I/O); online providers only fill what it lacks
+    local_geo = lookup_local_geo(ip) if "geolocation" in stages else None
+    local_covered = covered_geo_fields(local_geo) if local_geo else set()
+    if "geolocation" in stages and len(local_covered) < len(GEO_REQUIRED_FIELDS):
+        futures["geolocation"] = analysis_executor.submit(
+            get_geo_by_coverage, ip, [name for name, _, _, _ in GEO_PROVIDERS], deadline, local_covered
+        )
+    
+    # Weather needs coordinates, so it starts as soon as the geolocation stage settles
+    lat, lon = _geo_coordinates([("local-db", local_geo)] if local_geo else [])
+    if "weather" in stages and not (lat and lon) and "geolocation" in futures:
+        geo_future = futures["geolocation"]
+        wait([geo_future], timeout=max(0, deadline - time.time()))
+        if geo_future.done() and not geo_future.exception():
+            lat, lon = _geo_coordinates([
+                (name, normalize_geo_source(name, data)) for name, data in geo_future.result()
+            ])
+    if "weather" in stages and lat and lon:
+        print("🌤️ Getting weather data...")
+        futures["weather"] = analysis_executor.submit(get_real_weather_data, lat, lon)
+    
+    stage_results, pending_stages = _collect_stages(futures, deadline)
+    return assemble_analysis(ip, stage_results, pending_stages, local_geo, start_time, sections)
+
+def assemble_analysis(ip, stage_results, pending_stages, local_geo, start_time, sections=ALL_SECTIONS):
+    """Build the analysis from the collected stage results (shared by the WSGI and ASGI pipelines)
+
+    Only the requested sections are computed; the stages they did not need
+    were never run, so their inputs are simply absent from stage_results.
+    """
+    if pending_stages:
+        print(f"⏱️ Stages still pending at deadline: {', '.join(pending_stages)}")
     
     # Initialize comprehensive data structure
-    analysis = {
-        "ip": ip,
-        "analysis_timestamp": dt.utcnow().isoformat() + "Z",
-        "analysis_duration": 0,
-        
-        # Basic info
-        "basic": {
-            "ip_type": None,
-            "reverse_dns": None,
-            "domain": None,
-            "ptr_record": None
-        },
-        
-        # Geographic intelligence
-        "geographic": {
-            "country_code": None,
-            "country_name": None,
-            "continent": None,
-            "continent_code": None,
-            "region": None,
-            "city": None,
-            "district": None,
-            "postal_code": None,
-            "coordinates": {"lat": None, "lon": None},
-            "accuracy_radius": None
-        },
-        
-        # Time intelligence
-        "time": {
-            "timezone": None,
-            "utc_offset": None,
-            "utc_offset_formatted": None,
-            "local_time": None,
-            "utc_time": None,
-            "is_dst": None,
-            "dst_offset": None
-        },
-        
-        # Currency info
-        "currency": {
-            "code": None,
-            "name": None,
-            "symbol": None
-        },
-        
-        # Weather info
-        "weather": {"available": False},
-        
-        # Network intelligence
-        "network": {
-            "asn": None,
-            "asn_description": None,
-            "asn_country": None,
-            "asn_registry": None,
-            "organization": None,
-            "isp": None,
-            "network_name": None,
-            "cidr": None,
-            "network_type": None,
-            "usage_type": None,
-            "is_mobile": False,
-            "is_proxy": False,
-            "is_hosting": False,
-            "is_datacenter": False
-        },
-        
-        # Security analysis
-        "security": {
-            "threat_analysis": {},
-            "is_tor": False,
-            "is_vpn": False,
-            "is_malicious": False,
-            "reputation_score": 0,
-            "threat_types": [],
-            "blacklist_status": []
-        },
-        
-        # Performance analysis
-        "performance": {},
-        
-        # Raw data sources
-        "sources": {
-            "whois": {},
-            "geolocation": []
-        }
-    }
+    analysis = _new_analysis(ip)
+    if sections != ALL_SECTIONS:
+        analysis.sections = sorted(sections)
+    basic, geographic, time_info = analysis.basic, analysis.geographic, analysis.time
+    network, security = analysis.network, analysis.security
     
     # Basic analysis
     print("📍 Basic analysis...")
     try:
         ip_obj = ipaddress.ip_address(ip)
         if ip_obj.is_private:
-            analysis["basic"]["ip_type"] = "Private"
+            basic.ip_type = "Private"
         elif ip_obj.is_loopback:
-            analysis["basic"]["ip_type"] = "Loopback"
+            basic.ip_type = "Loopback"
         elif ip_obj.is_multicast:
-            analysis["basic"]["ip_type"] = "Multicast"
+            basic.ip_type = "Multicast"
         elif ip_obj.is_reserved:
-            analysis["basic"]["ip_type"] = "Reserved"
+            basic.ip_type = "Reserved"
         else:
-            analysis["basic"]["ip_type"] = "Public"
+            basic.ip_type = "Public"
     except:
-        analysis["basic"]["ip_type"] = "Invalid"
+        basic.ip_type = "Invalid"
     
     # Reverse DNS
-    analysis["basic"]["reverse_dns"] = reverse_dns(ip)
-    if analysis["basic"]["reverse_dns"]:
-        parts = analysis["basic"]["reverse_dns"].split('.')
+    basic.reverse_dns = stage_results.get("reverse_dns")
+    if basic.reverse_dns:
+        parts = basic.reverse_dns.split('.')
         if len(parts) >= 2:
-            analysis["basic"]["domain"] = '.'.join(parts[-2:])
+            basic.domain = '.'.join(parts[-2:])
     
     # Enhanced WHOIS
     print("🔍 Enhanced WHOIS analysis...")
-    whois_data = get_enhanced_whois_data(ip)
-    analysis["sources"]["whois"] = whois_data
+    whois_data = stage_results.get("whois") or {}
     
     if whois_data:
-        analysis["network"].update({
-            "asn": whois_data.get("asn"),
-            "asn_description": whois_data.get("asn_description"),
-            "asn_country": whois_data.get("asn_country_code"),
-            "asn_registry": whois_data.get("asn_registry"),
-            "organization": whois_data.get("network_name"),
-            "network_name": whois_data.get("network_name"),
-            "cidr": whois_data.get("network_cidr"),
-            "network_type": whois_data.get("network_type")
-        })
+        network.asn = whois_data.get("asn")
+        network.asn_description = whois_data.get("asn_description")
+        network.asn_country = whois_data.get("asn_country_code")
+        network.asn_registry = whois_data.get("asn_registry")
+        network.organization = whois_data.get("network_name")
+        network.network_name = whois_data.get("network_name")
+        network.cidr = whois_data.get("network_cidr")
+        network.network_type = whois_data.get("network_type")
     
     # Comprehensive geolocation
     print("🌍 Comprehensive geolocation...")
-    geo_sources = get_comprehensive_geo_data(ip)
-    analysis["sources"]["geolocation"] = geo_sources
+    geo_sources = [("local-db", local_geo)] if local_geo else []
+    geo_sources += stage_results.get("geolocation") or []
+    
+    # Raw provider payloads are kept by reference, or dropped entirely to keep cached results small
+    if app.config.get('ANALYSIS_RAW_SOURCES', True):
+        analysis.sources = {"whois": whois_data, "geolocation": geo_sources}
+    else:
+        analysis.sources = None
     
-    # Process geolocation data with priority
+    # Process geolocation data with priority: earlier sources win, later ones fill gaps
+    provider_network = {}
     for source_name, geo_data in geo_sources:
         print(f"📊 Processing {source_name} data...")
+        geo = geo_data if source_name == "local-db" else normalize_geo_source(source_name, geo_data)
         
-        if source_name == "ip-api.com":
-            analysis["geographic"].update({
-                "country_code": geo_data.get("countryCode") or analysis["geographic"]["country_code"],
-                "country_name": geo_data.get("country") or analysis["geographic"]["country_name"],
-                "continent": geo_data.get("continent") or analysis["geographic"]["continent"],
-                "continent_code": geo_data.get("continentCode") or analysis["geographic"]["continent_code"],
-                "region": geo_data.get("regionName") or analysis["geographic"]["region"],
-                "city": geo_data.get("city") or analysis["geographic"]["city"],
-                "district": geo_data.get("district") or analysis["geographic"]["district"],
-                "postal_code": geo_data.get("zip") or analysis["geographic"]["postal_code"],
-                "coordinates": {
-                    "lat": geo_data.get("lat") or analysis["geographic"]["coordinates"]["lat"],
-                    "lon": geo_data.get("lon") or analysis["geographic"]["coordinates"]["lon"]
-                }
-            })
-            
-            analysis["time"].update({
-                "timezone": geo_data.get("timezone") or analysis["time"]["timezone"],
-                "utc_offset": geo_data.get("offset") or analysis["time"]["utc_offset"]
-            })
-            
-            analysis["network"].update({
-                "isp": geo_data.get("isp") or analysis["network"]["isp"],
-                "organization": geo_data.get("org") or analysis["network"]["organization"],
-                "asn": geo_data.get("as", "").split()[0].replace("AS", "") if geo_data.get("as") else analysis["network"]["asn"],
-                "is_mobile": geo_data.get("mobile", False),
-                "is_proxy": geo_data.get("proxy", False),
-                "is_hosting": geo_data.get("hosting", False)
-            })
+        for field in ("country_code", "country_name", "continent", "continent_code",
+                      "region", "city", "district", "postal_code"):
+            geographic[field] = geographic[field] or geo.get(field)
+        geographic.coordinates = Coordinates(
+            lat=geographic.coordinates.lat or geo.get("latitude"),
+            lon=geographic.coordinates.lon or geo.get("longitude")
+        )
         
-        elif source_name == "ipapi.co":
-            analysis["geographic"].update({
-                "country_code": analysis["geographic"]["country_code"] or geo_data.get("country_code"),
-                "country_name": analysis["geographic"]["country_name"] or geo_data.get("country_name"),
-                "region": analysis["geographic"]["region"] or geo_data.get("region"),
-                "city": analysis["geographic"]["city"] or geo_data.get("city"),
-                "postal_code": analysis["geographic"]["postal_code"] or geo_data.get("postal"),
-                "coordinates": {
-                    "lat": analysis["geographic"]["coordinates"]["lat"] or geo_data.get("latitude"),
-                    "lon": analysis["geographic"]["coordinates"]["lon"] or geo_data.get("longitude")
-                }
-            })
-            
-            analysis["time"]["timezone"] = analysis["time"]["timezone"] or geo_data.get("timezone")
-            analysis["network"]["organization"] = analysis["network"]["organization"] or geo_data.get("org")
+        time_info.timezone = time_info.timezone or geo.get("timezone")
+        time_info.utc_offset = time_info.utc_offset or geo.get("utc_offset")
+        
+        if source_name == "local-db":
+            network.asn = network.asn or geo.get("asn")
+            network.organization = network.organization or geo.get("organization")
+        else:
+            # Online providers describe the ISP better than WHOIS network names
+            for field in ("isp", "organization", "asn"):
+                provider_network[field] = provider_network.get(field) or geo.get(field)
+            for flag in ("is_mobile", "is_proxy", "is_hosting"):
+                network[flag] = network[flag] or bool(geo.get(flag))
+    
+    for field, value in provider_network.items():
+        network[field] = value or network[field]
     
     # Fallback data enrichment
     print("🔧 Data enrichment and fallbacks...")
+    country_code = geographic.country_code
     
     # Country name fallback
-    if analysis["geographic"]["country_code"] and not analysis["geographic"]["country_name"]:
-        analysis["geographic"]["country_name"] = country_names.get(
-            analysis["geographic"]["country_code"], 
-            f"Country {analysis['geographic']['country_code']}"
-        )
+    if country_code and not geographic.country_name:
+        geographic.country_name = country_names.get(country_code, f"Country {country_code}")
     
     # Continent fallback
-    if analysis["geographic"]["country_code"] and not analysis["geographic"]["continent"]:
-        analysis["geographic"]["continent"] = continent_map.get(analysis["geographic"]["country_code"])
+    if country_code and not geographic.continent:
+        geographic.continent = continent_map.get(country_code)
     
     # Timezone fallback
-    if analysis["geographic"]["country_code"] and not analysis["time"]["timezone"]:
-        analysis["time"]["timezone"] = country_timezones_map.get(analysis["geographic"]["country_code"])
+    if country_code and not time_info.timezone:
+        time_info.timezone = country_timezones_map.get(country_code)
     
     # Currency information
-    if analysis["geographic"]["country_code"]:
-        currency_info = country_currencies.get(analysis["geographic"]["country_code"])
+    if country_code:
+        currency_info = country_currencies.get(country_code)
         if currency_info:
-            analysis["currency"] = currency_info
+            analysis.currency = Currency.from_dict(currency_info)
     
     # Time processing
-    if analysis["time"]["timezone"]:
+    if "time" in sections and time_info.timezone:
         try:
-            tz = timezone(analysis["time"]["timezone"])
+            tz = timezone(time_info.timezone)
             local_time = dt.now(tz)
             utc_time = dt.utcnow()
             
-            analysis["time"].update({
-                "local_time": local_time.strftime("%Y-%m-%d %H:%M:%S %Z"),
-                "utc_time": utc_time.strftime("%Y-%m-%d %H:%M:%S UTC"),
-                "is_dst": bool(local_time.dst()),
-                "utc_offset": int(local_time.utcoffset().total_seconds()) if local_time.utcoffset() else 0
-            })
+            time_info.local_time = local_time.strftime("%Y-%m-%d %H:%M:%S %Z")
+            time_info.utc_time = utc_time.strftime("%Y-%m-%d %H:%M:%S UTC")
+            time_info.is_dst = bool(local_time.dst())
+            time_info.utc_offset = int(local_time.utcoffset().total_seconds()) if local_time.utcoffset() else 0
             
             # Format UTC offset nicely
-            offset_hours = analysis["time"]["utc_offset"] // 3600
-            analysis["time"]["utc_offset_formatted"] = f"UTC{offset_hours:+d}" if offset_hours != 0 else "UTC"
+            offset_hours = time_info.utc_offset // 3600
+            time_info.utc_offset_formatted = f"UTC{offset_hours:+d}" if offset_hours != 0 else "UTC"
             
         except Exception as e:
             print(f"Time processing error: {e}")
     
-    # Weather information (if coordinates available)
-    if analysis["geographic"]["coordinates"]["lat"] and analysis["geographic"]["coordinates"]["lon"]:
-        print("🌤️ Getting weather data...")
-        analysis["weather"] = get_real_weather_data(
-            analysis["geographic"]["coordinates"]["lat"],
-            analysis["geographic"]["coordinates"]["lon"]
-        )
-    
-    # Network analysis
-    analysis["network"]["usage_type"] = detect_usage_type(
-        analysis["network"]["asn_description"],
-        analysis["network"]["organization"],
-        analysis["network"]["isp"]
-    )
+    # Weather information (if coordinates were available in time)
+    if stage_results.get("weather"):
+        analysis.weather = stage_results["weather"]
     
-    # Datacenter detection
-    text = f"{analysis['basic']['domain'] or ''} {analysis['network']['organization'] or ''} {analysis['network']['asn_description'] or ''}".lower()
-    analysis["network"]["is_datacenter"] = any(keyword in text for keyword in [
-        'amazon', 'aws', 'google', 'microsoft', 'azure', 'digitalocean',
-        'linode', 'vultr', 'ovh', 'hetzner', 'cloudflare', 'fastly',
-        'hosting', 'datacenter', 'data center', 'cloud', 'server'
-    ])
-    
-    # Security analysis
-    print("🔒 Security analysis...")
-    analysis["security"]["threat_analysis"] = analyze_security_threats(
-        ip, 
-        analysis["basic"]["domain"],
-        analysis["network"]["organization"],
-        analysis["network"]["asn_description"]
-    )
+    if "network" in sections:
+        # Network analysis
+        network.usage_type = detect_usage_type(network.asn_description, network.organization, network.isp)
+        
+        # Datacenter detection
+        network.is_datacenter = is_datacenter(basic.domain, network.organization, network.asn_description)
     
-    # Tor check
-    try:
-        response = requests.get("https://check.torproject.org/exit-addresses", timeout=5)
-        if response.status_code == 200:
-            analysis["security"]["is_tor"] = ip in response.text
-    except:
-        pass
+    if "security" in sections:
+        # Security analysis
+        print("🔒 Security analysis...")
+        security.threat_analysis = analyze_security_threats(
+            ip, 
+            basic.domain,
+            network.organization,
+            network.asn_description
+        )
+        
+        # Tor check (in-memory exit node index)
+        security.is_tor = tor_exit_index.is_exit(ip)
     
-    # Performance analysis
-    print("⚡ Performance analysis...")
-    analysis["performance"] = analyze_network_performance(
-        ip,
-        analysis["geographic"]["country_code"],
-        analysis["network"]["organization"]
-    )
+    if "performance" in sections:
+        # Performance analysis
+        print("⚡ Performance analysis...")
+        analysis.performance = analyze_network_performance(ip, country_code, network.organization)
     
     # Final statistics
-    analysis["analysis_duration"] = round(time.time() - start_time, 2)
+    analysis.partial = bool(pending_stages)
+    analysis.pending_stages = pending_stages
+    analysis.analysis_duration = round(time.time() - start_time, 2)
     
-    print(f"✅ Analysis completed in {analysis['analysis_duration']} seconds")
+    print(f"✅ Analysis completed in {analysis.analysis_duration} seconds")
     
     return analysis
 
+def include_sources(value):
+    """Whether a response carries the raw provider payloads (?sources=false omits them)"""
+    return value is None or value.lower() not in ('0', 'false', 'no')
+
 # Flask routes
 @app.route("/")
 def index():
     lang = request.args.get('lang', 'en')
-    if lang not in TRANSLATIONS:
+    translations = get_translations(lang)
+    if translations is None:
         lang = 'en'
+        translations = get_translations(lang)
     
     # Track user visit for analytics (with improved error handling)
     session_id = None
@@ -911,12 +1047,46 @@ def index():
     ip = request.headers.get('X-Forwarded-For', request.remote_addr)
     if ip and ',' in ip:
         ip = ip.split(',')[0].strip()
+    # The header is client-controlled: only a valid address gets analyzed
+    try:
+        ip = str(ipaddress.ip_address(validate_ip_input(ip))) if ip else None
+    except ValueError:
+        ip = None
     
     if not ip or ip.startswith("::") or ip == "127.0.0.1" or ip.startswith("192.168") or ip.startswith("10."):
         ip = "8.8.8.8"  # Test IP
     
-    data = comprehensive_ip_analysis(ip)
-    return render_template("index.html", data=data, lang=lang, translations=TRANSLATIONS[lang])
+    # Render immediately; a cold visitor IP gets a skeleton and is analyzed in the background
+    data = get_cached_analysis(ip)
+    analysis_pending = False
+    if data is None:
+        schedule_analysis(ip)
+        data = _new_analysis(ip)
+        analysis_pending = True
+    
+    return render_template("index.html", data=data, analysis_pending=analysis_pending,
+                           lang=lang, translations=translations)
+
+@app.route("/analysis/<ip>/results")
+def analysis_results(ip):
+    """Rendered results section the page swaps in once its background analysis is done
+
+    Only serves an analysis index() already scheduled (cached, or still running
+    in any worker) and never starts one, so it records no scan event: the page
+    view was already tracked.
+    """
+    translations = get_translations(request.args.get('lang', 'en')) or get_translations('en')
+    try:
+        ip = validate_ip_input(ip)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid input: {str(e)}"}), 400
+    data = get_cached_analysis(ip)
+    if data is None:
+        data = analysis_flight.join(analysis_key(ip), check=lambda: get_cached_analysis(ip))
+    if data is None:
+        return jsonify({"error": "No analysis scheduled for this address"}), 404
+    return render_template("analysis_results.html", data=data, analysis_pending=False,
+                           translations=translations)
 
 @app.route("/api/<ip>")
 def api_endpoint(ip):
@@ -924,6 +1094,7 @@ def api_endpoint(ip):
     try:
         # Validate IP input
         ip = validate_ip_input(ip)
+        sections = parse_sections(request.args.get('fields'), request.args.get('exclude'))
         
         # Track scanning event with improved error handling
         try:
@@ -934,17 +1105,56 @@ def api_endpoint(ip):
         except Exception as e:
             print(f"⚠️  Error tracking scan event: {e}")
         
-        data = comprehensive_ip_analysis(ip)
+        data = get_analysis(ip, sections)
         
-        # Sanitize output for security
-        sanitized_data = sanitize_output(data)
+        # Sanitize output for security (escaped while encoding)
+        body = sanitized_dumps(plain(data, include_sources(request.args.get('sources'))))
         
-        return jsonify(sanitized_data)
+        return Response(body, mimetype='application/json')
     except ValueError as e:
         return jsonify({"error": f"Invalid input: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/bulk", methods=["POST"])
+def api_bulk():
+    """Bulk analysis streamed as NDJSON, one line per IP as soon as it completes"""
+    payload = request.get_json(silent=True)
+    if payload is None:
+        ip_list = request.get_data(as_text=True).splitlines()
+    elif isinstance(payload, dict):
+        ip_list = payload.get('ips')
+    else:
+        ip_list = payload
+    
+    if not isinstance(ip_list, list) or not all(isinstance(ip, str) for ip in ip_list):
+        return jsonify({"error": "Expected a list of IP addresses"}), 400
+    
+    max_lines = app.config.get('BULK_MAX_LINES', 100000)
+    if len(ip_list) > max_lines:
+        return jsonify({"error": f"Too many lines (max {max_lines})"}), 413
+    
+    try:
+        sections = parse_sections(request.args.get('fields'), request.args.get('exclude'))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid input: {str(e)}"}), 400
+    
+    # Normalized and deduplicated up front; rejected lines are reported first
+    accepted, rejected, _ = validate_ip_list(ip_list, BULK_ACCEPTED_KINDS)
+    max_ips = app.config.get('BULK_MAX_IPS', 10000)
+    if len(accepted) > max_ips:
+        return jsonify({"error": f"Too many IPs (max {max_ips} after removing duplicates)"}), 413
+    log_user_activity(request, 'bulk_analysis', {'count': len(ip_list), 'accepted': len(accepted)})
+    with_sources = include_sources(request.args.get('sources'))
+    
+    def generate():
+        for line, text, reason in rejected:
+            yield sanitized_dumps({"ip": text, "line": line, "error": reason}) + b"\n"
+        for _, result in iter_bulk_analysis([value for _, _, value in accepted], sections):
+            yield sanitized_dumps(plain(result, with_sources)) + b"\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 # Admin route for user analytics (private)
 @app.route("/admin/analytics")
 def admin_analytics():
@@ -1030,6 +1240,45 @@ def firebase_health():
             'error': str(e)
         }), 500
 
+# Operational metrics for monitoring
+@app.route("/admin/metrics")
+@security.require_admin_key
+def admin_metrics():
+    """Cache and pipeline metrics"""
+    return jsonify({
+        'cache': response_cache.stats(),
+        'tor_exit_list': tor_exit_index.stats(),
+        'analysis_cache': analysis_cache.stats(),
+        'whois_cache': whois_cache.stats(),
+        'geo_database': geo_database.stats() if geo_database else None,
+        'reverse_dns': dns_resolver.stats(),
+        'single_flight': analysis_flight.stats(),
+        'http_client': http_client.stats(),
+        'async_http_client': get_async_http_client().stats() if get_async_http_client() else None,
+        'providers': provider_scheduler.stats(),
+        'rate_limiter': security.state.stats(),
+        'blocklist': security.blocklist.stats()
+    })
+
+@app.route("/admin/blocklist", methods=["POST", "DELETE"])
+@security.require_admin_key
+def admin_blocklist():
+    """Block (POST) or unblock (DELETE) an address or CIDR: {"network": ..., "ttl": seconds, "reason": ...}"""
+    payload = request.get_json(silent=True) or {}
+    network, ttl = payload.get('network'), payload.get('ttl')
+    if not isinstance(network, str) or not (ttl is None or (type(ttl) is int and ttl > 0)):
+        return jsonify({'error': 'Expected {"network": "<address or CIDR>", "ttl": <seconds, optional>}'}), 400
+    try:
+        if request.method == 'DELETE':
+            removed = security.unblock_network(network)
+            log_security_event(request, 'network_unblocked', network, severity='INFO')
+            return jsonify({'network': network, 'removed': removed})
+        security.block_network(network, ttl, str(payload.get('reason') or 'manual'))
+    except ValueError as e:
+        return jsonify({'error': f"Invalid input: {str(e)}"}), 400
+    log_security_event(request, 'network_blocked', f"{network} (ttl: {ttl})", severity='INFO')
+    return jsonify({'network': network, 'ttl': ttl, 'blocked': True})
+
 # ...existing routes...
 
 if __name__ == '__main__':
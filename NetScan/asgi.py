@@ -0,0 +1,406 @@
+"""ASGI serving mode: natively async /api/<ip> and /api/bulk, every other route through Flask.
+
+Usage:
+    uvicorn asgi:application --host 0.0.0.0 --port 8080
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:application
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import Headers
+
+import app as netscan
+from http_client import init_async_http_client
+from security import validate_ip_input, validate_ip_list, sanitized_dumps
+from analysis_model import ALL_SECTIONS, parse_sections, plain, dumps
+from logging_config import log_user_activity
+from rate_limiter import ALLOWED, BLOCKED
+
+config = netscan.app.config
+async_http_client = init_async_http_client(config, fallback=netscan.http_client)
+flask_application = WsgiToAsgi(netscan.app)
+
+# redis-py is synchronous: cache, rate-limit and lock calls that may reach the
+# shared tier run on these threads so a slow Redis never stalls the loop
+shared_io_executor = ThreadPoolExecutor(
+    max_workers=config.get('ASYNC_SHARED_IO_WORKERS', 16),
+    thread_name_prefix='netscan-shared-io'
+)
+netscan.analysis_flight.io_executor = shared_io_executor
+
+async def off_loop(func, *args):
+    """func(*args), on a shared-I/O thread when a shared tier is configured"""
+    if netscan.response_cache.shared is None:
+        return func(*args)  # memory only, never blocks
+    return await asyncio.get_running_loop().run_in_executor(shared_io_executor, func, *args)
+
+# Upstream requests -----------------------------------------------------------
+
+async def cached_request_async(url, timeout=10, source='default', provider=None):
+    """Event-loop counterpart of app.cached_request, sharing its caches and provider gates"""
+    data = await off_loop(netscan.response_cache.get, url)
+    if data is not netscan.MISS:
+        return data
+
+    if provider and not await off_loop(netscan.provider_scheduler.acquire, provider):
+        return None
+
+    status, headers = None, None
+    started = time.perf_counter()
+    try:
+        response = await async_http_client.get(url, timeout=timeout)
+        status, headers = response.status_code, response.headers
+        data = response.json() if status == 200 else None
+    except asyncio.CancelledError:
+        # A losing hedge: no outcome to report, but a half-open probe must be freed
+        if provider:
+            netscan.provider_scheduler.release(provider)
+        raise
+    except Exception:
+        data = None
+
+    return await off_loop(
+        netscan.store_response, url, data, source, provider, status, headers, time.perf_counter() - started
+    )
+
+async def fetch_geo_source_async(provider, ip):
+    for name, url_template, is_valid, _ in netscan.GEO_PROVIDERS:
+        if name != provider:
+            continue
+        try:
+            data = await cached_request_async(url_template.format(ip=ip), source='geolocation', provider=name)
+            if data and is_valid(data):
+                return data
+        except Exception as e:
+            print(f"Error with {name}: {e}")
+        return None
+    return None
+
+async def get_hedged_geo_data_async(ip, providers, deadline):
+    """app.get_hedged_geo_data on the event loop; losing requests are really cancelled"""
+    scheduler = netscan.provider_scheduler
+    ranked = scheduler.rank(providers)
+    for name in ranked:
+        data = await off_loop(netscan.peek_geo_source, name, ip)
+        if data:
+            return [(name, data)]
+
+    in_flight = {}
+    asked = 0
+    try:
+        while time.time() < deadline and (ranked or in_flight):
+            hedge_at = deadline
+            if ranked:
+                name = ranked.pop(0)
+                in_flight[asyncio.ensure_future(fetch_geo_source_async(name, ip))] = (name, asked)
+                asked += 1
+                hedge_at = min(deadline, time.time() + scheduler.hedge_delay(name))
+            done, _ = await asyncio.wait(
+                list(in_flight), timeout=max(0, hedge_at - time.time()), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                name, order = in_flight.pop(task)
+                data = task.result()
+                if data:
+                    scheduler.record_win(name, hedged=order > 0)
+                    return [(name, data)]
+        return []
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+async def get_geo_by_coverage_async(ip, providers, deadline, covered=()):
+    """app.get_geo_by_coverage on the event loop"""
+    missing = set(netscan.GEO_REQUIRED_FIELDS) - set(covered)
+    remaining = list(providers)
+    geo_sources = []
+    while missing and remaining and time.time() < deadline:
+        candidates = [name for name in remaining if netscan.GEO_PROVIDER_FIELDS.get(name, frozenset()) & missing]
+        if not candidates:
+            break
+        answer = await get_hedged_geo_data_async(ip, candidates, deadline)
+        if not answer:
+            break
+        name, data = answer[0]
+        geo_sources.append((name, data))
+        remaining.remove(name)
+        missing -= netscan.covered_geo_fields(netscan.normalize_geo_source(name, data))
+    return geo_sources
+
+async def get_real_weather_data_async(lat, lon):
+    try:
+        url = netscan.weather_url(lat, lon)
+        if url:
+            data = await cached_request_async(url, source='weather', provider='openweathermap')
+            if data:
+                return netscan.format_weather(data)
+    except Exception as e:
+        print(f"Weather API error: {e}")
+
+    return dict(netscan.WEATHER_UNAVAILABLE)
+
+# Analysis pipeline -------------------------------------------------------------
+
+async def comprehensive_ip_analysis_async(ip, sections=ALL_SECTIONS):
+    """app.comprehensive_ip_analysis with every stage as a task on the running loop"""
+    print(f"\n🚀 ASYNC ANALYSIS STARTING FOR: {ip}")
+    start_time = time.time()
+    deadline = start_time + config.get('ANALYSIS_DEADLINE', 8)
+    loop = asyncio.get_running_loop()
+    stages = netscan.analysis_stages(sections)
+
+    tasks = {}
+    if "reverse_dns" in stages:
+        tasks["reverse_dns"] = asyncio.ensure_future(netscan.dns_resolver.resolve(ip))
+    if "whois" in stages:
+        # ipwhois has no async API; it keeps to the shared stage pool
+        tasks["whois"] = loop.run_in_executor(netscan.analysis_executor, netscan.get_enhanced_whois_data, ip)
+
+    local_geo = netscan.lookup_local_geo(ip) if "geolocation" in stages else None
+    local_covered = netscan.covered_geo_fields(local_geo) if local_geo else set()
+    if "geolocation" in stages and len(local_covered) < len(netscan.GEO_REQUIRED_FIELDS):
+        tasks["geolocation"] = asyncio.ensure_future(get_geo_by_coverage_async(
+            ip, [name for name, _, _, _ in netscan.GEO_PROVIDERS], deadline, local_covered
+        ))
+
+    lat, lon = netscan._geo_coordinates([("local-db", local_geo)] if local_geo else [])
+    if "weather" in stages and not (lat and lon) and "geolocation" in tasks:
+        geo_task = tasks["geolocation"]
+        await asyncio.wait([geo_task], timeout=max(0, deadline - time.time()))
+        if geo_task.done() and not geo_task.cancelled() and not geo_task.exception():
+            lat, lon = netscan._geo_coordinates([
+                (name, netscan.normalize_geo_source(name, data)) for name, data in geo_task.result()
+            ])
+    if "weather" in stages and lat and lon:
+        tasks["weather"] = asyncio.ensure_future(get_real_weather_data_async(lat, lon))
+
+    done = set()
+    if tasks:
+        done, _ = await asyncio.wait(list(tasks.values()), timeout=max(0, deadline - time.time()))
+    stage_results = {}
+    pending_stages = []
+    for name, task in tasks.items():
+        if task not in done:
+            task.cancel()
+            pending_stages.append(name)
+            continue
+        try:
+            stage_results[name] = task.result()
+        except Exception as e:
+            print(f"Stage {name} failed: {e}")
+
+    return netscan.assemble_analysis(ip, stage_results, pending_stages, local_geo, start_time, sections)
+
+async def _analyze_and_cache_async(ip, sections=ALL_SECTIONS):
+    return await off_loop(netscan.cache_analysis, ip, await comprehensive_ip_analysis_async(ip, sections))
+
+async def get_analysis_async(ip, sections=ALL_SECTIONS):
+    """app.get_analysis for the event loop, coalesced with WSGI-side analyses of the same IP"""
+    data = await off_loop(netscan.get_cached_analysis, ip, sections)
+    if data is not None:
+        return data
+
+    return await netscan.analysis_flight.do_async(
+        netscan.analysis_key(ip, sections), _analyze_and_cache_async, ip, sections,
+        check=lambda: netscan.get_cached_analysis(ip, sections)
+    )
+
+async def _analyze_bulk_item_async(ip, sections=ALL_SECTIONS, prefetched=None):
+    try:
+        if prefetched is not None:
+            await asyncio.wait([prefetched], timeout=config.get('ANALYSIS_DEADLINE', 8))
+        return await comprehensive_ip_analysis_async(validate_ip_input(ip), sections)
+    except Exception as e:
+        return {"ip": ip, "error": str(e)}
+
+async def iter_bulk_analysis_async(ip_list, sections=ALL_SECTIONS):
+    """Async app.iter_bulk_analysis: up to ASYNC_BULK_CONCURRENCY analyses in flight on one loop"""
+    loop = asyncio.get_running_loop()
+    limit = config.get('ASYNC_BULK_CONCURRENCY', 200)
+    batch_geolocation = "geolocation" in netscan.analysis_stages(sections)
+    items = [(index, ip.strip()) for index, ip in enumerate(ip_list) if ip.strip()]
+    size = netscan.IP_API_BATCH_SIZE
+    chunks = [items[start:start + size] for start in range(0, len(items), size)]
+
+    def prefetch(position):
+        # Batch geolocation runs in the background, one chunk ahead of the analyses waiting on it
+        if not batch_geolocation or position >= len(chunks):
+            return None
+        return loop.run_in_executor(
+            netscan.geo_request_executor, netscan.prefetch_ip_api_batch, [ip for _, ip in chunks[position]]
+        )
+
+    in_flight = {}
+    try:
+        prefetched = prefetch(0)
+        for position, chunk in enumerate(chunks):
+            following = prefetch(position + 1)
+            for index, ip in chunk:
+                while len(in_flight) >= limit:
+                    done, _ = await asyncio.wait(list(in_flight), return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield in_flight.pop(task), task.result()
+                in_flight[asyncio.ensure_future(_analyze_bulk_item_async(ip, sections, prefetched))] = index
+            prefetched = following
+        while in_flight:
+            done, _ = await asyncio.wait(list(in_flight), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield in_flight.pop(task), task.result()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+# ASGI routes --------------------------------------------------------------------
+
+def response_headers(endpoint):
+    """What Flask's after_request adds to the same endpoint's responses, as ASGI header pairs"""
+    return [(name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in netscan.security.response_headers(endpoint)]
+
+class RequestInfo:
+    """The Flask request attributes the logging helpers read, built from an ASGI scope"""
+
+    def __init__(self, scope):
+        self.headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope.get('headers', [])])
+        self.remote_addr = (scope.get('client') or ('unknown', 0))[0]
+        self.method = scope['method']
+        query = scope.get('query_string', b'').decode('latin-1')
+        host = self.headers.get('Host', 'localhost')
+        self.url = f"{scope.get('scheme', 'http')}://{host}{scope['path']}" + (f"?{query}" if query else "")
+
+async def send_json(send, endpoint, status, payload, encode=dumps):
+    body = encode(payload)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+                   + response_headers(endpoint)
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+def query_param(scope, name):
+    values = parse_qs(scope.get('query_string', b'').decode('latin-1')).get(name)
+    return values[-1] if values else None
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+async def guard(request_info):
+    """SecurityMiddleware.before_request checks, sharing its state with the Flask routes"""
+    status = await off_loop(netscan.security.check_request, request_info.remote_addr)
+    if status == BLOCKED:
+        return 403, {'error': 'Access denied'}
+    if status != ALLOWED:
+        return 429, {'error': 'Rate limit exceeded'}
+    return None
+
+def track_scan(ip):
+    try:
+        firebase_svc = netscan.get_firebase_service()
+        if firebase_svc and firebase_svc.is_ready():
+            firebase_svc.track_scan_event(ip, 'api')
+    except Exception as e:
+        print(f"⚠️  Error tracking scan event: {e}")
+
+async def api_endpoint(scope, receive, send, ip):
+    try:
+        ip = validate_ip_input(ip)
+        sections = parse_sections(query_param(scope, 'fields'), query_param(scope, 'exclude'))
+        asyncio.get_running_loop().run_in_executor(None, track_scan, ip)
+        data = await get_analysis_async(ip, sections)
+        body = plain(data, netscan.include_sources(query_param(scope, 'sources')))
+        await send_json(send, 'api_endpoint', 200, body, sanitized_dumps)
+    except ValueError as e:
+        await send_json(send, 'api_endpoint', 400, {"error": f"Invalid input: {str(e)}"})
+    except Exception as e:
+        await send_json(send, 'api_endpoint', 500, {"error": str(e)})
+
+async def api_bulk(scope, receive, send, request_info):
+    body = await read_body(receive)
+    payload = None
+    if request_info.headers.get('Content-Type', '').startswith('application/json'):
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+    if payload is None:
+        ip_list = body.decode('utf-8', 'replace').splitlines()
+    elif isinstance(payload, dict):
+        ip_list = payload.get('ips')
+    else:
+        ip_list = payload
+
+    if not isinstance(ip_list, list) or not all(isinstance(ip, str) for ip in ip_list):
+        return await send_json(send, 'api_bulk', 400, {"error": "Expected a list of IP addresses"})
+
+    max_lines = config.get('BULK_MAX_LINES', 100000)
+    if len(ip_list) > max_lines:
+        return await send_json(send, 'api_bulk', 413, {"error": f"Too many lines (max {max_lines})"})
+
+    try:
+        sections = parse_sections(query_param(scope, 'fields'), query_param(scope, 'exclude'))
+    except ValueError as e:
+        return await send_json(send, 'api_bulk', 400, {"error": f"Invalid input: {str(e)}"})
+
+    accepted, rejected, _ = validate_ip_list(ip_list, netscan.BULK_ACCEPTED_KINDS)
+    max_ips = config.get('BULK_MAX_IPS', 10000)
+    if len(accepted) > max_ips:
+        return await send_json(send, 'api_bulk', 413, {"error": f"Too many IPs (max {max_ips} after removing duplicates)"})
+    log_user_activity(request_info, 'bulk_analysis', {'count': len(ip_list), 'accepted': len(accepted)})
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'application/x-ndjson')] + response_headers('api_bulk')
+    })
+    with_sources = netscan.include_sources(query_param(scope, 'sources'))
+    for line, text, reason in rejected:
+        error = sanitized_dumps({"ip": text, "line": line, "error": reason}) + b"\n"
+        await send({'type': 'http.response.body', 'body': error, 'more_body': True})
+    results = iter_bulk_analysis_async([value for _, _, value in accepted], sections)
+    try:
+        async for _, result in results:
+            line = sanitized_dumps(plain(result, with_sources)) + b"\n"
+            await send({'type': 'http.response.body', 'body': line, 'more_body': True})
+    finally:
+        await results.aclose()
+    await send({'type': 'http.response.body', 'body': b''})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_http_client.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    path, method = scope.get('path', ''), scope.get('method')
+    if scope['type'] == 'http' and path.startswith('/api/') and path.count('/') == 2:
+        native = (method == 'POST' and path == '/api/bulk') or method == 'GET'
+        if native:
+            request_info = RequestInfo(scope)
+            endpoint = 'api_bulk' if method == 'POST' else 'api_endpoint'
+            blocked = await guard(request_info)
+            if blocked:
+                return await send_json(send, endpoint, *blocked)
+            if method == 'POST':
+                return await api_bulk(scope, receive, send, request_info)
+            return await api_endpoint(scope, receive, send, path[len('/api/'):])
+
+    return await flask_application(scope, receive, send)
@@ -0,0 +1,347 @@
+"""Micro-benchmarks for NetScan hot paths.
+
+Usage:
+    python benchmark.py              # run every benchmark
+    python benchmark.py classifier   # run selected benchmarks
+"""
+import random
+import sys
+import time
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def _report(name, seconds, operations):
+    print(f"  {name:<28} {seconds * 1000:9.1f} ms  {operations / seconds:12,.0f} ops/s")
+
+# Keyword classification -----------------------------------------------------
+
+_ORG_WORDS = [
+    'Google LLC', 'Amazon.com', 'Claro S.A.', 'Vivo', 'Telefonica', 'Comcast Cable', 'Hetzner Online',
+    'OVH SAS', 'State University', 'Ministry of Defense', 'Fiber Broadband Ltda', 'Mobile Telecom',
+    'Cloud Hosting Inc', 'Tor Exit Relay', 'Enterprise Networks', 'Deutsche Telekom', 'Verizon Business',
+    'Residential ISP', 'DigitalOcean', 'Fastly', 'Vodafone GmbH', 'Spam Filter Co', 'Regional Cooperative'
+]
+
+def _legacy_classify(domain, org, asn_desc, isp):
+    """Pre-compilation implementation: one any() scan per rule over a rebuilt text blob"""
+    text = f"{asn_desc or ''} {org or ''} {isp or ''}".lower()
+    if any(k in text for k in ['google', 'amazon', 'microsoft', 'cloudflare', 'digital ocean', 'linode', 'vultr']):
+        usage = "DCH"
+    elif any(k in text for k in ['mobile', 'cellular', 'wireless', 'gsm', 'lte', 'vivo', 'claro', 'tim', 'oi', 'vodafone', 'at&t', 'verizon']):
+        usage = "MOB"
+    elif any(k in text for k in ['university', 'education', 'school', 'college', 'academic']):
+        usage = "EDU"
+    elif any(k in text for k in ['government', 'military', 'gov', 'defense']):
+        usage = "GOV"
+    elif any(k in text for k in ['business', 'enterprise', 'corporate']):
+        usage = "COM"
+    else:
+        usage = "ISP"
+
+    text = f"{domain or ''} {org or ''} {asn_desc or ''}".lower()
+    threats = []
+    if any(k in text for k in ['tor', 'proxy', 'vpn']):
+        threats.append(("Anonymization Service", 20))
+    if any(k in text for k in ['botnet', 'malware', 'spam']):
+        threats.append(("Malicious Activity", 40))
+    if any(k in text for k in ['datacenter', 'hosting', 'cloud']):
+        threats.append(("Hosting Provider", 10))
+
+    datacenter = any(k in text for k in [
+        'amazon', 'aws', 'google', 'microsoft', 'azure', 'digitalocean',
+        'linode', 'vultr', 'ovh', 'hetzner', 'cloudflare', 'fastly',
+        'hosting', 'datacenter', 'data center', 'cloud', 'server'
+    ])
+    return usage, threats, datacenter
+
+def _compiled_classify(domain, org, asn_desc, isp):
+    from classifier import classify_usage_type, classify_threats, is_datacenter
+    return (classify_usage_type(asn_desc, org, isp), list(classify_threats(domain, org, asn_desc)),
+            is_datacenter(domain, org, asn_desc))
+
+def _clear_classifier_caches():
+    import classifier
+    for memoized in (classifier.match_keywords, classifier.classify_usage_type,
+                     classifier.classify_threats, classifier.is_datacenter):
+        memoized.cache_clear()
+
+def bench_classifier(count=100000, distinct=2000):
+    """Bulk-style workload: many lookups over a limited set of distinct ASN descriptions"""
+    import classifier
+
+    rng = random.Random(42)
+    descriptions = [
+        (f"host{i}.example.net", f"{rng.choice(_ORG_WORDS)} {i}", f"AS{i} {rng.choice(_ORG_WORDS)}".upper(), rng.choice(_ORG_WORDS))
+        for i in range(distinct)
+    ]
+    workload = [rng.choice(descriptions) for _ in range(count)]
+
+    mismatches = sum(1 for item in descriptions if _legacy_classify(*item) != _compiled_classify(*item))
+    print(f"classifier: {count:,} classifications over {distinct:,} distinct orgs ({mismatches} mismatches)")
+
+    seconds, _ = _timed(lambda: [_legacy_classify(*item) for item in workload])
+    _report("legacy any() scans", seconds, count)
+
+    classify_usage_type, classify_threats, is_datacenter = (
+        classifier.classify_usage_type, classifier.classify_threats, classifier.is_datacenter
+    )
+
+    def compiled():
+        for domain, org, asn_desc, isp in workload:
+            classify_usage_type(asn_desc, org, isp)
+            classify_threats(domain, org, asn_desc)
+            is_datacenter(domain, org, asn_desc)
+
+    _clear_classifier_caches()
+    seconds, _ = _timed(compiled)
+    _report("compiled + memoized", seconds, count)
+
+    def cold():
+        for item in workload[:count // 10]:
+            _clear_classifier_caches()
+            _compiled_classify(*item)
+    seconds, _ = _timed(cold)
+    _report("compiled, cold cache", seconds, count // 10)
+
+# Analysis result model ------------------------------------------------------
+
+def _sample_analysis(i, raw_sources=True):
+    """A filled-in result shaped like a real 8.8.8.8 analysis, with its own raw payloads"""
+    from analysis_model import AnalysisResult, Coordinates, Currency
+
+    result = AnalysisResult(ip=f"8.8.{i // 256 % 256}.{i % 256}", analysis_timestamp="2024-01-01T00:00:00Z",
+                            analysis_duration=0.42)
+    result.basic.update({'ip_type': 'Public', 'reverse_dns': 'dns.google', 'domain': 'dns.google'})
+    result.geographic.update({'country_code': 'US', 'country_name': 'United States', 'continent': 'North America',
+                              'region': 'California', 'city': 'Mountain View', 'postal_code': '94043',
+                              'coordinates': Coordinates(lat=37.4056, lon=-122.0775)})
+    result.time.update({'timezone': 'America/Los_Angeles', 'utc_offset': -25200, 'utc_offset_formatted': 'UTC-7',
+                        'local_time': '2024-01-01 00:00:00 PDT', 'utc_time': '2024-01-01 07:00:00 UTC', 'is_dst': True})
+    result.currency = Currency(code='USD', name='US Dollar', symbol='$')
+    result.weather = {'available': True, 'temperature': '18°C', 'description': 'clear sky', 'humidity': '60%'}
+    result.network.update({'asn': '15169', 'asn_description': 'GOOGLE, US', 'asn_country': 'US', 'asn_registry': 'arin',
+                           'organization': 'Google LLC', 'isp': 'Google LLC', 'network_name': 'GOGL',
+                           'cidr': '8.8.8.0/24', 'usage_type': 'DCH', 'is_datacenter': True})
+    result.security.threat_analysis = {'risk_score': 10, 'threat_types': ['Hosting Provider'], 'risk_level': 'Low'}
+    result.performance = {'estimated_speed': 'High', 'connection_type': 'Datacenter', 'quality_score': 95,
+                          'latency_estimate': 'Low'}
+    if raw_sources:
+        whois = {'asn': '15169', 'asn_cidr': '8.8.8.0/24', 'asn_description': 'GOOGLE, US', 'network_name': 'GOGL',
+                 'entities': ['GOGL'], 'objects': {
+                     'GOGL': {'handle': 'GOGL', 'roles': ['registrant'], 'events': [
+                         {'action': 'registration', 'timestamp': '2000-03-30T00:00:00-05:00'},
+                         {'action': 'last changed', 'timestamp': '2019-10-31T15:45:45-04:00'}],
+                         'contact': {'name': 'Google LLC', 'address': [{'value': '1600 Amphitheatre Parkway <Mountain View>'}],
+                                     'email': [{'type': 'abuse', 'value': f'network-abuse{i}@google.com'}]}}}}
+        geo = {'status': 'success', 'country': 'United States', 'countryCode': 'US', 'region': 'CA',
+               'regionName': 'California', 'city': 'Mountain View', 'zip': '94043', 'lat': 37.4056,
+               'lon': -122.0775, 'timezone': 'America/Los_Angeles', 'isp': 'Google LLC', 'org': 'Google Public DNS',
+               'as': 'AS15169 Google LLC', 'mobile': False, 'proxy': False, 'hosting': True, 'query': result.ip}
+        result.sources = {'whois': whois, 'geolocation': [('ip-api.com', geo)]}
+    else:
+        result.sources = None
+    return result
+
+def bench_analysis_model(count=2000):
+    """Memory per cached result and response serialization: nested dicts vs slotted records"""
+    import json
+    import tracemalloc
+    from analysis_model import dumps, orjson, plain
+    from security import sanitize_output
+
+    def allocated(build):
+        tracemalloc.start()
+        items = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del items
+        return size
+
+    print(f"analysis_model: {count:,} results (orjson {'installed' if orjson else 'not installed'})")
+    for label, build in (
+        ("dict results + sources", lambda: [_sample_analysis(i).to_dict() for i in range(count)]),
+        ("records + sources", lambda: [_sample_analysis(i) for i in range(count)]),
+        ("records, no raw sources", lambda: [_sample_analysis(i, raw_sources=False) for i in range(count)]),
+    ):
+        print(f"  {label:<28} {allocated(build) / count:9.0f} B/result")
+
+    results = [_sample_analysis(i) for i in range(count)]
+    legacy = [result.to_dict() for result in results]
+
+    seconds, _ = _timed(lambda: [json.dumps(sanitize_output(data)) for data in legacy])
+    _report("dict + json.dumps", seconds, count)
+    seconds, _ = _timed(lambda: [dumps(sanitize_output(plain(result))) for result in results])
+    _report("record + dumps", seconds, count)
+    seconds, _ = _timed(lambda: [dumps(sanitize_output(plain(result, False))) for result in results])
+    _report("record + dumps, no sources", seconds, count)
+
+# Output escaping ---------------------------------------------------------------
+
+def bench_escaping(count=2000, bulk=10000):
+    """HTML-escaped API output: sanitize_output deep copy + encode vs escaping the encoded buffer"""
+    from analysis_model import dumps, plain
+    from security import sanitize_output, sanitized_dumps
+
+    results = [_sample_analysis(i) for i in range(max(count, bulk))]
+    for result in results[::10]:
+        result.basic.reverse_dns = f"<b>host-{result.ip}</b>.example's \\\"edge\\\" & co"
+    assert all(sanitized_dumps(plain(r)) == dumps(sanitize_output(plain(r))) for r in results[:count])
+
+    print(f"escaping: {count:,} single results, one {bulk:,}-item bulk response")
+    singles = results[:count]
+    seconds, _ = _timed(lambda: [dumps(sanitize_output(plain(result))) for result in singles])
+    _report("sanitize_output + dumps", seconds, count)
+    seconds, _ = _timed(lambda: [sanitized_dumps(plain(result)) for result in singles])
+    _report("sanitized_dumps", seconds, count)
+
+    items = results[:bulk]
+    seconds, _ = _timed(lambda: b"".join(dumps(sanitize_output(plain(r, False))) + b"\n" for r in items))
+    _report("bulk: sanitize_output + dumps", seconds, bulk)
+    seconds, _ = _timed(lambda: b"".join(sanitized_dumps(plain(r, False)) + b"\n" for r in items))
+    _report("bulk: sanitized_dumps", seconds, bulk)
+
+# Input validation --------------------------------------------------------------
+
+def bench_validation(count=100000):
+    """A bulk upload: mixed addresses, CIDRs, hostnames, duplicates and junk, one per line"""
+    from security import validate_ip_input, validate_ip_list
+
+    rng = random.Random(5)
+    lines = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.55:
+            lines.append(f" {rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}")
+        elif kind < 0.75:
+            lines.append(f"2001:DB8:{rng.randrange(65536):x}::{rng.randrange(65536):X}")
+        elif kind < 0.8:
+            lines.append(f"10.{rng.randrange(256)}.0.0/16")
+        elif kind < 0.9:
+            lines.append(f"host-{rng.randrange(5000)}.Example.com.")
+        elif kind < 0.95:
+            lines.append(lines[rng.randrange(len(lines))] if lines else "8.8.8.8")
+        else:
+            lines.append(rng.choice(("1.2.3.999", "gg::1", "a;b", "<script>", "")))
+    print(f"validation: {count:,} lines")
+
+    def per_line():
+        valid = []
+        for line in lines:
+            try:
+                valid.append(validate_ip_input(line))
+            except ValueError:
+                pass
+        return valid
+    seconds, _ = _timed(per_line)
+    _report("validate_ip_input per line", seconds, count)
+
+    seconds, (accepted, rejected, counts) = _timed(validate_ip_list, lines)
+    _report("validate_ip_list", seconds, count)
+    print(f"  {len(accepted):,} accepted, {len(rejected):,} rejected, {counts}")
+
+# Rate limiter -----------------------------------------------------------------
+
+class _LegacyRateLimiter:
+    """Pre-limiter implementation: a timestamp list per client, filtered on every request"""
+
+    def __init__(self):
+        from collections import defaultdict
+        self.rate_limits = defaultdict(list)
+
+    def check(self, ip_address, limit=100, window=3600, now=None):
+        self.rate_limits[ip_address] = [
+            timestamp for timestamp in self.rate_limits[ip_address] if now - timestamp < window
+        ]
+        if len(self.rate_limits[ip_address]) >= limit:
+            return False
+        self.rate_limits[ip_address].append(now)
+        return True
+
+def bench_rate_limiter(count=300000, clients=100000, heavy=200):
+    """API traffic from many distinct client IPs plus a few heavy hitters at the limit"""
+    import tracemalloc
+    from rate_limiter import SlidingWindowLimiter
+
+    rng = random.Random(7)
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)]
+    workload = [ips[rng.randrange(heavy)] if rng.random() < 0.5 else rng.choice(ips) for _ in range(count)]
+    print(f"rate_limiter: {count:,} requests from {clients:,} clients ({heavy} heavy hitters)")
+
+    def run(check):
+        now = 1_000_000.0
+        for ip in workload:
+            now += 0.01
+            check(ip, now)
+
+    for label, make, check in (
+        ("legacy timestamp lists", _LegacyRateLimiter, lambda limiter: lambda ip, now: limiter.check(ip, now=now)),
+        ("sliding window counter", lambda: SlidingWindowLimiter(limit=100, window=3600, max_clients=clients),
+         lambda limiter: limiter.hit),
+        ("sliding window, 10% table", lambda: SlidingWindowLimiter(limit=100, window=3600, max_clients=clients // 10),
+         lambda limiter: limiter.hit),
+    ):
+        tracemalloc.start()
+        limiter = make()
+        run(check(limiter))
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        limiter = make()
+        seconds, _ = _timed(run, check(limiter))
+        print(f"  {label:<28} {seconds / count * 1e6:9.2f} us/request  {size / 1024 / 1024:6.1f} MB")
+
+# Blocklist ---------------------------------------------------------------------
+
+def bench_blocklist(count=300000, lookups=200000):
+    """Feed of addresses and CIDRs loaded in bulk, then per-request membership checks"""
+    import ipaddress
+    from blocklist import Blocklist, parse_feed
+
+    rng = random.Random(11)
+
+    def octets():
+        return f"{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}"
+
+    lines = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            lines.append(f"{octets()}.{rng.randrange(256)}")
+        elif kind < 0.9:
+            lines.append(f"{octets()}.0/{rng.choice((20, 22, 24))} ; SBL{i}")
+        else:
+            lines.append(f"2001:db8:{rng.randrange(65536):x}:{rng.randrange(65536):x}::/64")
+    probes = [f"{octets()}.{rng.randrange(256)}" for _ in range(lookups)]
+    print(f"blocklist: {count:,} feed entries, {lookups:,} membership checks")
+
+    def legacy_parse():
+        # The previous PrefixIndex parsing path: ipaddress objects for every entry
+        return [ipaddress.ip_network(network, strict=False) for network, _ in parse_feed(lines, 'feed')]
+    seconds, _ = _timed(legacy_parse)
+    _report("parse via ipaddress", seconds, count)
+
+    blocklist = Blocklist()
+    seconds, loaded = _timed(blocklist.load, lines)
+    _report(f"load ({loaded:,} entries)", seconds, count)
+
+    seconds, _ = _timed(lambda: [blocklist.is_blocked(ip) for ip in probes])
+    print(f"  {'is_blocked':<28} {seconds / lookups * 1e6:9.2f} us/check")
+
+BENCHMARKS = {
+    'classifier': bench_classifier,
+    'analysis_model': bench_analysis_model,
+    'escaping': bench_escaping,
+    'validation': bench_validation,
+    'rate_limiter': bench_rate_limiter,
+    'blocklist': bench_blocklist,
+}
+
+if __name__ == '__main__':
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            sys.exit(1)
+        BENCHMARKS[name]()
@@ -0,0 +1,220 @@
+import ipaddress
+import json
+import os
+import threading
+import time
+
+from prefix_index import PrefixIndex
+
+def parse_feed(lines, source):
+    """(network, source) pairs from feed lines: one address or CIDR per line, '#' and ';' start comments
+
+    Covers plain lists and the Spamhaus DROP style ("1.2.3.0/24 ; SBL123").
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'replace')
+        line = line.split('#', 1)[0].split(';', 1)[0].strip()
+        if line:
+            yield line.split(None, 1)[0], source
+
+class Blocklist:
+    """IPv4/IPv6 address and CIDR blocklist with per-entry TTLs and bulk feed loading
+
+    Backed by PrefixIndex, so a membership check is one hash probe per
+    distinct prefix length in the list, whatever the number of entries.
+    Feed files are compiled into their own index and swapped in whole when
+    they change on disk, so entries dropped from a feed disappear too.
+    With a shared (Redis) tier, block()/unblock() apply to every worker: the
+    entries live in one Redis hash that each worker mirrors every
+    `sync_interval` seconds.
+    """
+
+    def __init__(self, max_entries=None, feed_paths=(), feed_ttl=None, refresh_interval=300,
+                 sync_interval=5, namespace='netscan:blocklist:'):
+        self.max_entries = max_entries
+        self._entries = PrefixIndex(max_entries=max_entries)  # this worker's block()/load() additions
+        self._shared_entries = PrefixIndex(max_entries=max_entries)  # mirror of the shared block() entries
+        self._feeds = PrefixIndex()
+        self.feed_paths = [path for path in feed_paths if path]
+        self.feed_ttl = feed_ttl
+        self.refresh_interval = refresh_interval
+        self.sync_interval = sync_interval
+        self.namespace = namespace
+        self.shared = None
+        self._synced_version = None
+        self.feeds = {}  # path -> entries loaded
+        self.feeds_loaded_at = None
+        self.last_error = None
+        self.denied = 0
+        self._mtimes = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._entries) + len(self._shared_entries) + len(self._feeds)
+
+    def use_shared(self, shared):
+        """Keep block()/unblock() entries in the shared tier (Redis hashes; other tiers are per worker)"""
+        if hasattr(shared, 'hgetall'):
+            self.shared = shared
+            self.sync()
+
+    @staticmethod
+    def _shared_key(network):
+        return str(ipaddress.ip_network(network.strip() if isinstance(network, str) else network, strict=False))
+
+    def block(self, network, ttl=None, reason='manual'):
+        """Block an address or CIDR; ttl=None keeps it until unblocked"""
+        if self.shared is not None:
+            network = self._shared_key(network)
+            entry = json.dumps({'reason': reason, 'expires_at': time.time() + ttl if ttl else None})
+            try:
+                self.shared.hset(self.namespace + 'entries', network, entry)
+                self.shared.incr(self.namespace + 'version')
+                self._shared_entries.insert(network, reason, ttl)
+                return
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️  Shared blocklist unavailable, blocking {network} in this worker only: {e}")
+        self._entries.insert(network, reason, ttl)
+
+    def unblock(self, network):
+        removed = self._entries.remove(network)
+        if self.shared is not None:
+            key = self._shared_key(network)
+            try:
+                removed = bool(self.shared.hdel(self.namespace + 'entries', key)) or removed
+                self.shared.incr(self.namespace + 'version')
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️  Shared blocklist unavailable, unblocking {network} in this worker only: {e}")
+            removed = self._shared_entries.remove(network) or removed
+        return removed
+
+    def sync(self):
+        """Mirror the shared entries when another worker changed them"""
+        try:
+            version = self.shared.get(self.namespace + 'version')
+            if version == self._synced_version:
+                return False
+            stored = self.shared.hgetall(self.namespace + 'entries')
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"⚠️  Shared blocklist sync failed: {e}")
+            return False
+        now = time.time()
+        entries, expired = [], []
+        for network, entry in stored.items():
+            network = network.decode() if isinstance(network, bytes) else network
+            entry = json.loads(entry)
+            if entry['expires_at'] is None:
+                entries.append((network, entry['reason'], 0))
+            elif entry['expires_at'] > now:
+                entries.append((network, entry['reason'], entry['expires_at'] - now))
+            else:
+                expired.append(network)
+        index = PrefixIndex(max_entries=self.max_entries)
+        index.insert_many(entries)
+        self._shared_entries = index
+        self._synced_version = version
+        if expired:
+            try:
+                self.shared.hdel(self.namespace + 'entries', *expired)
+            except Exception:
+                pass
+        return True
+
+    def load(self, lines, ttl=None, source='bulk'):
+        """Add every address/CIDR in feed-formatted lines; returns how many were loaded"""
+        return self._entries.insert_many(parse_feed(lines, source), ttl)
+
+    def match(self, ip):
+        """(network, reason) of the blocking entry for ip, or None"""
+        return (self._entries.lookup_prefix(ip) or self._shared_entries.lookup_prefix(ip)
+                or self._feeds.lookup_prefix(ip))
+
+    def is_blocked(self, ip):
+        shared, feeds = self._shared_entries, self._feeds
+        if not ((len(self._entries) and self._entries.lookup(ip) is not None)
+                or (len(shared) and shared.lookup(ip) is not None)
+                or (len(feeds) and feeds.lookup(ip) is not None)):
+            return False
+        self.denied += 1
+        return True
+
+    # Feed files ------------------------------------------------------------------
+
+    def reload_feeds(self):
+        """Compile every feed file into a fresh index and swap it in"""
+        feeds = PrefixIndex(max_entries=self.max_entries)
+        counts = {}
+        mtimes = {}
+        start = time.time()
+        self.last_error = None
+        for path in self.feed_paths:
+            try:
+                mtimes[path] = os.path.getmtime(path)
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    counts[path] = feeds.insert_many(parse_feed(f, os.path.basename(path)), self.feed_ttl)
+            except OSError as e:
+                self.last_error = str(e)
+                print(f"⚠️  Could not load blocklist feed {path}: {e}")
+        # Readers keep using the old index until this single reference swap
+        self._feeds = feeds
+        self.feeds, self._mtimes = counts, mtimes
+        self.feeds_loaded_at = time.time()
+        print(f"🚫 Blocklist feeds loaded: {len(feeds)} entries in {time.time() - start:.2f}s")
+        return len(feeds)
+
+    def _feeds_changed(self):
+        for path in self.feed_paths:
+            try:
+                if os.path.getmtime(path) != self._mtimes.get(path):
+                    return True
+            except OSError:
+                if path in self._mtimes:
+                    return True
+        return False
+
+    def _feeds_expiring(self):
+        # Unchanged feeds are re-read before their entries' TTL runs out, renewing it
+        return bool(self.feed_ttl) and time.time() + self.refresh_interval >= self.feeds_loaded_at + self.feed_ttl
+
+    def _run(self):
+        next_refresh = time.time() + self.refresh_interval
+        while not self._stop.wait(min(self.refresh_interval, self.sync_interval)):
+            if self.shared is not None:
+                self.sync()
+            if time.time() < next_refresh:
+                continue
+            next_refresh = time.time() + self.refresh_interval
+            if self.feed_paths and (self._feeds_changed() or self._feeds_expiring()):
+                self.reload_feeds()
+            self._entries.purge_expired()
+            self._shared_entries.purge_expired()
+
+    def start(self):
+        """Load the feeds and start the thread that watches them and sweeps expired entries"""
+        if self._thread and self._thread.is_alive():
+            return
+        if self.feed_paths:
+            self.reload_feeds()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='blocklist-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'shared_entries': len(self._shared_entries) if self.shared is not None else None,
+            'feed_entries': len(self._feeds),
+            'feeds': dict(self.feeds),
+            'feeds_loaded_at': self.feeds_loaded_at,
+            'prefix_lengths': self._feeds.stats()['prefix_lengths'],
+            'denied': self.denied,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # Shared tier is optional
+    redis = None
+
+# Sentinel returned on a cache miss, so cached None (negative entries) can be told apart
+MISS = object()
+
+class MemoryCache:
+    """Thread-safe LRU cache bounded by entry count and approximate byte size"""
+
+    def __init__(self, max_entries=1000, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS
+            expires_at, size, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._bytes -= size
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl, size=0):
+        if ttl <= 0:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._bytes -= previous[1]
+            self._entries[key] = (time.time() + ttl, size, value)
+            self._bytes += size
+
+            # Evict least recently used entries until both bounds hold
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._bytes -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+class InMemorySharedTier:
+    """In-process stand-in for the Redis tier (tests and single-worker setups)"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            return payload
+
+    def setex(self, key, ttl, payload):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, payload)
+
+    def set(self, key, payload, nx=False, px=None):
+        """Subset of redis SET: nx only writes a missing key, px is a TTL in milliseconds"""
+        with self._lock:
+            entry = self._data.get(key)
+            if nx and entry is not None and entry[0] > time.time():
+                return None
+            self._data[key] = (time.time() + px / 1000.0 if px else float('inf'), payload)
+            return True
+
+    def compare_and_delete(self, key, payload):
+        """Delete key only while it still holds payload (the Lua release script in Redis)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] == payload:
+                del self._data[key]
+                return 1
+            return 0
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+class TieredCache:
+    """Per-worker memory tier backed by an optional shared tier visible to all workers"""
+
+    def __init__(self, local, shared=None, namespace='netscan:cache:', encode=None, decode=None):
+        self.local = local
+        self.shared = shared
+        self.namespace = namespace
+        # Values that are not plain JSON (e.g. analysis records) are converted for the shared tier
+        self.encode = encode
+        self.decode = decode
+        self.shared_hits = 0
+        self.shared_errors = 0
+
+    def _shared_key(self, key):
+        # Hash keys so URLs (and any API keys in them) never reach the shared store
+        return self.namespace + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not MISS or self.shared is None:
+            return value
+
+        try:
+            payload = self.shared.get(self._shared_key(key))
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"⚠️  Shared cache read failed: {e}")
+            return MISS
+        if payload is None:
+            return MISS
+
+        try:
+            envelope = json.loads(payload)
+            remaining = envelope['exp'] - time.time()
+            if remaining <= 0:
+                return MISS
+            value = self.decode(envelope['v']) if self.decode else envelope['v']
+        except (ValueError, KeyError, TypeError) as e:
+            # Truncated or foreign payload: recompute rather than fail the request
+            self.shared_errors += 1
+            print(f"⚠️  Shared cache entry unreadable: {e}")
+            return MISS
+        self.shared_hits += 1
+        self.local.set(key, value, remaining, size=len(payload))
+        return value
+
+    def set(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        plain = self.encode(value) if self.encode else value
+        payload = json.dumps({'v': plain, 'exp': time.time() + ttl}, separators=(',', ':'))
+        self.local.set(key, value, ttl, size=len(payload))
+
+        if self.shared is not None:
+            try:
+                self.shared.setex(self._shared_key(key), max(1, int(ttl)), payload)
+            except Exception as e:
+                self.shared_errors += 1
+                print(f"⚠️  Shared cache write failed: {e}")
+
+    def delete(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            try:
+                self.shared.delete(self._shared_key(key))
+            except Exception:
+                self.shared_errors += 1
+
+    def stats(self):
+        stats = self.local.stats()
+        stats.update({
+            'shared_tier': type(self.shared).__name__ if self.shared is not None else None,
+            'shared_hits': self.shared_hits,
+            'shared_errors': self.shared_errors
+        })
+        return stats
+
+def create_shared_tier(url):
+    """Build the shared tier from a URL: redis://... or memory:// for the in-process stand-in"""
+    if not url:
+        return None
+    if url.startswith('memory://'):
+        return InMemorySharedTier()
+    if redis is None:
+        print("⚠️  redis package not installed - shared cache tier disabled")
+        return None
+    try:
+        return redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+    except Exception as e:
+        print(f"⚠️  Could not configure shared cache tier: {e}")
+        return None
+
+# Global cache instance
+response_cache = None
+
+def init_cache(config):
+    """Initialize the global response cache"""
+    global response_cache
+    local = MemoryCache(
+        max_entries=config.get('CACHE_MAX_ENTRIES', 1000),
+        max_bytes=config.get('CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    )
+    response_cache = TieredCache(local, create_shared_tier(config.get('REDIS_URL')))
+    return response_cache
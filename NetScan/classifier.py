@@ -0,0 +1,131 @@
+import re
+from functools import lru_cache
+
+# Declarative keyword rules. Keywords match as substrings of the lowercased text.
+
+# Usage type: first matching rule wins
+USAGE_TYPE_RULES = (
+    ("DCH", ('google', 'amazon', 'microsoft', 'cloudflare', 'digital ocean', 'linode', 'vultr')),  # Data Center/Hosting
+    ("MOB", ('mobile', 'cellular', 'wireless', 'gsm', 'lte', 'vivo', 'claro', 'tim', 'oi', 'vodafone', 'at&t', 'verizon')),  # Mobile
+    ("EDU", ('university', 'education', 'school', 'college', 'academic')),  # Educational
+    ("GOV", ('government', 'military', 'gov', 'defense')),  # Government
+    ("COM", ('business', 'enterprise', 'corporate')),  # Commercial
+)
+USAGE_TYPE_DEFAULT = "ISP"  # Internet Service Provider
+
+# Threats: every matching rule adds its score
+THREAT_RULES = (
+    ("Anonymization Service", 20, ('tor', 'proxy', 'vpn')),
+    ("Malicious Activity", 40, ('botnet', 'malware', 'spam')),
+    ("Hosting Provider", 10, ('datacenter', 'hosting', 'cloud')),
+)
+
+# Network performance profile: first matching rule wins
+PERFORMANCE_RULES = (
+    ({
+        "estimated_speed": "Very High (1Gbps+)",
+        "connection_type": "Fiber/Data Center",
+        "quality_score": 95,
+        "latency_estimate": "< 10ms"
+    }, ('google', 'cloudflare', 'amazon', 'microsoft')),
+    ({
+        "estimated_speed": "High (100-1000Mbps)",
+        "connection_type": "Fiber Broadband",
+        "quality_score": 85,
+        "latency_estimate": "10-30ms"
+    }, ('fiber', 'broadband')),
+    ({
+        "estimated_speed": "Medium (10-100Mbps)",
+        "connection_type": "Mobile/Cellular",
+        "quality_score": 70,
+        "latency_estimate": "30-100ms"
+    }, ('mobile', 'cellular', 'lte', '5g')),
+)
+PERFORMANCE_DEFAULT = {
+    "estimated_speed": "Standard (1-50Mbps)",
+    "connection_type": "Broadband",
+    "quality_score": 60,
+    "latency_estimate": "20-80ms"
+}
+
+DATACENTER_KEYWORDS = (
+    'amazon', 'aws', 'google', 'microsoft', 'azure', 'digitalocean',
+    'linode', 'vultr', 'ovh', 'hetzner', 'cloudflare', 'fastly',
+    'hosting', 'datacenter', 'data center', 'cloud', 'server'
+)
+
+def _trie_pattern(keywords):
+    """Regex alternation factored as a character trie, preferring the longest keyword"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+def _all_keywords():
+    keywords = set(DATACENTER_KEYWORDS)
+    for _, rule_keywords in USAGE_TYPE_RULES:
+        keywords.update(rule_keywords)
+    for _, _, rule_keywords in THREAT_RULES:
+        keywords.update(rule_keywords)
+    for _, rule_keywords in PERFORMANCE_RULES:
+        keywords.update(rule_keywords)
+    return keywords
+
+_KEYWORDS = _all_keywords()
+# Zero-width lookahead reports a match at every position, overlaps included
+_MATCHER = re.compile(f'(?=({_trie_pattern(_KEYWORDS)}))')
+# The longest keyword at a position implies every keyword it contains
+_IMPLIED = {keyword: frozenset(other for other in _KEYWORDS if other in keyword) for keyword in _KEYWORDS}
+
+_USAGE_TYPE_SETS = tuple((label, frozenset(keywords)) for label, keywords in USAGE_TYPE_RULES)
+_THREAT_SETS = tuple((label, score, frozenset(keywords)) for label, score, keywords in THREAT_RULES)
+_PERFORMANCE_SETS = tuple((profile, frozenset(keywords)) for profile, keywords in PERFORMANCE_RULES)
+_DATACENTER_SET = frozenset(DATACENTER_KEYWORDS)
+
+@lru_cache(maxsize=8192)
+def match_keywords(text):
+    """Every ruleset keyword occurring in text, found in a single regex pass"""
+    found = set()
+    for match in _MATCHER.finditer(text.lower()):
+        found |= _IMPLIED[match.group(1)]
+    return frozenset(found)
+
+def _text(*parts):
+    return ' '.join(part or '' for part in parts)
+
+@lru_cache(maxsize=8192)
+def classify_usage_type(asn_description, org_name, isp_name):
+    found = match_keywords(_text(asn_description, org_name, isp_name))
+    for label, keywords in _USAGE_TYPE_SETS:
+        if found & keywords:
+            return label
+    return USAGE_TYPE_DEFAULT
+
+@lru_cache(maxsize=8192)
+def classify_threats(domain, org, asn_desc):
+    """(threat type, score) pairs for every threat rule that matches"""
+    found = match_keywords(_text(domain, org, asn_desc))
+    return tuple((label, score) for label, score, keywords in _THREAT_SETS if found & keywords)
+
+def classify_performance(org):
+    """Copy of the performance profile for the first matching rule"""
+    found = match_keywords(org or '')
+    for profile, keywords in _PERFORMANCE_SETS:
+        if found & keywords:
+            return dict(profile)
+    return dict(PERFORMANCE_DEFAULT)
+
+@lru_cache(maxsize=8192)
+def is_datacenter(domain, org, asn_desc):
+    return bool(match_keywords(_text(domain, org, asn_desc)) & _DATACENTER_SET)
@@ -15,7 +15,104 @@ class Config:
     
     # External APIs
     OPENWEATHER_API_KEY = os.environ.get('OPENWEATHER_API_KEY')
+
+    # Analysis pipeline
+    ANALYSIS_DEADLINE = float(os.environ.get('ANALYSIS_DEADLINE', 8))  # seconds per analysis
+    ANALYSIS_MAX_WORKERS = int(os.environ.get('ANALYSIS_MAX_WORKERS', 64))
+    GEO_REQUEST_WORKERS = int(os.environ.get('GEO_REQUEST_WORKERS', 32))  # geolocation requests and hedges
+    BULK_CONCURRENCY = int(os.environ.get('BULK_CONCURRENCY', 16))  # analyses in flight across bulk jobs
+    BULK_MAX_IPS = int(os.environ.get('BULK_MAX_IPS', 10000))  # unique addresses analyzed per request
+    BULK_MAX_LINES = int(os.environ.get('BULK_MAX_LINES', 100000))  # lines validated per request
+    BACKGROUND_ANALYSIS_WORKERS = int(os.environ.get('BACKGROUND_ANALYSIS_WORKERS', 4))  # page-view analyses
+    # ASGI mode (asgi.py): lookups kept in flight on one event loop per worker
+    ASYNC_BULK_CONCURRENCY = int(os.environ.get('ASYNC_BULK_CONCURRENCY', 200))
+    ASYNC_MAX_CONNECTIONS = int(os.environ.get('ASYNC_MAX_CONNECTIONS', 200))
+    ASYNC_SHARED_IO_WORKERS = int(os.environ.get('ASYNC_SHARED_IO_WORKERS', 16))  # threads for Redis calls off the loop
+
+    # Finished analyses (partial results are kept only briefly so they get retried)
+    ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', 300))
+    ANALYSIS_PARTIAL_TTL = 30
+    ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', 2000))
+    # Raw WHOIS/geolocation payloads in results (?sources=false omits them per request)
+    ANALYSIS_RAW_SOURCES = os.environ.get('ANALYSIS_RAW_SOURCES', 'true').lower() == 'true'
+    # Identical concurrent analyses are computed once; with REDIS_URL also across workers
+    SINGLEFLIGHT_SHARED_LOCK = os.environ.get('SINGLEFLIGHT_SHARED_LOCK', 'true').lower() == 'true'
     
+    # Lazy start-up (Cloud Functions cold starts): Firebase, the Tor exit list and
+    # other services initialize on their first use instead of at import
+    LAZY_INIT = os.environ.get('LAZY_INIT', 'false').lower() == 'true'
+
+    # Upstream response cache (REDIS_URL enables the tier shared by all workers)
+    REDIS_URL = os.environ.get('REDIS_URL')
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 5000))
+    CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    CACHE_NEGATIVE_TTL = 60  # failed lookups are retried after a minute
+    CACHE_TTLS = {
+        'geolocation': 24 * 3600,
+        'weather': 10 * 60,  # OpenWeather refreshes current conditions about every 10 minutes
+        'default': 3600
+    }
+
+    # Weather is cached per grid tile of this many degrees (0.1 is about 11 km)
+    WEATHER_TILE_DEGREES = float(os.environ.get('WEATHER_TILE_DEGREES', 0.1))
+
+    # Pooled upstream HTTP client (connections kept per host, retried on 5xx/connection errors)
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 10))
+    HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 2))
+    HTTP_BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', 0.3))
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))
+    HTTP_REQUEST_BUDGET = float(os.environ.get('HTTP_REQUEST_BUDGET', 7))  # per upstream call, retries included; below ANALYSIS_DEADLINE
+
+    # Upstream quotas as (requests, per seconds, burst) and circuit breaker tuning
+    PROVIDER_QUOTAS = {
+        'ip-api.com': (45, 60, 45),
+        'ip-api.com/batch': (15, 60, 15),  # up to 100 IPs per request
+        'ipapi.co': (1000, 24 * 3600, 20),
+        'ipinfo.io': (50000, 30 * 24 * 3600, 20),
+        'openweathermap': (60, 60, 60)
+    }
+    # Workers sharing those quotas (gunicorn --workers): without REDIS_URL each keeps to its share
+    PROVIDER_QUOTA_WORKERS = int(os.environ.get('PROVIDER_QUOTA_WORKERS', os.environ.get('WEB_CONCURRENCY', 2)))
+    PROVIDER_FAILURE_THRESHOLD = int(os.environ.get('PROVIDER_FAILURE_THRESHOLD', 3))
+    PROVIDER_RECOVERY_TIMEOUT = int(os.environ.get('PROVIDER_RECOVERY_TIMEOUT', 30))
+    # Hedge delay used until a provider has enough samples for its own p90
+    GEO_HEDGE_DELAY = float(os.environ.get('GEO_HEDGE_DELAY', 1.0))
+
+    # Reverse DNS (comma-separated nameservers; empty uses the system configuration)
+    DNS_NAMESERVERS = os.environ.get('DNS_NAMESERVERS', '')
+    DNS_TIMEOUT = float(os.environ.get('DNS_TIMEOUT', 2))
+    DNS_NEGATIVE_TTL = int(os.environ.get('DNS_NEGATIVE_TTL', 300))
+
+    # Offline geolocation database compiled with geo_db.py (skipped when missing)
+    GEO_DB_PATH = os.environ.get('GEO_DB_PATH', 'data/geo.db')
+
+    # WHOIS/RDAP results cached per network CIDR
+    WHOIS_CACHE_TTL = int(os.environ.get('WHOIS_CACHE_TTL', 7 * 24 * 3600))
+    WHOIS_CACHE_MAX_ENTRIES = int(os.environ.get('WHOIS_CACHE_MAX_ENTRIES', 50000))
+    WHOIS_CACHE_PURGE_INTERVAL = int(os.environ.get('WHOIS_CACHE_PURGE_INTERVAL', 3600))  # expired networks dropped
+    # Results are shared no wider than the queried address's BGP route, and never across blocks broader than these
+    WHOIS_CACHE_MIN_PREFIX = {4: 16, 6: 32}
+
+    # Tor exit node list (refreshed in the background, persisted for restarts)
+    TOR_EXIT_LIST_URL = 'https://check.torproject.org/exit-addresses'
+    TOR_REFRESH_INTERVAL = int(os.environ.get('TOR_REFRESH_INTERVAL', 1800))
+    TOR_EXIT_CACHE_PATH = os.environ.get('TOR_EXIT_CACHE_PATH', 'data/tor_exit_nodes.txt')
+
+    # Per-client API rate limit (sliding window); clients over twice the limit get blocked
+    RATE_LIMIT = int(os.environ.get('RATE_LIMIT', 100))
+    RATE_LIMIT_WINDOW = int(os.environ.get('RATE_LIMIT_WINDOW', 3600))
+    RATE_LIMIT_MAX_CLIENTS = int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', 100000))  # idle clients evicted first
+    RATE_LIMIT_BLOCK_TTL = int(os.environ.get('RATE_LIMIT_BLOCK_TTL', 24 * 3600))
+    # With REDIS_URL, limits and blocks are counted once per deployment instead of per worker
+    RATE_LIMIT_SHARED = os.environ.get('RATE_LIMIT_SHARED', 'true').lower() == 'true'
+    # Address/CIDR blocklist: comma-separated feed files (one entry per line, DROP style accepted)
+    BLOCKLIST_FEEDS = os.environ.get('BLOCKLIST_FEEDS', '')
+    # Feed entries expire after this many seconds; unchanged feeds are re-read before then (None: no expiry)
+    BLOCKLIST_FEED_TTL = int(os.environ.get('BLOCKLIST_FEED_TTL', 0)) or None
+    BLOCKLIST_REFRESH_INTERVAL = int(os.environ.get('BLOCKLIST_REFRESH_INTERVAL', 300))  # feed files re-read when changed
+    BLOCKLIST_MAX_ENTRIES = int(os.environ.get('BLOCKLIST_MAX_ENTRIES', 1000000))
+    BLOCKLIST_SYNC_INTERVAL = int(os.environ.get('BLOCKLIST_SYNC_INTERVAL', 5))  # /admin/blocklist changes reach other workers
+
     # Admin Configuration
     ADMIN_SECRET_KEY = os.environ.get('ADMIN_SECRET_KEY')
     
@@ -53,6 +150,7 @@ class TestingConfig(Config):
     TESTING = True
     DATABASE_URL = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    REDIS_URL = 'memory://'
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,170 @@
+import asyncio
+import ipaddress
+import socket
+import threading
+import weakref
+
+from cache import MemoryCache, MISS
+
+# dnspython is imported on the first query; None until then, False when it is not installed
+dns = None
+
+def _load_dnspython():
+    global dns
+    if dns is None:
+        try:
+            import dns.asyncresolver
+            import dns.resolver
+            import dns.reversename
+        except ImportError:  # Falls back to the system resolver in a thread
+            dns = False
+    return dns
+
+class ReverseResolver:
+    """Asynchronous PTR resolver with TTL-honoring positive and negative caches
+
+    Queries run on a private event loop thread; lookup() is the blocking entry
+    point for WSGI code and never waits longer than the timeout.
+    """
+
+    def __init__(self, nameservers=None, timeout=2.0, negative_ttl=300, error_ttl=30,
+                 system_ttl=3600, max_entries=10000, concurrency=50):
+        self.timeout = timeout
+        self.system_ttl = system_ttl  # system resolver answers carry no TTL
+        self.negative_ttl = negative_ttl
+        self.error_ttl = error_ttl
+        self.concurrency = concurrency
+        self._cache = MemoryCache(max_entries=max_entries)
+        self._loop_state = weakref.WeakKeyDictionary()  # event loop -> (semaphore, in-flight futures)
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+        self.nameservers = nameservers
+        self._resolver = None
+        self._resolver_ready = False
+
+    def _get_resolver(self):
+        """dnspython resolver, configured on first use; None means use the system resolver"""
+        if not self._resolver_ready:
+            with self._loop_lock:
+                if not self._resolver_ready:
+                    if _load_dnspython():
+                        try:
+                            resolver = dns.asyncresolver.Resolver(configure=not self.nameservers)
+                            if self.nameservers:
+                                resolver.nameservers = list(self.nameservers)
+                            resolver.lifetime = self.timeout
+                            self._resolver = resolver
+                        except Exception as e:
+                            print(f"⚠️  DNS resolver configuration failed, using system resolver: {e}")
+                    self._resolver_ready = True
+        return self._resolver
+
+    def _ensure_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='dns-resolver', daemon=True).start()
+            return self._loop
+
+    async def _query(self, ip):
+        """Resolve one PTR, returning (hostname or None, ttl to cache it for)"""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            address = None
+
+        resolver = self._get_resolver()
+        if resolver is None or address is None:
+            loop = asyncio.get_running_loop()
+            try:
+                hostname = await asyncio.wait_for(
+                    loop.run_in_executor(None, socket.gethostbyaddr, ip), self.timeout
+                )
+                return hostname[0], self.system_ttl
+            except (socket.herror, socket.gaierror):
+                return None, self.negative_ttl
+            except Exception:
+                return None, self.error_ttl
+
+        try:
+            answer = await resolver.resolve(dns.reversename.from_address(str(address)), 'PTR')
+            return str(answer[0]).rstrip('.'), answer.rrset.ttl
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return None, self.negative_ttl
+        except Exception:
+            # Timeouts and server failures are retried sooner than real negative answers
+            return None, self.error_ttl
+
+    async def resolve(self, ip):
+        """PTR hostname for ip (None when there is none), served from cache when fresh"""
+        cached = self._cache.get(ip)
+        if cached is not MISS:
+            return cached
+
+        # Asyncio primitives are bound to a loop, so each loop gets its own
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            state = self._loop_state[loop] = (asyncio.Semaphore(self.concurrency), {})
+        semaphore, inflight = state
+
+        # Concurrent callers for the same address share one query
+        shared = inflight.get(ip)
+        if shared is not None:
+            return await asyncio.shield(shared)
+
+        future = inflight[ip] = loop.create_future()
+        hostname = None
+        try:
+            async with semaphore:
+                hostname, ttl = await self._query(ip)
+            self._cache.set(ip, hostname, ttl)
+            return hostname
+        finally:
+            del inflight[ip]
+            future.set_result(hostname)
+
+    async def resolve_many(self, ips):
+        """Resolve a batch concurrently, returning {ip: hostname or None}"""
+        ips = list(dict.fromkeys(ips))
+        results = await asyncio.gather(*(self.resolve(ip) for ip in ips), return_exceptions=True)
+        return {ip: (None if isinstance(result, BaseException) else result) for ip, result in zip(ips, results)}
+
+    def lookup(self, ip):
+        """Blocking lookup bounded by the resolver timeout"""
+        cached = self._cache.get(ip)
+        if cached is not MISS:
+            return cached
+        future = asyncio.run_coroutine_threadsafe(self.resolve(ip), self._ensure_loop())
+        try:
+            return future.result(timeout=self.timeout + 0.5)
+        except Exception:
+            future.cancel()
+            return None
+
+    def prefetch(self, ips):
+        """Warm the cache for a batch without waiting for the answers"""
+        asyncio.run_coroutine_threadsafe(self.resolve_many(ips), self._ensure_loop())
+
+    def stats(self):
+        stats = self._cache.stats()
+        if not self._resolver_ready:
+            stats['backend'] = 'not_started'
+        else:
+            stats['backend'] = 'dnspython' if self._resolver is not None else 'system'
+        return stats
+
+# Global resolver instance
+reverse_resolver = None
+
+def init_resolver(config):
+    """Initialize the global reverse DNS resolver"""
+    global reverse_resolver
+    nameservers = [ns.strip() for ns in (config.get('DNS_NAMESERVERS') or '').split(',') if ns.strip()]
+    reverse_resolver = ReverseResolver(
+        nameservers=nameservers or None,
+        timeout=config.get('DNS_TIMEOUT', 2.0),
+        negative_ttl=config.get('DNS_NEGATIVE_TTL', 300)
+    )
+    return reverse_resolver
@@ -1,11 +1,20 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
 from datetime import datetime, timezone
 import json
 import os
 from flask import request
 import uuid
 import hashlib
+import threading
+
+# firebase_admin dominates import time; it is loaded only once Firebase is configured
+firebase_admin = credentials = firestore = None
+
+def _load_sdk():
+    global firebase_admin, credentials, firestore
+    if firebase_admin is None:
+        import firebase_admin as sdk
+        from firebase_admin import credentials as sdk_credentials, firestore as sdk_firestore
+        firebase_admin, credentials, firestore = sdk, sdk_credentials, sdk_firestore
 
 class FirebaseService:
     def __init__(self, config):
@@ -35,6 +44,8 @@ class FirebaseService:
                 print("⚠️  FIREBASE_PROJECT_ID not configured - running without analytics")
                 return
             
+            _load_sdk()
+            
             # Prevent duplicate initialization
             if not firebase_admin._apps:
                 # Check for service account file
@@ -351,10 +362,21 @@ class FirebaseService:
 
 # Global Firebase service instance
 firebase_service = None
+_firebase_config = None
+_firebase_attempted = False
+_firebase_lock = threading.Lock()
+
+def init_firebase(config, lazy=False):
+    """Initialize Firebase service with configuration (deferred to first use when lazy)"""
+    global _firebase_config
+    _firebase_config = config
+    if lazy:
+        return None
+    return _create_firebase_service(config)
 
-def init_firebase(config):
-    """Initialize Firebase service with configuration"""
-    global firebase_service
+def _create_firebase_service(config):
+    global firebase_service, _firebase_attempted
+    _firebase_attempted = True
     try:
         firebase_service = FirebaseService(config)
         print("🚀 Firebase service initialization completed")
@@ -364,5 +386,9 @@ def init_firebase(config):
         return None
 
 def get_firebase_service():
-    """Get the global Firebase service instance"""
-    return firebase_service
\ No newline at end of file
+    """Get the global Firebase service instance, creating it on first use"""
+    if not _firebase_attempted and _firebase_config is not None:
+        with _firebase_lock:
+            if not _firebase_attempted:
+                _create_firebase_service(_firebase_config)
+    return firebase_service
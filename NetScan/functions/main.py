@@ -4,6 +4,9 @@ import sys
 # Add parent directory to path to import our modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Cold starts: services initialize on first use (see config.LAZY_INIT)
+os.environ.setdefault('LAZY_INIT', 'true')
+
 from app import app
 
 # This is the entry point for Firebase Functions
@@ -0,0 +1,198 @@
+"""Offline geolocation database compiled from a CSV of IP ranges.
+
+Usage:
+    python geo_db.py ranges.csv data/geo.db
+
+CSV header: start_ip,end_ip (or network),country_code,country_name,region,city,
+latitude,longitude,timezone,asn,organization - only the range columns are required.
+"""
+import csv
+import ipaddress
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b'NSGEODB1'
+HEADER = struct.Struct('<8sII')  # magic, range count, record count
+RANGE = struct.Struct('<16s16sI')  # start key, end key, record index
+OFFSET = struct.Struct('<I')
+SEPARATOR = '\x1f'
+
+FIELDS = (
+    'country_code', 'country_name', 'region', 'city',
+    'latitude', 'longitude', 'timezone', 'asn', 'organization'
+)
+FLOAT_FIELDS = ('latitude', 'longitude')
+
+def _key(address):
+    """16-byte sortable key; IPv4 is mapped into ::ffff:0:0/96 so both families share one table"""
+    if address.version == 4:
+        return (0xFFFF00000000 | int(address)).to_bytes(16, 'big')
+    return int(address).to_bytes(16, 'big')
+
+def _row_range(row):
+    if row.get('network'):
+        network = ipaddress.ip_network(row['network'].strip(), strict=False)
+        return _key(network.network_address), _key(network.broadcast_address)
+    start = ipaddress.ip_address(row['start_ip'].strip())
+    end = ipaddress.ip_address(row['end_ip'].strip())
+    if start.version != end.version or int(end) < int(start):
+        raise ValueError(f"invalid range {start} - {end}")
+    return _key(start), _key(end)
+
+def _flatten(ranges):
+    """Split overlapping (start, end, record) ranges so the innermost one wins where they overlap
+
+    Lookups only look at the last range starting at or before an address, so
+    nested ranges (a /8 with a /24 inside) are cut around the inner ones and
+    the outer record resumes after them; for equal ranges the later row wins.
+    """
+    flat = []
+
+    def emit(start, end, index):
+        if flat and flat[-1][2] == index and flat[-1][1] + 1 == start:
+            flat[-1] = (flat[-1][0], end, index)
+        else:
+            flat.append((start, end, index))
+
+    stack = []  # open (end, record) ranges, innermost last
+    position = 0  # first key not yet emitted
+    items = sorted(
+        ((int.from_bytes(start, 'big'), int.from_bytes(end, 'big'), index) for start, end, index in ranges),
+        key=lambda item: (item[0], -item[1])
+    )
+    for start, end, index in items + [(1 << 128, 1 << 128, None)]:
+        while stack:
+            top_end, top_index = stack[-1]
+            if top_end >= start:
+                if position < start:
+                    emit(position, start - 1, top_index)
+                break
+            if position <= top_end:
+                emit(position, top_end, top_index)
+                position = top_end + 1
+            stack.pop()
+        stack.append((end, index))
+        position = start
+    return [(start.to_bytes(16, 'big'), end.to_bytes(16, 'big'), index) for start, end, index in flat]
+
+def compile_geo_csv(csv_path, output_path):
+    """Compile a CSV of IP ranges into the sorted binary format, returning the range count"""
+    ranges = []
+    records = {}
+    skipped = 0
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            try:
+                start, end = _row_range(row)
+            except (KeyError, ValueError, AttributeError):
+                skipped += 1
+                continue
+            record = SEPARATOR.join((row.get(field) or '').strip() for field in FIELDS)
+            ranges.append((start, end, records.setdefault(record, len(records))))
+
+    ranges = _flatten(ranges)
+    blobs = [record.encode('utf-8') for record in records]  # dicts keep insertion order = index order
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(ranges), len(blobs)))
+        for start, end, index in ranges:
+            f.write(RANGE.pack(start, end, index))
+        offset = 0
+        for blob in blobs:
+            f.write(OFFSET.pack(offset))
+            offset += len(blob)
+        f.write(OFFSET.pack(offset))
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, output_path)
+
+    print(f"🗺️  Compiled {len(ranges)} ranges ({len(blobs)} unique records, {skipped} skipped) into {output_path}")
+    return len(ranges)
+
+class GeoDatabase:
+    """Memory-mapped reader answering lookups by binary search over range starts"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.range_count, self.record_count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a NetScan geo database")
+        self._ranges_at = HEADER.size
+        self._offsets_at = self._ranges_at + self.range_count * RANGE.size
+        self._blobs_at = self._offsets_at + (self.record_count + 1) * OFFSET.size
+
+    def _record(self, index):
+        start, end = struct.unpack_from('<II', self._mm, self._offsets_at + index * OFFSET.size)
+        values = self._mm[self._blobs_at + start:self._blobs_at + end].decode('utf-8').split(SEPARATOR)
+        record = {}
+        for field, value in zip(FIELDS, values):
+            if not value:
+                record[field] = None
+            elif field in FLOAT_FIELDS:
+                record[field] = float(value)
+            else:
+                record[field] = value
+        return record
+
+    def lookup(self, ip):
+        """Record for the range containing ip, or None"""
+        try:
+            key = _key(ipaddress.ip_address(ip))
+        except ValueError:
+            return None
+
+        mm, base, size = self._mm, self._ranges_at, RANGE.size
+        lo, hi = 0, self.range_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            position = base + mid * size
+            if mm[position:position + 16] <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+
+        _, end, index = RANGE.unpack_from(mm, base + (lo - 1) * size)
+        if key > end:
+            return None
+        return self._record(index)
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'ranges': self.range_count,
+            'records': self.record_count,
+            'bytes': len(self._mm)
+        }
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+def open_geo_database(path):
+    """Open the compiled database if configured and present, else None"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        database = GeoDatabase(path)
+        print(f"🗺️  Local geo database loaded: {database.range_count} ranges")
+        return database
+    except Exception as e:
+        print(f"⚠️  Could not open local geo database {path}: {e}")
+        return None
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    compile_geo_csv(sys.argv[1], sys.argv[2])
@@ -0,0 +1,211 @@
+import asyncio
+import functools
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Deadline and worst-case attempt time of the request running on this thread, read by BudgetRetry
+_budget = threading.local()
+
+class BudgetRetry(Retry):
+    """Retry that gives up once another attempt and its backoff would overrun the request's time budget"""
+
+    def increment(self, *args, **kwargs):
+        retry = super().increment(*args, **kwargs)
+        deadline = getattr(_budget, 'deadline', None)
+        if deadline is not None and time.monotonic() + retry.get_backoff_time() + _budget.attempt > deadline:
+            # Out of time: fail (or hand back the response) exactly like an exhausted retry
+            return self.new(total=0).increment(*args, **kwargs)
+        return retry
+
+# httpx is only needed by the ASGI client; imported when one is created, False if not installed
+httpx = None
+
+def _load_httpx():
+    global httpx
+    if httpx is None:
+        try:
+            import httpx
+        except ImportError:  # ASGI mode then runs upstream calls on the pooled client in threads
+            httpx = False
+    return httpx
+
+class PooledHTTPClient:
+    """Shared keep-alive HTTP client with per-host connection pools and bounded retries
+
+    `request_budget` caps one call, retries included: the read timeout is cut
+    to fit it and a retry is only made while a whole attempt still fits, so a
+    stage thread is free again before the analysis deadline. Timed-out reads
+    are not retried.
+    """
+
+    def __init__(self, pool_connections=20, pool_maxsize=10, retries=2, backoff_factor=0.3,
+                 connect_timeout=3.05, read_timeout=10, request_budget=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.request_budget = request_budget
+
+        retry = BudgetRetry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),  # 429 is left to the caller (quota, not a glitch)
+            allowed_methods=frozenset({'GET', 'POST'}),
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        self.session = requests.Session()
+        # Upstream APIs are stateless; refusing cookies keeps the shared session thread-safe
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.session.headers['User-Agent'] = 'NetScanPro/1.0'
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_latency = 0.0
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """Send a request through the pool; timeout is the read timeout in seconds"""
+        start = time.perf_counter()
+        read_timeout = timeout or self.read_timeout
+        if self.request_budget:
+            read_timeout = max(0.1, min(read_timeout, self.request_budget - self.connect_timeout))
+            _budget.deadline = time.monotonic() + self.request_budget
+            _budget.attempt = self.connect_timeout + read_timeout
+        try:
+            return self.session.request(method, url, timeout=(self.connect_timeout, read_timeout), **kwargs)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            _budget.deadline = None
+            with self._lock:
+                self.requests += 1
+                self.total_latency += time.perf_counter() - start
+
+    def get(self, url, timeout=None, **kwargs):
+        return self.request('GET', url, timeout=timeout, **kwargs)
+
+    def post(self, url, timeout=None, **kwargs):
+        return self.request('POST', url, timeout=timeout, **kwargs)
+
+    def stats(self):
+        pools = self.adapter.poolmanager.pools
+        keys = pools.keys()  # the container only supports locked snapshots, not iteration
+        connections = sum(getattr(pools.get(key), 'num_connections', 0) for key in keys)
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'avg_latency_ms': round(self.total_latency / self.requests * 1000, 1) if self.requests else None,
+                'host_pools': len(keys),
+                'connections_opened': connections,
+                'connection_reuse_ratio': round(1 - connections / self.requests, 3) if self.requests else None
+            }
+
+    def close(self):
+        self.session.close()
+
+class AsyncPooledHTTPClient:
+    """Event-loop HTTP client for the ASGI pipeline: one keep-alive pool for every in-flight lookup
+
+    Uses httpx when installed; otherwise requests go through the blocking
+    `fallback` client in the loop's default executor.
+    """
+
+    def __init__(self, max_connections=200, max_keepalive=50, retries=2,
+                 connect_timeout=3.05, read_timeout=10, fallback=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.fallback = fallback
+        self._client = None
+        if _load_httpx():
+            limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+            self._client = httpx.AsyncClient(
+                # Transport retries cover connection failures only; status retries stay with the caller
+                transport=httpx.AsyncHTTPTransport(retries=retries, limits=limits),
+                headers={'User-Agent': 'NetScanPro/1.0'}
+            )
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_latency = 0.0
+
+    async def request(self, method, url, timeout=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            if self._client is None:
+                call = functools.partial(self.fallback.request, method, url, timeout=timeout, **kwargs)
+                return await asyncio.get_running_loop().run_in_executor(None, call)
+            return await self._client.request(
+                method, url, timeout=httpx.Timeout(timeout or self.read_timeout, connect=self.connect_timeout), **kwargs
+            )
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.requests += 1
+                self.total_latency += time.perf_counter() - start
+
+    async def get(self, url, timeout=None, **kwargs):
+        return await self.request('GET', url, timeout=timeout, **kwargs)
+
+    async def post(self, url, timeout=None, **kwargs):
+        return await self.request('POST', url, timeout=timeout, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'httpx' if self._client is not None else 'threaded',
+                'requests': self.requests,
+                'errors': self.errors,
+                'avg_latency_ms': round(self.total_latency / self.requests * 1000, 1) if self.requests else None
+            }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+# Global client instances
+http_client = None
+async_http_client = None
+
+def init_http_client(config):
+    """Initialize the global pooled HTTP client"""
+    global http_client
+    http_client = PooledHTTPClient(
+        pool_maxsize=config.get('HTTP_POOL_MAXSIZE', 10),
+        retries=config.get('HTTP_RETRIES', 2),
+        backoff_factor=config.get('HTTP_BACKOFF_FACTOR', 0.3),
+        connect_timeout=config.get('HTTP_CONNECT_TIMEOUT', 3.05),
+        request_budget=config.get('HTTP_REQUEST_BUDGET', 7)
+    )
+    return http_client
+
+def init_async_http_client(config, fallback=None):
+    """Initialize the global event-loop HTTP client used in ASGI mode"""
+    global async_http_client
+    async_http_client = AsyncPooledHTTPClient(
+        max_connections=config.get('ASYNC_MAX_CONNECTIONS', 200),
+        retries=config.get('HTTP_RETRIES', 2),
+        connect_timeout=config.get('HTTP_CONNECT_TIMEOUT', 3.05),
+        fallback=fallback or http_client
+    )
+    return async_http_client
+
+def get_async_http_client():
+    """Get the global event-loop HTTP client"""
+    return async_http_client
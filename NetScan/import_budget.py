@@ -0,0 +1,65 @@
+"""Import-time report for the Cloud Functions entry point.
+
+Imports the module in a fresh interpreter under `python -X importtime` with
+LAZY_INIT=true, prints the most expensive modules (cumulative, including
+their own imports) and fails when the total exceeds the budget.
+
+Usage:
+    python import_budget.py                  # functions/main.py, 400 ms budget
+    python import_budget.py app 350          # another module / budget in ms
+"""
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODULE = 'main'
+DEFAULT_BUDGET_MS = 400
+RUNS = 3
+TOP = 20
+
+def measure(module):
+    """One cold import: [(module, self_us, cumulative_us, depth)] in import order"""
+    workdir = os.path.join(BASE_DIR, 'functions') if module == 'main' else BASE_DIR
+    env = dict(os.environ, LAZY_INIT='true')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def report(module, budget_ms):
+    # The fastest of a few runs, so disk cache and scheduling noise do not fail the budget
+    runs = [measure(module) for _ in range(RUNS)]
+    rows = min(runs, key=lambda rows: sum(row[2] for row in rows if row[3] == 0))
+    total_ms = sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+
+    print(f"Import time for '{module}' (LAZY_INIT=true, best of {RUNS})")
+    print(f"  {'module':<40} {'self ms':>9} {'cumul ms':>9}")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: row[2], reverse=True)[:TOP]:
+        print(f"  {name:<40} {self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}")
+    print(f"  {'total':<40} {'':>9} {total_ms:9.1f}")
+
+    if total_ms > budget_ms:
+        print(f"❌ Import time {total_ms:.0f} ms exceeds the {budget_ms} ms budget")
+        return False
+    print(f"✅ Import time {total_ms:.0f} ms within the {budget_ms} ms budget")
+    return True
+
+if __name__ == '__main__':
+    if len(sys.argv) > 3:
+        print(__doc__)
+        sys.exit(1)
+    module = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MODULE
+    budget_ms = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BUDGET_MS
+    sys.exit(0 if report(module, budget_ms) else 1)
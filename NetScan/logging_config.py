@@ -14,7 +14,8 @@ def setup_logging(app):
     app_handler = RotatingFileHandler(
         'logs/netscan.log', 
         maxBytes=10240000,  # 10MB
-        backupCount=5
+        backupCount=5,
+        delay=True  # open the file on the first record, not at import
     )
     app_handler.setLevel(logging.INFO)
     app_formatter = logging.Formatter(
@@ -26,7 +27,8 @@ def setup_logging(app):
     error_handler = RotatingFileHandler(
         'logs/errors.log',
         maxBytes=10240000,  # 10MB
-        backupCount=5
+        backupCount=5,
+        delay=True
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(app_formatter)
@@ -35,7 +37,8 @@ def setup_logging(app):
     security_handler = RotatingFileHandler(
         'logs/security.log',
         maxBytes=10240000,  # 10MB
-        backupCount=10
+        backupCount=10,
+        delay=True
     )
     security_handler.setLevel(logging.WARNING)
     security_formatter = logging.Formatter(
@@ -47,7 +50,8 @@ def setup_logging(app):
     analytics_handler = RotatingFileHandler(
         'logs/analytics.log',
         maxBytes=10240000,  # 10MB
-        backupCount=30  # Keep more analytics data
+        backupCount=30,  # Keep more analytics data
+        delay=True
     )
     analytics_handler.setLevel(logging.INFO)
     analytics_formatter = logging.Formatter(
@@ -0,0 +1,214 @@
+import ipaddress
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+_BITS = {4: 32, 6: 128}
+
+def parse_address(text):
+    """(version, integer) for an address string; inet_pton is several times faster than ipaddress"""
+    try:
+        if ':' in text:
+            return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, text), 'big')
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), 'big')
+    except (OSError, TypeError):
+        raise ValueError(f"invalid IP address: {text!r}")
+
+class PrefixIndex:
+    """Longest-prefix-match index over IPv4/IPv6 networks with per-entry TTLs
+
+    Entries live in one hash table per (IP version, prefix length), keyed by the
+    network bits, so a lookup costs one dict probe per distinct prefix length
+    present instead of a bit-by-bit trie walk.
+    """
+
+    def __init__(self, max_entries=None, default_ttl=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._tables = {4: {}, 6: {}}  # version -> {prefixlen: {network_bits: (expires_at, value)}}
+        self._lengths = {4: (), 6: ()}  # prefix lengths present, longest first
+        self._order = OrderedDict()  # (version, prefixlen, network_bits) -> None, oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._order)
+
+    @staticmethod
+    def _parse_network(network):
+        """(version, prefixlen, network bits); host bits are ignored like ip_network(strict=False)"""
+        if isinstance(network, str):
+            address, _, length = network.strip().partition('/')
+            version, value = parse_address(address)
+            prefixlen = int(length) if length else _BITS[version]
+            if not 0 <= prefixlen <= _BITS[version]:
+                raise ValueError(f"invalid prefix length: {network!r}")
+            return version, prefixlen, value >> (_BITS[version] - prefixlen)
+        if not isinstance(network, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+            network = ipaddress.ip_network(network, strict=False)
+        return network.version, network.prefixlen, int(network.network_address) >> (_BITS[network.version] - network.prefixlen)
+
+    def _refresh_lengths(self, version):
+        self._lengths[version] = tuple(sorted(
+            (length for length, table in self._tables[version].items() if table), reverse=True
+        ))
+
+    def _store(self, version, prefixlen, bits, value, expires_at):
+        table = self._tables[version].get(prefixlen)
+        if table is None:
+            table = self._tables[version][prefixlen] = {}
+        is_new_length = not table
+        table[bits] = (expires_at, value)
+        self._order[(version, prefixlen, bits)] = None
+        self._order.move_to_end((version, prefixlen, bits))
+        if is_new_length:
+            self._refresh_lengths(version)
+
+    def _discard(self, version, prefixlen, bits):
+        table = self._tables[version].get(prefixlen)
+        if table is None or table.pop(bits, None) is None:
+            return False
+        self._order.pop((version, prefixlen, bits), None)
+        if not table:
+            self._refresh_lengths(version)
+        return True
+
+    def insert(self, network, value, ttl=None):
+        """Insert or replace a network; ttl=None falls back to default_ttl (None means no expiry)"""
+        version, prefixlen, bits = self._parse_network(network)
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._store(version, prefixlen, bits, value, expires_at)
+            if self.max_entries and len(self._order) > self.max_entries:
+                self._evict()
+
+    def insert_many(self, entries, ttl=None):
+        """Bulk insert (network, value) pairs under a single lock, skipping malformed networks
+
+        An entry may carry its own TTL as a third item, (network, value, ttl).
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        default_expires_at = now + ttl if ttl else None
+        inserted = 0
+        touched = set()
+        with self._lock:
+            for entry in entries:
+                try:
+                    version, prefixlen, bits = self._parse_network(entry[0])
+                except ValueError:
+                    continue
+                value = entry[1]
+                expires_at = default_expires_at
+                if len(entry) > 2 and entry[2] is not None:
+                    expires_at = now + entry[2] if entry[2] else None
+                table = self._tables[version].get(prefixlen)
+                if table is None:
+                    table = self._tables[version][prefixlen] = {}
+                if not table:  # tables emptied by removals stay behind without their length
+                    touched.add(version)
+                table[bits] = (expires_at, value)
+                key = (version, prefixlen, bits)
+                self._order[key] = None
+                self._order.move_to_end(key)  # a re-inserted network is the newest, as in _store
+                inserted += 1
+            for version in touched:
+                self._refresh_lengths(version)
+            if self.max_entries and len(self._order) > self.max_entries:
+                self._evict()
+        return inserted
+
+    def _evict(self):
+        # Oldest insertions go first; expired entries are reclaimed by purge_expired()
+        while len(self._order) > self.max_entries:
+            (version, prefixlen, bits), _ = self._order.popitem(last=False)
+            table = self._tables[version].get(prefixlen)
+            if table is not None:
+                table.pop(bits, None)
+                if not table:
+                    self._refresh_lengths(version)
+            self.evictions += 1
+
+    def remove(self, network):
+        version, prefixlen, bits = self._parse_network(network)
+        with self._lock:
+            return self._discard(version, prefixlen, bits)
+
+    def _match(self, ip):
+        try:
+            if isinstance(ip, str):
+                version, value_bits = parse_address(ip)
+            else:
+                address = ip if isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)) else ipaddress.ip_address(ip)
+                version, value_bits = address.version, int(address)
+        except ValueError:
+            return None
+
+        shift_base = _BITS[version]
+        tables = self._tables[version]
+        now = None
+        for prefixlen in self._lengths[version]:
+            entry = tables.get(prefixlen, {}).get(value_bits >> (shift_base - prefixlen))
+            if entry is None:
+                continue
+            expires_at, value = entry
+            if expires_at is not None:
+                now = now or time.time()
+                if expires_at <= now:
+                    continue
+            self.hits += 1
+            return version, prefixlen, value_bits >> (shift_base - prefixlen), value
+        self.misses += 1
+        return None
+
+    def lookup(self, ip):
+        """Value of the longest non-expired prefix containing ip, or None"""
+        match = self._match(ip)
+        return match[3] if match else None
+
+    def lookup_prefix(self, ip):
+        """(network, value) of the longest non-expired prefix containing ip, or None"""
+        match = self._match(ip)
+        if not match:
+            return None
+        version, prefixlen, bits, value = match
+        network_class = ipaddress.IPv4Network if version == 4 else ipaddress.IPv6Network
+        return network_class((bits << (_BITS[version] - prefixlen), prefixlen)), value
+
+    def purge_expired(self, locked=False):
+        """Drop expired entries, returning how many were removed"""
+        if not locked:
+            with self._lock:
+                return self.purge_expired(locked=True)
+
+        now = time.time()
+        expired = [
+            (version, prefixlen, bits)
+            for version, lengths in self._tables.items()
+            for prefixlen, table in lengths.items()
+            for bits, (expires_at, _) in table.items()
+            if expires_at is not None and expires_at <= now
+        ]
+        for version, prefixlen, bits in expired:
+            self._discard(version, prefixlen, bits)
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._tables = {4: {}, 6: {}}
+            self._lengths = {4: (), 6: ()}
+            self._order.clear()
+
+    def stats(self):
+        return {
+            'entries': len(self._order),
+            'max_entries': self.max_entries,
+            'prefix_lengths': {version: list(lengths) for version, lengths in self._lengths.items()},
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,380 @@
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class TokenBucket:
+    """Non-blocking token bucket: `limit` requests per `period` seconds, bursting up to `burst`"""
+
+    def __init__(self, limit, period, burst=None):
+        self.rate = limit / float(period)
+        self.capacity = float(burst or limit)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, now=None):
+        now = now or time.monotonic()
+        if now < self.paused_until:
+            return False
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def drain(self, seconds, now=None):
+        """Provider reported its quota exhausted: hold all requests for `seconds`"""
+        now = now or time.monotonic()
+        self.tokens = 0.0
+        self.updated = now
+        self.paused_until = max(self.paused_until, now + seconds)
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures; one half-open probe decides recovery"""
+
+    def __init__(self, failure_threshold=3, recovery_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_until = 0.0
+        self.probe_in_flight = False
+        self.trips = 0
+
+    def allow(self, now=None):
+        now = now or time.monotonic()
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and now >= self.opened_until:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def release(self):
+        """The permitted call never went out; let another caller probe"""
+        self.probe_in_flight = False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self, open_for=None, now=None):
+        """Count a failure; open_for forces the circuit open (e.g. on HTTP 429)"""
+        now = now or time.monotonic()
+        self.failures += 1
+        self.probe_in_flight = False
+        if open_for is not None or self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.trips += 1
+            self.state = OPEN
+            self.opened_until = now + max(open_for or 0, self.recovery_timeout)
+
+class LatencyWindow:
+    """Rolling window of recent call outcomes for one provider"""
+
+    def __init__(self, size=100):
+        self.samples = deque(maxlen=size)  # (seconds, succeeded)
+        self.updated = 0.0
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, seconds, succeeded):
+        self.samples.append((seconds, succeeded))
+        self.updated = time.monotonic()
+
+    def percentile(self, q):
+        """Latency percentile of successful calls (q in 0..1), or None without samples"""
+        latencies = sorted(seconds for seconds, succeeded in self.samples if succeeded)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def success_rate(self):
+        if not self.samples:
+            return None
+        return sum(1 for _, succeeded in self.samples if succeeded) / len(self.samples)
+
+# Deployment-wide quota buckets in the shared (Redis) tier, timed by the Redis clock.
+# KEYS: bucket hash, pause key; ARGV: tokens per second, capacity
+TAKE_TOKEN_SCRIPT = """
+if redis.call('exists', KEYS[2]) == 1 then return 0 end
+local rate, capacity = tonumber(ARGV[1]), tonumber(ARGV[2])
+local clock = redis.call('time')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('hmget', KEYS[1], 't', 'u')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local taken = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    taken = 1
+end
+redis.call('hset', KEYS[1], 't', tostring(tokens), 'u', tostring(now))
+redis.call('expire', KEYS[1], math.ceil(capacity / rate) + 1)
+return taken
+"""
+
+# The provider reported its quota exhausted: empty the bucket and hold every worker.
+# KEYS: bucket hash, pause key; ARGV: pause in milliseconds
+DRAIN_SCRIPT = """
+local clock = redis.call('time')
+redis.call('hset', KEYS[1], 't', '0', 'u', tostring(tonumber(clock[1]) + tonumber(clock[2]) / 1000000))
+redis.call('set', KEYS[2], '1', 'PX', ARGV[1])
+return 1
+"""
+
+def retry_after(headers):
+    """Seconds until the provider accepts requests again, from standard or ip-api headers"""
+    if not headers:
+        return None
+    for header in ('Retry-After', 'X-Ttl'):
+        value = headers.get(header)
+        if value and str(value).isdigit():
+            return int(value)
+    return None
+
+class ProviderScheduler:
+    """Per-provider quota buckets and circuit breakers deciding whether a call may go out
+
+    Quotas are per deployment. With a shared tier that runs scripts (Redis),
+    every worker takes tokens from one bucket per provider; otherwise, and
+    while the shared tier is failing, each worker keeps to 1/`workers` of the
+    quota. Circuit breakers and latency samples stay per worker.
+    """
+
+    def __init__(self, quotas=None, failure_threshold=3, recovery_timeout=30,
+                 latency_window=100, min_samples=5, default_hedge_delay=1.0, min_hedge_delay=0.05,
+                 resample_interval=60, shared=None, workers=1, namespace='netscan:quota:'):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.latency_window = latency_window
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.resample_interval = resample_interval
+        self.workers = max(1, workers)
+        self.namespace = namespace
+        self.shared = shared if hasattr(shared, 'register_script') else None
+        self._take_script = self._drain_script = None
+        if self.shared is not None:
+            self._take_script = self.shared.register_script(TAKE_TOKEN_SCRIPT)
+            self._drain_script = self.shared.register_script(DRAIN_SCRIPT)
+        self.shared_errors = 0
+        self._shared_failing = False
+        self._lock = threading.Lock()
+        self._providers = {}
+        for name, quota in (quotas or {}).items():
+            self.register(name, *quota)
+
+    def register(self, name, limit, period, burst=None):
+        burst = burst or limit
+        with self._lock:
+            self._providers[name] = {
+                'quota': (limit / float(period), float(burst)),
+                # This worker's share, used without a working shared tier
+                'bucket': TokenBucket(limit / self.workers, period, max(1.0, burst / self.workers)),
+                'breaker': CircuitBreaker(self.failure_threshold, self.recovery_timeout),
+                'latency': LatencyWindow(self.latency_window),
+                'allowed': 0,
+                'skipped_quota': 0,
+                'skipped_open': 0,
+                'throttled': 0,
+                'wins': 0,
+                'hedged_wins': 0
+            }
+
+    def _shared_keys(self, name):
+        return [f"{self.namespace}bucket:{name}", f"{self.namespace}pause:{name}"]
+
+    def _shared_failed(self, e):
+        self.shared_errors += 1
+        if not self._shared_failing:
+            print(f"⚠️  Shared provider quotas unavailable, using this worker's share: {e}")
+            self._shared_failing = True
+
+    def _take_token(self, name, provider):
+        """A token from the deployment-wide bucket, or from this worker's share of the quota"""
+        if self._take_script is not None:
+            try:
+                taken = int(self._take_script(keys=self._shared_keys(name), args=provider['quota'])) == 1
+                self._shared_failing = False
+                return taken
+            except Exception as e:
+                self._shared_failed(e)
+        with self._lock:
+            return provider['bucket'].try_acquire(time.monotonic())
+
+    def acquire(self, name):
+        """True if a request to `name` may be sent now; never waits (beyond one shared-tier call)"""
+        provider = self._providers.get(name)
+        if provider is None:
+            return True
+        with self._lock:
+            if not provider['breaker'].allow(time.monotonic()):
+                provider['skipped_open'] += 1
+                return False
+        # The shared tier is called outside the lock
+        taken = self._take_token(name, provider)
+        with self._lock:
+            if not taken:
+                provider['breaker'].release()
+                provider['skipped_quota'] += 1
+                return False
+            provider['allowed'] += 1
+            return True
+
+    def _drain(self, name, provider, seconds, now):
+        """Hold `name` for `seconds` in this worker and, with a shared tier, in every worker"""
+        with self._lock:
+            provider['bucket'].drain(seconds, now)
+        if self._drain_script is not None:
+            try:
+                self._drain_script(keys=self._shared_keys(name), args=(int(seconds * 1000),))
+            except Exception as e:
+                self._shared_failed(e)
+
+    def release(self, name):
+        """An acquired call was abandoned before any outcome (e.g. a cancelled hedge)"""
+        provider = self._providers.get(name)
+        if provider is None:
+            return
+        with self._lock:
+            provider['breaker'].release()
+
+    def record(self, name, status, headers=None, latency=None):
+        """Feed back an outcome: status None means timeout/connection error
+
+        401/403 (the provider refuses us) count as failures like 5xx; other
+        4xx answers are about the request, not the provider's health, so they
+        leave the breaker as it was.
+        """
+        provider = self._providers.get(name)
+        if provider is None:
+            return
+        drain_for = None
+        with self._lock:
+            now = time.monotonic()
+            breaker = provider['breaker']
+            if latency is not None:
+                provider['latency'].add(latency, status is not None and status < 400)
+            if status == 429:
+                drain_for = retry_after(headers) or self.recovery_timeout
+                provider['throttled'] += 1
+                breaker.record_failure(open_for=drain_for, now=now)
+            elif status is None or status >= 500 or status in (401, 403):
+                breaker.record_failure(now=now)
+            elif status >= 400:
+                breaker.release()
+            else:
+                breaker.record_success()
+                # ip-api.com announces its remaining quota; stop before it answers 429
+                if headers and headers.get('X-Rl') == '0':
+                    drain_for = retry_after(headers) or self.recovery_timeout
+        if drain_for is not None:
+            self._drain(name, provider, drain_for, now)
+
+    def record_win(self, name, hedged=False):
+        """Count the provider whose answer was used (hedged: it was not the first one asked)"""
+        provider = self._providers.get(name)
+        if provider is None:
+            return
+        with self._lock:
+            provider['wins'] += 1
+            if hedged:
+                provider['hedged_wins'] += 1
+
+    def rank(self, names):
+        """Providers ordered by expected time to a good answer
+
+        Providers with too few or stale samples go first so every one keeps
+        being measured; open circuits and exhausted buckets go last since they
+        would be skipped.
+        """
+        with self._lock:
+            now = time.monotonic()
+
+            def cost(item):
+                index, name = item
+                provider = self._providers.get(name)
+                if provider is None:
+                    return (0, 0.0, index)
+                bucket, window = provider['bucket'], provider['latency']
+                if provider['breaker'].state == OPEN or now < bucket.paused_until:
+                    return (2, 0.0, index)
+                if (len(window) < self.min_samples or now - window.updated > self.resample_interval
+                        or window.percentile(0.5) is None):
+                    return (0, 0.0, index)
+                return (1, window.percentile(0.5) / max(window.success_rate(), 0.05), index)
+
+            return [name for _, name in sorted(enumerate(names), key=cost)]
+
+    def hedge_delay(self, name):
+        """Seconds to wait on a provider before asking the next one: its recent p90"""
+        provider = self._providers.get(name)
+        with self._lock:
+            if provider is None or len(provider['latency']) < self.min_samples:
+                return self.default_hedge_delay
+            p90 = provider['latency'].percentile(0.9)
+        if p90 is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p90)
+
+    def state(self, name):
+        provider = self._providers.get(name)
+        return provider['breaker'].state if provider else CLOSED
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    'state': provider['breaker'].state,
+                    'consecutive_failures': provider['breaker'].failures,
+                    'trips': provider['breaker'].trips,
+                    'quota': 'shared' if self.shared is not None else 'per_worker',
+                    'tokens': round(provider['bucket'].tokens, 2),
+                    'allowed': provider['allowed'],
+                    'skipped_quota': provider['skipped_quota'],
+                    'skipped_open': provider['skipped_open'],
+                    'throttled': provider['throttled'],
+                    'samples': len(provider['latency']),
+                    'p50_ms': _ms(provider['latency'].percentile(0.5)),
+                    'p90_ms': _ms(provider['latency'].percentile(0.9)),
+                    'success_rate': provider['latency'].success_rate(),
+                    'wins': provider['wins'],
+                    'hedged_wins': provider['hedged_wins']
+                }
+                for name, provider in self._providers.items()
+            }
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+# Global scheduler instance
+provider_scheduler = None
+
+def init_scheduler(config, shared=None):
+    """Initialize the global provider scheduler (quotas shared through `shared` when it is Redis)"""
+    global provider_scheduler
+    provider_scheduler = ProviderScheduler(
+        quotas=config.get('PROVIDER_QUOTAS', {}),
+        failure_threshold=config.get('PROVIDER_FAILURE_THRESHOLD', 3),
+        recovery_timeout=config.get('PROVIDER_RECOVERY_TIMEOUT', 30),
+        default_hedge_delay=config.get('GEO_HEDGE_DELAY', 1.0),
+        shared=shared,
+        workers=config.get('PROVIDER_QUOTA_WORKERS', 1)
+    )
+    return provider_scheduler
@@ -0,0 +1,274 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Outcome of a request check
+ALLOWED = 0
+LIMITED = 1
+BLOCKED = 2
+
+# One round trip per request: block check, sliding-window count and blocking
+# of clients rejected more than `limit` times in a window. Windows follow the
+# Redis server clock, so workers on hosts with skewed clocks agree on them
+# (TIME before writes needs script effects replication, the default since Redis 5).
+# KEYS: counter hash, block key; ARGV: limit, window, block ttl
+RATE_LIMIT_SCRIPT = """
+if redis.call('exists', KEYS[2]) == 1 then return 2 end
+local limit, window = tonumber(ARGV[1]), tonumber(ARGV[2])
+local clock = redis.call('time')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local index = math.floor(now / window)
+local state = redis.call('hmget', KEYS[1], 'w', 'c', 'p', 'r')
+local current, previous, rejected = tonumber(state[2]) or 0, tonumber(state[3]) or 0, tonumber(state[4]) or 0
+local last = tonumber(state[1])
+if last ~= index then
+    if last == index - 1 then previous = current else previous = 0 end
+    current, rejected = 0, 0
+end
+local status = 0
+if previous * (1 - (now - index * window) / window) + current >= limit then
+    rejected = rejected + 1
+    status = 1
+    if rejected > limit then redis.call('set', KEYS[2], '1', 'EX', ARGV[3]) end
+else
+    current = current + 1
+end
+redis.call('hset', KEYS[1], 'w', index, 'c', current, 'p', previous, 'r', rejected)
+redis.call('expire', KEYS[1], math.ceil(window * 2))
+return status
+"""
+
+class SlidingWindowLimiter:
+    """Per-client sliding-window counter: O(1) per request, bounded memory
+
+    Each client keeps only two counters (this fixed window and the previous
+    one); the previous window's count is weighted by how much of it still
+    overlaps the sliding window. Clients live in an LRU table capped at
+    `max_clients`, and ones idle for two windows are evicted as they age out.
+    A client's state is packed into one int (window index, rejected,
+    previous, current) so a table entry costs about as much as the key.
+    """
+
+    def __init__(self, limit=100, window=3600, max_clients=100000):
+        self.limit = limit
+        self.window = float(window)
+        self.max_clients = max_clients
+        self._bits = max(16, (limit + 1).bit_length())  # counters never exceed the limit
+        self._mask = (1 << self._bits) - 1
+        self._clients = OrderedDict()  # client -> packed state, see _pack
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def _pack(self, index, rejected, previous, current):
+        bits = self._bits
+        return (((index << bits | min(rejected, self._mask)) << bits | previous) << bits) | current
+
+    def _unpack(self, packed):
+        bits, mask = self._bits, self._mask
+        return packed >> 3 * bits, packed >> 2 * bits & mask, packed >> bits & mask, packed & mask
+
+    def hit(self, client, now=None):
+        """Count a request; returns (allowed, rejected requests of this client in the window)"""
+        now = now or time.time()
+        index, offset = divmod(now, self.window)
+        index = int(index)
+        with self._lock:
+            clients = self._clients
+            packed = clients.get(client)
+            if packed is None:
+                rejected = previous = current = 0
+                self._evict(index)
+            else:
+                clients.move_to_end(client)
+                last, rejected, previous, current = self._unpack(packed)
+                if last != index:
+                    # Roll forward: the current window becomes the previous one, or both expire
+                    previous = current if index - last == 1 else 0
+                    rejected = current = 0
+
+            if previous * (1 - offset / self.window) + current >= self.limit:
+                rejected += 1
+                self.rejected += 1
+                clients[client] = self._pack(index, rejected, previous, current)
+                return False, rejected
+            clients[client] = self._pack(index, rejected, previous, current + 1)
+            self.allowed += 1
+            return True, rejected
+
+    def _evict(self, index):
+        # Makes room for one new client. Least recently seen first; a client last
+        # seen two windows ago has nothing left to count
+        clients = self._clients
+        shift = 3 * self._bits
+        while clients:
+            if len(clients) < self.max_clients and next(iter(clients.values())) >> shift >= index - 1:
+                break
+            clients.popitem(last=False)
+            self.evictions += 1
+
+    def reset(self, client):
+        with self._lock:
+            self._clients.pop(client, None)
+
+    def stats(self):
+        with self._lock:
+            clients = len(self._clients)
+        return {
+            'clients': clients,
+            'max_clients': self.max_clients,
+            'limit': self.limit,
+            'window_seconds': self.window,
+            'allowed': self.allowed,
+            'rejected': self.rejected,
+            'evictions': self.evictions
+        }
+
+class LocalRateLimitState:
+    """Rate limits and blocks kept in this worker's memory
+
+    Expired blocks are swept once per rate-limit window, and at most
+    `max_clients` blocks are kept (the oldest go first), so clients that
+    never come back do not accumulate.
+    """
+
+    def __init__(self, limit=100, window=3600, max_clients=100000, block_ttl=24 * 3600):
+        self.limiter = SlidingWindowLimiter(limit, window, max_clients)
+        self.block_ttl = block_ttl
+        self._blocked = {}  # client -> expires at, oldest block first
+        self._lock = threading.Lock()
+        self._swept_window = None
+
+    @property
+    def limit(self):
+        return self.limiter.limit
+
+    def is_blocked(self, client):
+        expires_at = self._blocked.get(client)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            with self._lock:
+                self._blocked.pop(client, None)
+            return False
+        return True
+
+    def block(self, client, ttl=None):
+        with self._lock:
+            self._blocked.pop(client, None)
+            self._blocked[client] = time.time() + (ttl or self.block_ttl)
+            while len(self._blocked) > self.limiter.max_clients:
+                del self._blocked[next(iter(self._blocked))]
+
+    def _sweep(self, now):
+        with self._lock:
+            self._blocked = {client: expires_at for client, expires_at in self._blocked.items() if expires_at > now}
+
+    def unblock(self, client):
+        with self._lock:
+            self._blocked.pop(client, None)
+
+    def check(self, client):
+        """ALLOWED, LIMITED or BLOCKED for one request from client"""
+        now = time.time()
+        window = int(now // self.limiter.window)
+        if window != self._swept_window:
+            self._swept_window = window
+            self._sweep(now)
+        if self.is_blocked(client):
+            return BLOCKED
+        allowed, rejected = self.limiter.hit(client)
+        if allowed:
+            return ALLOWED
+        # Block clients that keep going well past the limit
+        if rejected > self.limiter.limit:
+            self.block(client)
+        return LIMITED
+
+    def stats(self):
+        stats = self.limiter.stats()
+        stats.update({'backend': 'local', 'blocked': len(self._blocked)})
+        return stats
+
+class SharedRateLimitState:
+    """Rate limits and blocks enforced once per deployment through the shared (Redis) tier
+
+    Each request is one atomic script call (RATE_LIMIT_SCRIPT), so the shared
+    tier must be able to run scripts. If the shared store fails, the worker
+    falls back to its local state until the store answers again; blocks made
+    meanwhile stay in that local state until they expire or are lifted.
+    """
+
+    def __init__(self, shared, limit=100, window=3600, block_ttl=24 * 3600, namespace='netscan:rl:',
+                 fallback=None):
+        self.shared = shared
+        self.limit = limit
+        self.window = window
+        self.block_ttl = block_ttl
+        self.namespace = namespace
+        self.fallback = fallback or LocalRateLimitState(limit, window, block_ttl=block_ttl)
+        self._script = shared.register_script(RATE_LIMIT_SCRIPT)  # EVALSHA, reloaded on NOSCRIPT
+        self.allowed = 0
+        self.rejected = 0
+        self.errors = 0
+        self._failing = False
+
+    def _keys(self, client):
+        return f"{self.namespace}count:{client}", f"{self.namespace}block:{client}"
+
+    def _unavailable(self, e):
+        self.errors += 1
+        if not self._failing:
+            print(f"⚠️  Shared rate limit unavailable, using worker-local limits: {e}")
+            self._failing = True
+
+    def check(self, client):
+        if self.fallback.is_blocked(client):
+            return BLOCKED
+        args = (self.limit, self.window, int(self.block_ttl))
+        try:
+            status = int(self._script(keys=list(self._keys(client)), args=args))
+        except Exception as e:
+            self._unavailable(e)
+            return self.fallback.check(client)
+        self._failing = False
+        if status == ALLOWED:
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return status
+
+    def is_blocked(self, client):
+        if self.fallback.is_blocked(client):
+            return True
+        try:
+            return self.shared.get(self._keys(client)[1]) is not None
+        except Exception as e:
+            self._unavailable(e)
+            return False
+
+    def block(self, client, ttl=None):
+        try:
+            self.shared.setex(self._keys(client)[1], int(ttl or self.block_ttl), '1')
+        except Exception as e:
+            self._unavailable(e)
+            self.fallback.block(client, ttl)
+
+    def unblock(self, client):
+        self.fallback.unblock(client)
+        try:
+            self.shared.delete(self._keys(client)[1])
+        except Exception as e:
+            self._unavailable(e)
+
+    def stats(self):
+        return {
+            'backend': 'shared',
+            'shared_tier': type(self.shared).__name__,
+            'limit': self.limit,
+            'window_seconds': self.window,
+            'allowed': self.allowed,
+            'rejected': self.rejected,
+            'errors': self.errors
+        }
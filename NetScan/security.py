@@ -2,14 +2,19 @@ from functools import wraps
 from flask import request, jsonify, g
 from datetime import datetime, timedelta
 import time
-from collections import defaultdict
 import hashlib
+import ipaddress
+import re
+import socket
+from rate_limiter import LocalRateLimitState, SharedRateLimitState, ALLOWED, BLOCKED
+from blocklist import Blocklist
+from analysis_model import dumps
 
 class SecurityMiddleware:
     def __init__(self, app=None):
         self.app = app
-        self.rate_limits = defaultdict(list)
-        self.blocked_ips = set()
+        self.state = LocalRateLimitState()
+        self.blocklist = Blocklist()
         
         if app:
             self.init_app(app)
@@ -17,55 +22,94 @@ class SecurityMiddleware:
     def init_app(self, app):
         """Initialize security middleware with Flask app"""
         self.app = app
+        self.state = LocalRateLimitState(
+            limit=app.config.get('RATE_LIMIT', 100),
+            window=app.config.get('RATE_LIMIT_WINDOW', 3600),
+            max_clients=app.config.get('RATE_LIMIT_MAX_CLIENTS', 100000),
+            block_ttl=app.config.get('RATE_LIMIT_BLOCK_TTL', 24 * 3600)
+        )
+        self.blocklist = Blocklist(
+            max_entries=app.config.get('BLOCKLIST_MAX_ENTRIES', 1000000),
+            feed_paths=[path.strip() for path in (app.config.get('BLOCKLIST_FEEDS') or '').split(',')],
+            feed_ttl=app.config.get('BLOCKLIST_FEED_TTL'),
+            refresh_interval=app.config.get('BLOCKLIST_REFRESH_INTERVAL', 300),
+            sync_interval=app.config.get('BLOCKLIST_SYNC_INTERVAL', 5)
+        )
+        self.blocklist.start()
         
         @app.before_request
         def before_request():
             # Security headers
             g.start_time = time.time()
             
-            # Block malicious IPs
-            if request.remote_addr in self.blocked_ips:
+            # Block malicious IPs and rate limit the rest (one shared-state round trip)
+            status = self.check_request(request.remote_addr)
+            if status == BLOCKED:
                 return jsonify({'error': 'Access denied'}), 403
-            
-            # Basic rate limiting
-            if not self.check_rate_limit(request.remote_addr):
+            if status != ALLOWED:
                 return jsonify({'error': 'Rate limit exceeded'}), 429
         
         @app.after_request
         def after_request(response):
-            # Add security headers
-            if hasattr(app.config, 'SECURITY_HEADERS'):
-                for header, value in app.config.SECURITY_HEADERS.items():
-                    response.headers[header] = value
-            
-            # CORS headers for API endpoints
-            if request.endpoint and request.endpoint.startswith('api'):
-                response.headers['Access-Control-Allow-Origin'] = '*'
-                response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
-                response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
-            
+            for header, value in self.response_headers(request.endpoint):
+                response.headers[header] = value
             return response
     
-    def check_rate_limit(self, ip_address, limit=100, window=3600):
-        """Check if IP is within rate limit"""
-        now = time.time()
+    def response_headers(self, endpoint):
+        """Headers added to every response of endpoint (the native ASGI routes send them too)"""
+        headers = []
+        # Add security headers
+        if hasattr(self.app.config, 'SECURITY_HEADERS'):
+            headers.extend(self.app.config.SECURITY_HEADERS.items())
         
-        # Clean old entries
-        self.rate_limits[ip_address] = [
-            timestamp for timestamp in self.rate_limits[ip_address]
-            if now - timestamp < window
-        ]
-        
-        # Check limit
-        if len(self.rate_limits[ip_address]) >= limit:
-            # Block IP if repeatedly exceeding limits
-            if len(self.rate_limits[ip_address]) > limit * 2:
-                self.blocked_ips.add(ip_address)
-            return False
+        # CORS headers for API endpoints
+        if endpoint and endpoint.startswith('api'):
+            headers.extend([
+                ('Access-Control-Allow-Origin', '*'),
+                ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+                ('Access-Control-Allow-Headers', 'Content-Type')
+            ])
+        return headers
+    
+    def use_shared_state(self, shared):
+        """Enforce limits and blocks across all workers through the shared (Redis) tier
         
-        # Add current request
-        self.rate_limits[ip_address].append(now)
-        return True
+        The in-process stand-in tier cannot run the rate-limit script and is per
+        worker anyway, so the local state is kept with it.
+        """
+        if not hasattr(shared, 'register_script'):
+            return
+        local = self.state
+        self.state = SharedRateLimitState(
+            shared,
+            limit=local.limit,
+            window=local.limiter.window,
+            block_ttl=local.block_ttl,
+            fallback=local
+        )
+    
+    def check_request(self, ip_address):
+        """ALLOWED, LIMITED or BLOCKED (blocklisted networks, or clients far over the limit)"""
+        if self.blocklist.is_blocked(ip_address):
+            return BLOCKED
+        return self.state.check(ip_address)
+    
+    def check_rate_limit(self, ip_address):
+        """Check if IP is within rate limit"""
+        return self.check_request(ip_address) == ALLOWED
+    
+    def block_ip(self, ip_address, ttl=None):
+        self.state.block(ip_address, ttl)
+    
+    def block_network(self, network, ttl=None, reason='manual'):
+        """Block an address or CIDR (in every worker once the blocklist uses the shared tier)"""
+        self.blocklist.block(network, ttl, reason)
+    
+    def unblock_network(self, network):
+        return self.blocklist.unblock(network)
+    
+    def is_blocked(self, ip_address):
+        return self.blocklist.is_blocked(ip_address) or self.state.is_blocked(ip_address)
     
     def require_admin_key(self, f):
         """Decorator to require admin key for sensitive endpoints"""
@@ -79,25 +123,37 @@ class SecurityMiddleware:
             return f(*args, **kwargs)
         return decorated_function
 
+# Input patterns, compiled once
+_DANGEROUS_INPUT = re.compile(
+    r'[;&|`$()<>]'  # Shell / HTML injection
+    r'|script|javascript|vbscript'  # Script injection
+    r'|union|select|drop|delete|insert|update',  # SQL injection
+    re.IGNORECASE
+)
+_HOSTNAME = re.compile(r'[a-zA-Z0-9.-]+')
+_NUMERIC = re.compile(r'[0-9.]+')
+_SCOPE_ID = re.compile(r'[0-9A-Za-z_.-]+')  # the "eth0" of fe80::1%eth0
+
+def hostname_error(text):
+    """Why text is not an acceptable hostname, or None if it is
+    
+    All-numeric names are rejected: anything like '010.1.1.1' is a mistyped
+    IPv4 address, which resolvers would otherwise read in octal.
+    """
+    if _NUMERIC.fullmatch(text):
+        return "Invalid IPv4 address"
+    if len(text) > 253 or not _HOSTNAME.fullmatch(text):
+        return "Invalid IP address or hostname format"
+    return None
+
 def validate_ip_input(ip_input):
     """Validate IP address input to prevent injection attacks"""
-    import ipaddress
-    import re
-    
     # Remove whitespace
     ip_input = ip_input.strip()
     
     # Check for basic patterns that might indicate malicious input
-    dangerous_patterns = [
-        r'[;&|`$()<>]',  # Shell injection
-        r'script|javascript|vbscript',  # Script injection
-        r'<|>',  # HTML injection
-        r'union|select|drop|delete|insert|update',  # SQL injection
-    ]
-    
-    for pattern in dangerous_patterns:
-        if re.search(pattern, ip_input, re.IGNORECASE):
-            raise ValueError("Invalid input detected")
+    if _DANGEROUS_INPUT.search(ip_input):
+        raise ValueError("Invalid input detected")
     
     # Validate IP format
     try:
@@ -105,10 +161,80 @@ def validate_ip_input(ip_input):
         return ip_input
     except ValueError:
         # Try to validate as hostname
-        if re.match(r'^[a-zA-Z0-9.-]+$', ip_input) and len(ip_input) <= 253:
-            return ip_input
+        reason = hostname_error(ip_input)
+        if reason:
+            raise ValueError(reason)
+        return ip_input
+
+# Kinds of entry in a submitted IP list
+IPV4 = 'ipv4'
+IPV6 = 'ipv6'
+CIDR = 'cidr'
+HOSTNAME = 'hostname'
+INVALID = 'invalid'
+KINDS = (IPV4, IPV6, CIDR, HOSTNAME, INVALID)
+
+def classify_ip_entry(text):
+    """(kind, normalized value, reason) for one list entry; reason is set only for INVALID
+
+    IPv6 addresses are compressed and lowercased, CIDRs reduced to their
+    network address and hostnames lowercased without a trailing dot, so
+    different spellings of one entry normalize to the same value.
+    """
+    text = text.strip()
+    try:
+        if '/' in text:
+            network = ipaddress.ip_network(text, strict=False)
+            return CIDR, str(network), None
+        if ':' in text:
+            if '%' in text:  # scoped address, which inet_pton does not take
+                scope = text.partition('%')[2]
+                if not _SCOPE_ID.fullmatch(scope) or _DANGEROUS_INPUT.search(scope):
+                    return INVALID, text, "Invalid IPv6 scope"
+                return IPV6, str(ipaddress.IPv6Address(text)), None
+            return IPV6, socket.inet_ntop(socket.AF_INET6, socket.inet_pton(socket.AF_INET6, text)), None
+        socket.inet_pton(socket.AF_INET, text)
+        return IPV4, text, None
+    except (OSError, ValueError):
+        if '/' in text or ':' in text:
+            return INVALID, text, f"Invalid {'network' if '/' in text else 'IPv6 address'}"
+    reason = hostname_error(text)
+    if reason:
+        return INVALID, text, reason
+    if _DANGEROUS_INPUT.search(text):
+        return INVALID, text, "Invalid input detected"
+    return HOSTNAME, text.lower().rstrip('.'), None
+
+def validate_ip_list(lines, accept=(IPV4, IPV6, CIDR, HOSTNAME)):
+    """Normalize, deduplicate and classify a submitted list in one pass
+
+    Returns (accepted, rejected, counts): accepted is [(line, kind, value)]
+    with the first occurrence of each value, rejected is [(line, text, reason)]
+    for invalid entries, kinds outside `accept` and duplicates, and counts
+    has every occurrence per kind plus the number of duplicates. Lines are 1-based; blank lines
+    and '#' comments are skipped.
+    """
+    accepted, rejected = [], []
+    counts = dict.fromkeys(KINDS + ('duplicate',), 0)
+    seen = {}
+    classify = classify_ip_entry
+    for line, text in enumerate(lines, 1):
+        text = text.strip()
+        if not text or text[0] == '#':
+            continue
+        kind, value, reason = classify(text)
+        counts[kind] += 1
+        if reason is None and kind not in accept:
+            reason = f"Entries of type {kind} are not accepted here"
+        elif reason is None and value in seen:
+            counts['duplicate'] += 1
+            reason = f"Duplicate of line {seen[value]}"
+        if reason is None:
+            seen[value] = line
+            accepted.append((line, kind, value))
         else:
-            raise ValueError("Invalid IP address or hostname format")
+            rejected.append((line, text, reason))
+    return accepted, rejected, counts
 
 def sanitize_output(data):
     """Sanitize output data to prevent XSS"""
@@ -125,3 +251,17 @@ def sanitize_output(data):
                    .replace("'", '&#x27;'))
     else:
         return data
+
+def sanitized_dumps(data):
+    """JSON bytes with every string HTML-escaped as sanitize_output does, without copying `data`
+
+    '&', '<', '>' and "'" only ever occur inside JSON strings, so they are
+    replaced on the encoded buffer; a quote inside a string is always encoded
+    as \\", told apart from an escaped backslash before a closing quote by
+    parking escaped backslashes on NUL (never raw in JSON) first.
+    """
+    body = (dumps(data).replace(b'&', b'&amp;').replace(b'<', b'&lt;')
+            .replace(b'>', b'&gt;').replace(b"'", b'&#x27;'))
+    if b'\\"' in body:
+        body = body.replace(b'\\\\', b'\0').replace(b'\\"', b'&quot;').replace(b'\0', b'\\\\')
+    return body
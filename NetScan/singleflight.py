@@ -0,0 +1,222 @@
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+# Deletes the lock only if this caller still owns it
+RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution
+
+    Inside a process, callers join the leader's Future. With a shared store
+    (the Redis tier), the leader also holds a short lock; callers in other
+    workers poll `check` for the leader's cached result instead of
+    recomputing, and compute themselves only if the lock goes away empty.
+    The async variants run those store calls on `io_executor` (the loop's
+    default executor when None), never on the event loop itself.
+    """
+
+    def __init__(self, shared=None, lock_ttl=15, poll_interval=0.05, namespace='netscan:flight:',
+                 io_executor=None):
+        self.shared = shared
+        self.io_executor = io_executor
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> concurrent.futures.Future
+        self._tasks = set()  # leader tasks, referenced until done
+        self.leaders = 0
+        self.coalesced = 0
+        self.shared_waits = 0
+        self.shared_hits = 0
+
+    def _join_or_lead(self, key):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._calls[key] = Future()
+            future.set_running_or_notify_cancel()  # a waiter going away cannot cancel it for the others
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    # Cross-worker lock ---------------------------------------------------------
+
+    def _acquire_shared(self, key):
+        """Lock token if this worker may compute, None if another worker holds the lock"""
+        if self.shared is None:
+            return ''
+        token = uuid.uuid4().hex
+        try:
+            if self.shared.set(self.namespace + key, token, nx=True, px=int(self.lock_ttl * 1000)):
+                return token
+            return None
+        except Exception as e:
+            print(f"⚠️  Single-flight lock unavailable: {e}")
+            return ''
+
+    def _release_shared(self, key, token):
+        if not token:
+            return
+        try:
+            compare_and_delete = getattr(self.shared, 'compare_and_delete', None)
+            if compare_and_delete is not None:
+                compare_and_delete(self.namespace + key, token)
+            else:
+                self.shared.eval(RELEASE_SCRIPT, 1, self.namespace + key, token)
+        except Exception as e:
+            print(f"⚠️  Single-flight lock release failed: {e}")
+
+    def _shared_lock_held(self, key):
+        try:
+            return self.shared.get(self.namespace + key) is not None
+        except Exception:
+            return False
+
+    def _wait_for_other_worker(self, key, check):
+        """Poll for another worker's result; None if it never shows up"""
+        self.shared_waits += 1
+        deadline = time.time() + self.lock_ttl
+        while time.time() < deadline:
+            result = check()
+            if result is not None:
+                self.shared_hits += 1
+                return result
+            if not self._shared_lock_held(key):
+                return check()
+            time.sleep(self.poll_interval)
+        return None
+
+    async def _io(self, func, *args):
+        # check() and the lock calls may reach the (synchronous) shared store
+        if self.shared is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.io_executor, func, *args)
+
+    async def _wait_for_other_worker_async(self, key, check):
+        self.shared_waits += 1
+        deadline = time.time() + self.lock_ttl
+        while time.time() < deadline:
+            result = await self._io(check)
+            if result is not None:
+                self.shared_hits += 1
+                return result
+            if not await self._io(self._shared_lock_held, key):
+                return await self._io(check)
+            await asyncio.sleep(self.poll_interval)
+        return None
+
+    def _run(self, key, func, args, check):
+        # A previous leader may have finished between the caller's cache check and now
+        result = check() if check is not None else None
+        if result is not None:
+            return result
+        token = self._acquire_shared(key) if check is not None else ''
+        if token is None:
+            result = self._wait_for_other_worker(key, check)
+            if result is not None:
+                return result
+        try:
+            return func(*args)
+        finally:
+            self._release_shared(key, token)
+
+    # Public API ------------------------------------------------------------------
+
+    def do(self, key, func, *args, check=None):
+        """Run func(*args) once for all concurrent callers of key and return its result"""
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            return future.result()
+        try:
+            result = self._run(key, func, args, check)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def submit(self, key, executor, func, *args, check=None):
+        """Start func(*args) on executor unless key is already in flight; returns the shared Future"""
+        future, leader = self._join_or_lead(key)
+        if leader:
+            def run():
+                try:
+                    self._finish(key, future, self._run(key, func, args, check))
+                except BaseException as e:
+                    self._finish(key, future, error=e)
+            executor.submit(run)
+        return future
+
+    async def do_async(self, key, coro_func, *args, check=None):
+        """Coroutine variant of do(); joins calls started from threads as well"""
+        future, leader = self._join_or_lead(key)
+        if leader:
+            # A task, so a caller that goes away does not cancel the others' result
+            task = asyncio.ensure_future(self._lead_async(key, future, coro_func, args, check))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    async def _lead_async(self, key, future, coro_func, args, check):
+        try:
+            result = await self._io(check) if check is not None else None
+            if result is not None:
+                self._finish(key, future, result)
+                return
+            token = await self._io(self._acquire_shared, key) if check is not None else ''
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            return
+        try:
+            if token is None:
+                result = await self._wait_for_other_worker_async(key, check)
+            if result is None:
+                result = await coro_func(*args)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            return
+        finally:
+            if token:
+                await self._io(self._release_shared, key, token)
+        self._finish(key, future, result)
+
+    def in_flight(self, key):
+        with self._lock:
+            return self._calls.get(key)
+
+    def join(self, key, check=None):
+        """Result of a call already running for key, here or (with a shared store) in another worker
+
+        Never starts one: None when nothing is running for key.
+        """
+        future = self.in_flight(key)
+        if future is not None:
+            return future.result()
+        if check is not None and self.shared is not None and self._shared_lock_held(key):
+            return self._wait_for_other_worker(key, check)
+        return None
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            'in_flight': in_flight,
+            'leaders': self.leaders,
+            'coalesced': self.coalesced,
+            'shared_lock': self.shared is not None,
+            'shared_waits': self.shared_waits,
+            'shared_hits': self.shared_hits
+        }
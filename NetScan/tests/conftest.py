@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+# The app is a flat set of modules; make them importable from the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Testing config (memory:// shared tier); lazy start-up keeps the Tor list download out of imports
+os.environ.setdefault('FLASK_ENV', 'testing')
+os.environ.setdefault('LAZY_INIT', 'true')
+
+class StubResponse:
+    """Just enough of a requests.Response for the app's upstream calls"""
+
+    def __init__(self, data=None, status_code=200, headers=None):
+        self.data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return self.data
+
+@pytest.fixture
+def netscan(monkeypatch):
+    """The app module with empty caches and fresh provider state"""
+    import app
+    from provider_scheduler import init_scheduler
+
+    monkeypatch.setattr(app.tor_exit_index, 'start_on_first_use', False)
+    monkeypatch.setattr(app, 'provider_scheduler', init_scheduler(app.app.config))
+    app.response_cache.local.clear()
+    app.analysis_cache.local.clear()
+    app.response_cache.shared._data.clear()  # memory:// tier, also behind analysis_cache
+    app.whois_cache.clear()
+    return app
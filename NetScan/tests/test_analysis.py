@@ -0,0 +1,70 @@
+import json
+import time
+
+import pytest
+
+GEO = [("ip-api.com", {"status": "success", "countryCode": "US", "city": "Mountain View",
+                       "lat": 37.4, "lon": -122.0, "timezone": "America/Los_Angeles"})]
+WHOIS = {"asn": "15169", "asn_description": "GOOGLE, US", "network_name": "GOOGLE"}
+
+@pytest.fixture
+def stages(netscan, monkeypatch):
+    """Stub enrichment stages: `called` lists the stages run; set `delays` to slow one down"""
+    class Stages:
+        called = []
+        delays = {}
+
+    stub = Stages()
+
+    def stage(name, answer):
+        def run(*args):
+            stub.called.append(name)
+            time.sleep(stub.delays.get(name, 0))
+            return answer
+        return run
+
+    monkeypatch.setattr(netscan, 'reverse_dns', stage('reverse_dns', 'dns.google'))
+    monkeypatch.setattr(netscan, 'get_enhanced_whois_data', stage('whois', WHOIS))
+    monkeypatch.setattr(netscan, 'get_geo_by_coverage', stage('geolocation', GEO))
+    monkeypatch.setattr(netscan, 'get_real_weather_data', stage('weather', {"available": True}))
+    monkeypatch.setattr(netscan, 'lookup_local_geo', lambda ip: None)
+    return stub
+
+def test_all_stages_run_without_fields(netscan, stages):
+    netscan.comprehensive_ip_analysis('8.8.8.8')
+    assert sorted(stages.called) == ['geolocation', 'reverse_dns', 'weather', 'whois']
+
+def test_fields_skip_the_stages_they_do_not_need(netscan, stages):
+    response = netscan.app.test_client().get('/api/8.8.8.8?fields=basic')
+    assert response.status_code == 200
+    assert stages.called == ['reverse_dns']
+    body = json.loads(response.data)
+    assert body['basic']['reverse_dns'] == 'dns.google'
+    assert 'network' not in body and 'geographic' not in body
+
+def test_geographic_fields_need_only_geolocation(netscan, stages):
+    data = netscan.comprehensive_ip_analysis('8.8.8.8', netscan.parse_sections('geographic,time'))
+    assert stages.called == ['geolocation']
+    assert data.geographic.city == 'Mountain View'
+
+def test_stage_past_the_deadline_leaves_a_partial_result(netscan, stages, monkeypatch):
+    monkeypatch.setitem(netscan.app.config, 'ANALYSIS_DEADLINE', 0.3)
+    stages.delays['whois'] = 1.0
+    started = time.time()
+    data = netscan.comprehensive_ip_analysis('8.8.8.8')
+    assert time.time() - started < 0.6
+    assert data.partial is True
+    assert data.pending_stages == ['whois']
+    assert data.basic.reverse_dns == 'dns.google'
+    assert data.geographic.city == 'Mountain View'
+    assert data.network.asn is None
+
+def test_partial_result_is_cached_only_briefly(netscan, stages, monkeypatch):
+    monkeypatch.setitem(netscan.app.config, 'ANALYSIS_DEADLINE', 0.3)
+    monkeypatch.setitem(netscan.app.config, 'ANALYSIS_PARTIAL_TTL', 0.5)
+    stages.delays['whois'] = 1.0
+    response = netscan.app.test_client().get('/api/8.8.8.8')
+    body = json.loads(response.data)
+    assert body['partial'] is True and body['pending_stages'] == ['whois']
+    time.sleep(0.6)
+    assert netscan.get_cached_analysis('8.8.8.8') is None
@@ -0,0 +1,18 @@
+from analysis_model import AnalysisResult, dumps, parse_sections
+
+def test_result_without_raw_sources_keeps_its_shape_after_a_round_trip():
+    result = AnalysisResult(ip='8.8.8.8', analysis_timestamp='t', sources=None)
+    restored = AnalysisResult.from_dict(result.to_dict())
+    assert restored.sources is None
+    assert dumps(restored.to_dict()) == dumps(result.to_dict())
+
+def test_raw_sources_survive_a_round_trip():
+    result = AnalysisResult(ip='8.8.8.8', analysis_timestamp='t')
+    result.sources['whois'] = {'asn': '15169'}
+    assert AnalysisResult.from_dict(result.to_dict()).sources == {'whois': {'asn': '15169'}, 'geolocation': []}
+
+def test_section_selection_limits_serialized_keys():
+    result = AnalysisResult(ip='8.8.8.8', analysis_timestamp='t').select(parse_sections('geographic'))
+    data = result.to_dict()
+    assert 'geographic' in data and 'currency' in data and 'network' not in data
+    assert data['sections'] == ['geographic']
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+pytest.importorskip('asgiref')
+
+CORS = {'access-control-allow-origin': '*', 'access-control-allow-methods': 'GET, POST, OPTIONS',
+        'access-control-allow-headers': 'Content-Type'}
+
+@pytest.fixture
+def asgi(netscan, monkeypatch):
+    """The ASGI app with its async analysis stubbed; `asgi.analyzed` lists the analyzed IPs"""
+    import asgi
+
+    analyzed = []
+
+    async def analyze(ip, sections=None):
+        analyzed.append(ip)
+        return netscan._new_analysis(ip)
+
+    monkeypatch.setattr(asgi, 'comprehensive_ip_analysis_async', analyze)
+    monkeypatch.setattr(netscan, 'prefetch_ip_api_batch', lambda ips: 0)
+    monkeypatch.setattr(asgi, 'analyzed', analyzed, raising=False)
+    return asgi
+
+def call(asgi, method, url, **kwargs):
+    async def main():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+            return await client.request(method, url, **kwargs)
+    return asyncio.run(main())
+
+def test_native_analysis_route_sends_the_flask_api_headers(asgi):
+    response = call(asgi, 'GET', '/api/8.8.8.8')
+    assert response.status_code == 200
+    assert response.json()['ip'] == '8.8.8.8'
+    assert asgi.analyzed == ['8.8.8.8']
+    assert {name: response.headers.get(name) for name in CORS} == CORS
+
+def test_native_analysis_route_rejects_invalid_input(asgi):
+    response = call(asgi, 'GET', '/api/not-an-ip!')
+    assert response.status_code == 400
+    assert asgi.analyzed == []
+    assert response.headers.get('access-control-allow-origin') == '*'
+
+def test_native_bulk_route_streams_ndjson(asgi):
+    response = call(asgi, 'POST', '/api/bulk', content='192.0.2.1\nnot-an-ip!\n192.0.2.2\n',
+                    headers={'Content-Type': 'text/plain'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert {name: response.headers.get(name) for name in CORS} == CORS
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]['line'] == 2 and 'error' in lines[0]
+    assert sorted(line['ip'] for line in lines[1:]) == ['192.0.2.1', '192.0.2.2']
+
+def test_other_routes_fall_through_to_flask(asgi):
+    response = call(asgi, 'GET', '/admin/health')
+    assert response.status_code == 401
+    assert response.json() == {'error': 'Unauthorized'}
+    # Only GET /api/<ip> is native; other methods get Flask's answer
+    assert call(asgi, 'DELETE', '/api/8.8.8.8').status_code == 405
+    assert asgi.analyzed == []
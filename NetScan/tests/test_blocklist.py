@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from blocklist import Blocklist
+from prefix_index import PrefixIndex
+
+def test_cidr_and_ipv6_entries_match():
+    blocklist = Blocklist()
+    blocklist.load(['1.2.3.0/24 ; SBL1', '# comment', '2001:db8::/32', '9.9.9.9'])
+    assert blocklist.is_blocked('1.2.3.200')
+    assert blocklist.is_blocked('2001:db8::1')
+    assert blocklist.is_blocked('9.9.9.9')
+    assert not blocklist.is_blocked('1.2.4.1')
+
+def test_load_after_unblock_registers_prefix_length_again():
+    blocklist = Blocklist()
+    blocklist.block('1.2.3.0/24')
+    blocklist.unblock('1.2.3.0/24')
+    blocklist.load(['5.6.7.0/24'])
+    assert blocklist.is_blocked('5.6.7.1')
+
+def test_expired_entries_stop_matching():
+    blocklist = Blocklist()
+    blocklist.block('10.0.0.0/8', ttl=-1)
+    assert not blocklist.is_blocked('10.1.2.3')
+
+def test_expired_blocks_are_swept_without_feeds():
+    blocklist = Blocklist(refresh_interval=0.05, sync_interval=0.05)
+    blocklist.block('10.0.0.0/8', ttl=0.05)
+    blocklist.start()
+    try:
+        time.sleep(0.3)
+        assert blocklist.stats()['entries'] == 0
+    finally:
+        blocklist.stop()
+
+def test_unchanged_feed_is_reloaded_before_its_ttl_runs_out(tmp_path):
+    feed = tmp_path / 'drop.txt'
+    feed.write_text('198.51.100.0/24 ; SBL2\n')
+    blocklist = Blocklist(feed_paths=[str(feed)], feed_ttl=0.4, refresh_interval=0.1, sync_interval=0.1)
+    blocklist.start()
+    try:
+        time.sleep(1.0)
+        assert blocklist.is_blocked('198.51.100.7')
+    finally:
+        blocklist.stop()
+
+def test_reinserted_networks_are_evicted_last():
+    index = PrefixIndex(max_entries=2)
+    index.insert_many([('10.0.0.0/8', 'a'), ('172.16.0.0/12', 'b')])
+    index.insert_many([('10.0.0.0/8', 'a')])
+    index.insert('192.168.0.0/16', 'c')
+    assert index.lookup('10.1.1.1') == 'a' and index.lookup('172.16.1.1') is None
+
+def test_runtime_blocks_reach_other_workers_through_redis():
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    first, second = Blocklist(), Blocklist()
+    first.use_shared(fakeredis.FakeRedis(server=server))
+    second.use_shared(fakeredis.FakeRedis(server=server))
+    first.block('203.0.113.0/24', ttl=60)
+    assert second.sync() and second.is_blocked('203.0.113.9')
+    assert second.unblock('203.0.113.0/24')
+    first.sync()
+    assert not first.is_blocked('203.0.113.9')
+
+def test_admin_api_blocks_and_unblocks(netscan, monkeypatch):
+    monkeypatch.setitem(netscan.app.config, 'ADMIN_SECRET_KEY', 'secret')
+    client = netscan.app.test_client()
+    headers = {'X-Admin-Key': 'secret'}
+    assert client.post('/admin/blocklist', json={'network': '203.0.113.0/24'}).status_code == 401
+    assert client.post('/admin/blocklist', json={'network': 'nope'}, headers=headers).status_code == 400
+    assert client.post('/admin/blocklist', json={'network': '203.0.113.0/24', 'ttl': 60}, headers=headers).status_code == 200
+    assert netscan.security.is_blocked('203.0.113.9')
+    response = client.delete('/admin/blocklist', json={'network': '203.0.113.0/24'}, headers=headers)
+    assert response.get_json()['removed'] and not netscan.security.is_blocked('203.0.113.9')
@@ -0,0 +1,46 @@
+import json
+import time
+
+import pytest
+
+@pytest.fixture
+def analyses(netscan, monkeypatch):
+    """Analyses answered at once; `prefetches` records each batch prefetch with its start time"""
+    prefetches = []
+
+    def analyze(ip, sections=None):
+        return netscan._new_analysis(ip)
+
+    def prefetch(ips):
+        prefetches.append((list(ips), time.time()))
+        if len(prefetches) > 1:
+            time.sleep(1.0)  # later chunks' batches are slow
+        return len(ips)
+
+    monkeypatch.setattr(netscan, 'comprehensive_ip_analysis', analyze)
+    monkeypatch.setattr(netscan, 'prefetch_ip_api_batch', prefetch)
+    monkeypatch.setattr(netscan.dns_resolver, 'prefetch', lambda ips: None)
+    return prefetches
+
+def test_bulk_streams_ndjson_with_rejected_lines_first(netscan, analyses):
+    body = "192.0.2.1\nnot-an-ip!\n192.0.2.2\n192.0.2.1\n10.0.0.0/8\n"
+    response = netscan.app.test_client().post('/api/bulk', data=body, content_type='text/plain')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.data.splitlines()]
+    assert [(line['line'], line['ip']) for line in lines[:3]] == \
+        [(2, 'not-an-ip!'), (4, '192.0.2.1'), (5, '10.0.0.0/8')]
+    assert all('error' in line for line in lines[:3])
+    assert sorted(line['ip'] for line in lines[3:]) == ['192.0.2.1', '192.0.2.2']
+
+def test_prefetch_of_the_next_chunk_does_not_hold_back_results(netscan, analyses):
+    ips = [f"192.0.2.{i}" for i in range(1, 151)]
+    started = time.time()
+    early = []
+    for index, result in netscan.iter_bulk_analysis(ips):
+        if time.time() - started < 0.8:
+            early.append(index)
+    # The second chunk's batch was started one chunk ahead, in the background
+    assert [len(ips) for ips, _ in analyses] == [100, 50]
+    assert analyses[1][1] - started < 0.2
+    assert set(range(100)) <= set(early)
@@ -0,0 +1,61 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import StubResponse
+
+class BatchHandler(BaseHTTPRequestHandler):
+    """ip-api.com batch endpoint: private addresses fail, everything else is geolocated"""
+    protocol_version = 'HTTP/1.1'
+    batches = None
+
+    def do_POST(self):
+        ips = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        type(self).batches.append(ips)
+        body = json.dumps([
+            {"status": "fail", "message": "private range", "query": ip} if ip.startswith('10.') else
+            {"status": "success", "query": ip, "countryCode": "US", "regionName": "California",
+             "city": "Mountain View", "lat": 37.4, "lon": -122.0, "timezone": "America/Los_Angeles"}
+            for ip in ips
+        ]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def batch_server(netscan, monkeypatch):
+    handler = type('Handler', (BatchHandler,), {'batches': []})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(netscan, 'IP_API_BATCH_URL',
+                        f"http://127.0.0.1:{server.server_address[1]}/batch?fields=" + netscan.IP_API_FIELDS)
+    yield handler.batches
+    server.shutdown()
+    server.server_close()
+
+def test_bulk_geolocation_uses_batches_and_no_per_ip_calls(netscan, batch_server, monkeypatch):
+    ips = [f"11.0.{i // 200}.{i % 200}" for i in range(240)] + [f"10.0.0.{i}" for i in range(11)]
+    gets = []
+
+    def record_get(url, timeout=None, **kwargs):
+        gets.append(url)
+        return StubResponse(status_code=404)
+
+    monkeypatch.setattr(netscan.http_client, 'get', record_get)
+    results = dict(netscan.iter_bulk_analysis(ips, netscan.parse_sections('geographic')))
+
+    assert [len(batch) for batch in batch_server] == [100, 100, 51]
+    # Failed entries are cached negatively under the single-IP URL
+    failed = netscan.response_cache.get(netscan.IP_API_URL.format(ip='10.0.0.3'))
+    assert failed['status'] == 'fail'
+    assert not [url for url in gets if 'ip-api.com' in url]
+    assert len(results) == 251
+    assert results[0].geographic.city == 'Mountain View'
@@ -0,0 +1,35 @@
+from analysis_model import AnalysisResult
+from cache import MISS, InMemorySharedTier, MemoryCache, TieredCache, create_shared_tier
+
+def test_memory_url_builds_the_in_process_tier():
+    assert isinstance(create_shared_tier('memory://'), InMemorySharedTier)
+    assert create_shared_tier(None) is None
+
+def test_shared_tier_fills_other_workers_local_tier():
+    shared = InMemorySharedTier()
+    first = TieredCache(MemoryCache(), shared)
+    second = TieredCache(MemoryCache(), shared)
+    first.set('https://example/8.8.8.8', {'country': 'US'}, 60)
+    assert second.get('https://example/8.8.8.8') == {'country': 'US'}
+    assert second.shared_hits == 1
+    assert second.local.get('https://example/8.8.8.8') == {'country': 'US'}
+    assert second.get('https://example/1.1.1.1') is MISS
+
+def test_records_round_trip_through_the_shared_tier():
+    shared = InMemorySharedTier()
+    encode, decode = AnalysisResult.to_dict, AnalysisResult.from_dict
+    writer = TieredCache(MemoryCache(), shared, encode=encode, decode=decode)
+    reader = TieredCache(MemoryCache(), shared, encode=encode, decode=decode)
+    result = AnalysisResult(ip='8.8.8.8', analysis_timestamp='t')
+    result.geographic.city = 'Mountain View'
+    writer.set('8.8.8.8', result, 60)
+    assert reader.get('8.8.8.8') == result
+
+def test_unreadable_shared_entries_are_misses():
+    shared = InMemorySharedTier()
+    cache = TieredCache(MemoryCache(), shared)
+    for key, payload in (('truncated', '{"v": {"coun'), ('foreign', '"plain string"'), ('no-expiry', '{"v": 1}')):
+        shared.setex(cache._shared_key(key), 60, payload)
+        assert cache.get(key) is MISS
+    assert cache.shared_errors == 3
+    assert cache.shared_hits == 0
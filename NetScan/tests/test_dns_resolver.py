@@ -0,0 +1,51 @@
+import asyncio
+import socket
+import time
+
+from dns_resolver import ReverseResolver
+
+class CountingResolver(ReverseResolver):
+    """Resolver whose queries are answered locally and counted"""
+
+    def __init__(self, answer=('host.example', 60), delay=0, **kwargs):
+        super().__init__(**kwargs)
+        self.answer = answer
+        self.delay = delay
+        self.queries = 0
+
+    async def _query(self, ip):
+        self.queries += 1
+        await asyncio.sleep(self.delay)
+        return self.answer
+
+def test_answers_are_cached_for_their_ttl():
+    resolver = CountingResolver(answer=('host.example', 0.2))
+    assert resolver.lookup('192.0.2.1') == 'host.example'
+    assert resolver.lookup('192.0.2.1') == 'host.example'
+    assert resolver.queries == 1
+    time.sleep(0.25)
+    resolver.lookup('192.0.2.1')
+    assert resolver.queries == 2
+
+def test_missing_ptr_is_negatively_cached(monkeypatch):
+    def no_ptr(ip):
+        raise socket.herror(1, 'Unknown host')
+
+    monkeypatch.setattr(socket, 'gethostbyaddr', no_ptr)
+    resolver = ReverseResolver(negative_ttl=300)
+    resolver._resolver_ready = True  # system resolver path
+    assert asyncio.run(resolver._query('192.0.2.1')) == (None, 300)
+
+    resolver = CountingResolver(answer=(None, 300))
+    assert resolver.lookup('192.0.2.1') is None
+    assert resolver.lookup('192.0.2.1') is None
+    assert resolver.queries == 1
+
+def test_concurrent_lookups_share_one_query():
+    resolver = CountingResolver(delay=0.1)
+
+    async def main():
+        return await asyncio.gather(*(resolver.resolve('192.0.2.1') for _ in range(10)))
+
+    assert asyncio.run(main()) == ['host.example'] * 10
+    assert resolver.queries == 1
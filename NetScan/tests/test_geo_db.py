@@ -0,0 +1,30 @@
+from geo_db import GeoDatabase, compile_geo_csv
+
+def compile_ranges(tmp_path, rows):
+    csv_path = tmp_path / 'ranges.csv'
+    csv_path.write_text('start_ip,end_ip,network,country_code\n' + ''.join(f"{row}\n" for row in rows))
+    db_path = tmp_path / 'geo.db'
+    compile_geo_csv(str(csv_path), str(db_path))
+    return GeoDatabase(str(db_path))
+
+def country(db, ip):
+    record = db.lookup(ip)
+    return record and record['country_code']
+
+def test_nested_networks_resolve_to_innermost(tmp_path):
+    db = compile_ranges(tmp_path, [',,1.0.0.0/8,AA', ',,1.2.3.0/24,BB', ',,1.2.3.128/25,CC'])
+    assert country(db, '1.0.0.1') == 'AA'
+    assert country(db, '1.2.3.1') == 'BB'
+    assert country(db, '1.2.3.200') == 'CC'
+    assert country(db, '1.2.4.1') == 'AA'
+    assert country(db, '1.5.0.1') == 'AA'
+    assert country(db, '1.255.255.255') == 'AA'
+    assert country(db, '2.0.0.0') is None
+
+def test_partially_overlapping_ranges(tmp_path):
+    db = compile_ranges(tmp_path, ['10.0.0.0,10.0.0.100,,AA', '10.0.0.50,10.0.0.200,,BB', '::1,::1,,CC'])
+    assert country(db, '10.0.0.49') == 'AA'
+    assert country(db, '10.0.0.50') == 'BB'
+    assert country(db, '10.0.0.200') == 'BB'
+    assert country(db, '10.0.0.201') is None
+    assert country(db, '::1') == 'CC'
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+IP_API = {"status": "success", "countryCode": "US", "regionName": "California", "city": "Mountain View",
+          "lat": 37.4, "lon": -122.0, "timezone": "America/Los_Angeles"}
+IPAPI_CO = {"country_code": "US", "region": "California", "city": "Mountain View",
+            "latitude": 37.4, "longitude": -122.0, "timezone": "America/Los_Angeles"}
+IPINFO = {"country": "US", "region": "California", "city": "Mountain View", "loc": "37.4,-122.0",
+          "timezone": "America/Los_Angeles"}
+
+@pytest.fixture
+def providers(netscan, monkeypatch):
+    """Stub geolocation providers: set `delays`/`answers` per provider; `calls` records (provider, start time)"""
+    class Providers:
+        delays = {"ip-api.com": 0.0, "ipapi.co": 0.0, "ipinfo.io": 0.0}
+        answers = {"ip-api.com": IP_API, "ipapi.co": IPAPI_CO, "ipinfo.io": IPINFO}
+        calls = []
+
+    stub = Providers()
+
+    def fetch(provider, ip):
+        stub.calls.append((provider, time.time()))
+        time.sleep(stub.delays[provider])
+        return stub.answers[provider]
+
+    monkeypatch.setattr(netscan, 'fetch_geo_source', fetch)
+    netscan.provider_scheduler.default_hedge_delay = 0.1
+    return stub
+
+def hedged(netscan, names=("ip-api.com", "ipapi.co", "ipinfo.io")):
+    started = time.time()
+    return netscan.get_hedged_geo_data('192.0.2.1', list(names), started + 5), started
+
+def test_fast_primary_is_not_hedged(netscan, providers):
+    answer, _ = hedged(netscan)
+    assert [name for name, _ in answer] == ['ip-api.com']
+    assert [name for name, _ in providers.calls] == ['ip-api.com']
+
+def test_slow_primary_is_hedged_after_its_delay_and_the_first_answer_wins(netscan, providers):
+    providers.delays["ip-api.com"] = 0.5
+    answer, started = hedged(netscan)
+    assert [name for name, _ in answer] == ['ipapi.co']
+    (first, _), (second, asked_at) = providers.calls
+    assert (first, second) == ('ip-api.com', 'ipapi.co')
+    assert asked_at - started >= 0.1
+    assert time.time() - started < 0.4  # did not wait for the slow primary
+    assert netscan.provider_scheduler.stats()['ipapi.co']['hedged_wins'] == 1
+
+def test_failed_primary_is_replaced_without_waiting(netscan, providers):
+    providers.answers["ip-api.com"] = None
+    answer, started = hedged(netscan)
+    assert [name for name, _ in answer] == ['ipapi.co']
+    assert providers.calls[1][1] - started < 0.1
+
+def test_providers_are_asked_fastest_first(netscan, providers):
+    for name, latency in (("ip-api.com", 0.5), ("ipapi.co", 0.05), ("ipinfo.io", 0.2)):
+        for _ in range(netscan.provider_scheduler.min_samples):
+            netscan.provider_scheduler.record(name, 200, latency=latency)
+    assert netscan.provider_scheduler.rank(["ip-api.com", "ipapi.co", "ipinfo.io"]) == \
+        ["ipapi.co", "ipinfo.io", "ip-api.com"]
+    answer, _ = hedged(netscan)
+    assert [name for name, _ in answer] == ['ipapi.co']
+    # The hedge delay follows the provider's own p90
+    assert netscan.provider_scheduler.hedge_delay("ip-api.com") == 0.5
+
+def coverage(netscan, covered=()):
+    return netscan.get_geo_by_coverage('192.0.2.1', ["ip-api.com", "ipapi.co", "ipinfo.io"],
+                                       time.time() + 5, covered)
+
+def test_coverage_stops_once_required_fields_are_filled(netscan, providers):
+    assert [name for name, _ in coverage(netscan)] == ['ip-api.com']
+    assert [name for name, _ in providers.calls] == ['ip-api.com']
+
+def test_coverage_asks_the_next_provider_only_for_missing_fields(netscan, providers):
+    providers.answers["ip-api.com"] = dict(IP_API, city="", regionName="")
+    assert [name for name, _ in coverage(netscan)] == ['ip-api.com', 'ipapi.co']
+    assert [name for name, _ in providers.calls] == ['ip-api.com', 'ipapi.co']
+
+def test_fields_already_covered_locally_need_no_provider(netscan, providers):
+    assert coverage(netscan, covered=netscan.GEO_REQUIRED_FIELDS) == []
+    assert providers.calls == []
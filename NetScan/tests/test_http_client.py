@@ -0,0 +1,70 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_client import PooledHTTPClient
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    delay = 0
+    status = 200
+    calls = 0
+    connections = None
+
+    def do_GET(self):
+        type(self).calls += 1
+        type(self).connections.add(self.client_address)
+        time.sleep(self.delay)
+        body = b'{"ok": true}'
+        self.send_response(self.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    handler = type('Handler', (StubHandler,), {'connections': set()})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield handler, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_sequential_calls_reuse_one_connection(stub_server):
+    handler, url = stub_server
+    client = PooledHTTPClient()
+    for path in ('/a', '/b', '/c', '/d', '/e'):
+        assert client.get(url + path).json() == {'ok': True}
+    assert handler.calls == 5
+    assert len(handler.connections) == 1
+    stats = client.stats()
+    assert stats['connections_opened'] == 1 and stats['connection_reuse_ratio'] == 0.8
+    client.close()
+
+def test_slow_upstream_is_cut_at_the_request_budget(stub_server):
+    handler, url = stub_server
+    handler.delay = 3
+    client = PooledHTTPClient(connect_timeout=0.5, read_timeout=10, request_budget=1.5)
+    start = time.monotonic()
+    with pytest.raises(Exception):
+        client.get(url)
+    assert time.monotonic() - start < 1.5
+    assert handler.calls == 1  # timed-out reads are not retried
+
+def test_status_retries_stop_at_the_request_budget(stub_server):
+    handler, url = stub_server
+    handler.delay, handler.status = 0.4, 503
+    client = PooledHTTPClient(retries=5, backoff_factor=0, connect_timeout=0.2, read_timeout=1, request_budget=1.5)
+    start = time.monotonic()
+    response = client.get(url)
+    assert response.status_code == 503
+    assert time.monotonic() - start < 1.5
+    assert 1 <= handler.calls < 6
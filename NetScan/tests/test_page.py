@@ -0,0 +1,36 @@
+import time
+
+import pytest
+
+@pytest.fixture
+def analyses(netscan, monkeypatch):
+    """Analyses the app runs, answered with an empty result after a short delay"""
+    analyzed = []
+
+    def analyze(ip, sections=None):
+        analyzed.append(ip)
+        time.sleep(0.1)
+        return netscan._new_analysis(ip)
+
+    monkeypatch.setattr(netscan, 'comprehensive_ip_analysis', analyze)
+    return analyzed
+
+def test_results_route_never_starts_an_analysis(netscan, analyses):
+    response = netscan.app.test_client().get('/analysis/198.51.100.20/results')
+    assert response.status_code == 404
+    assert analyses == []
+
+def test_results_route_joins_the_analysis_the_page_scheduled(netscan, analyses):
+    client = netscan.app.test_client()
+    page = client.get('/', headers={'X-Forwarded-For': '198.51.100.21, 10.0.0.1'})
+    assert page.status_code == 200 and b'/results' in page.data
+    response = client.get('/analysis/198.51.100.21/results')
+    assert response.status_code == 200 and b'198.51.100.21' in response.data
+    assert analyses == ['198.51.100.21']
+
+def test_page_ignores_an_invalid_forwarded_address(netscan, analyses):
+    netscan.app.test_client().get('/', headers={'X-Forwarded-For': '<script>alert(1)</script>'})
+    deadline = time.time() + 2
+    while not analyses and time.time() < deadline:
+        time.sleep(0.01)
+    assert analyses == ['8.8.8.8']
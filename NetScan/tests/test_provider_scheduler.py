@@ -0,0 +1,62 @@
+import pytest
+
+from provider_scheduler import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ProviderScheduler
+
+def test_breaker_trips_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=30)
+    breaker.record_failure(now=100.0)
+    breaker.record_failure(now=100.0)
+    assert breaker.state == CLOSED and breaker.allow(100.0)
+    breaker.record_failure(now=100.0)
+    assert breaker.state == OPEN and not breaker.allow(129.0)
+    assert breaker.trips == 1
+
+def test_half_open_breaker_lets_one_probe_decide():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure(now=100.0)
+    assert breaker.allow(130.0) and breaker.state == HALF_OPEN
+    assert not breaker.allow(130.0)  # a second caller waits for the probe
+    breaker.record_failure(now=130.0)
+    assert breaker.state == OPEN and not breaker.allow(159.0)
+    assert breaker.allow(160.0)
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow(160.0)
+
+def test_429_drains_the_bucket_and_opens_the_circuit():
+    scheduler = ProviderScheduler(quotas={'ip-api.com': (45, 60, 45)}, recovery_timeout=30)
+    assert scheduler.acquire('ip-api.com')
+    scheduler.record('ip-api.com', 429, {'X-Ttl': '50'})
+    assert not scheduler.acquire('ip-api.com')
+    stats = scheduler.stats()['ip-api.com']
+    assert (stats['state'], stats['throttled'], stats['tokens']) == (OPEN, 1, 0)
+    assert scheduler.rank(['ip-api.com', 'ipinfo.io']) == ['ipinfo.io', 'ip-api.com']
+
+def test_client_errors_leave_the_breaker_alone_but_refusals_count():
+    scheduler = ProviderScheduler(quotas={'ipapi.co': (1000, 60, 1000)}, failure_threshold=3)
+    for _ in range(5):
+        assert scheduler.acquire('ipapi.co')
+        scheduler.record('ipapi.co', 404)
+    assert scheduler.state('ipapi.co') == CLOSED
+    for _ in range(3):
+        scheduler.acquire('ipapi.co')
+        scheduler.record('ipapi.co', 403)
+    assert scheduler.state('ipapi.co') == OPEN
+
+def test_without_a_shared_tier_each_worker_keeps_to_its_share():
+    scheduler = ProviderScheduler(quotas={'ip-api.com': (4, 60, 4)}, workers=2)
+    assert [scheduler.acquire('ip-api.com') for _ in range(3)] == [True, True, False]
+
+def test_workers_share_one_bucket_through_redis():
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    server = fakeredis.FakeServer()
+    workers = [ProviderScheduler(quotas={'ip-api.com': (3, 60, 3)}, shared=fakeredis.FakeRedis(server=server),
+                                 workers=2) for _ in range(2)]
+    taken = [worker.acquire('ip-api.com') for worker in workers * 2]
+    assert taken.count(True) == 3
+    # A 429 seen by one worker holds the other too
+    fresh = [ProviderScheduler(quotas={'ipinfo.io': (100, 60, 100)}, shared=fakeredis.FakeRedis(server=server))
+             for _ in range(2)]
+    assert fresh[1].acquire('ipinfo.io')
+    fresh[0].record('ipinfo.io', 429, {'Retry-After': '60'})
+    assert not fresh[1].acquire('ipinfo.io')
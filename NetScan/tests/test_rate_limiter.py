@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import pytest
+
+import rate_limiter
+from rate_limiter import ALLOWED, BLOCKED, LIMITED, LocalRateLimitState, SharedRateLimitState, SlidingWindowLimiter
+
+@pytest.fixture
+def redis_server():
+    """In-process Redis able to run RATE_LIMIT_SCRIPT (skipped without fakeredis and lupa)"""
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    server = fakeredis.FakeServer()
+    return lambda: fakeredis.FakeRedis(server=server)
+
+class DownRedis:
+    """Redis client whose every call fails like an unreachable server"""
+
+    def register_script(self, script):
+        def run(keys=None, args=None):
+            raise ConnectionError('Redis is down')
+        return run
+
+    def get(self, key):
+        raise ConnectionError('Redis is down')
+
+    setex = delete = get
+
+def test_limit_then_previous_window_weighting():
+    limiter = SlidingWindowLimiter(limit=3, window=60, max_clients=10)
+    assert [limiter.hit('a', 600.0)[0] for _ in range(4)] == [True, True, True, False]
+    assert limiter.hit('a', 600.0) == (False, 2)
+    # Half of the previous window still overlaps: 3 * 0.5 = 1.5 of 3 used
+    assert [limiter.hit('a', 690.0)[0] for _ in range(3)] == [True, True, False]
+
+def test_client_table_is_capped_and_idle_clients_age_out():
+    limiter = SlidingWindowLimiter(limit=5, window=60, max_clients=3)
+    for client in 'abcd':
+        limiter.hit(client, 600.0)
+    assert limiter.stats()['clients'] == 3 and limiter.evictions == 1
+    limiter.hit('e', 600.0 + 3 * 60)  # every other client is two windows idle
+    assert limiter.stats()['clients'] == 1
+
+def test_abusive_client_is_blocked():
+    state = LocalRateLimitState(limit=2, window=3600)
+    statuses = [state.check('1.2.3.4') for _ in range(6)]
+    assert statuses[:2] == [ALLOWED, ALLOWED] and LIMITED in statuses
+    assert statuses[-1] == BLOCKED
+
+def test_expired_blocks_are_swept_without_the_client_returning():
+    state = LocalRateLimitState(limit=5, window=3600, max_clients=100)
+    for i in range(50):
+        state.block(f"10.0.0.{i}", ttl=-1)
+    state._swept_window = None  # next check starts a new window
+    state.check('192.0.2.1')
+    assert state.stats()['blocked'] == 0
+
+def test_blocks_are_capped():
+    state = LocalRateLimitState(limit=5, window=3600, max_clients=10)
+    for i in range(50):
+        state.block(f"10.0.0.{i}")
+    assert state.stats()['blocked'] == 10
+    assert state.is_blocked('10.0.0.49') and not state.is_blocked('10.0.0.0')
+
+def test_script_limits_then_blocks(redis_server):
+    state = SharedRateLimitState(redis_server(), limit=2, window=3600, block_ttl=300)
+    assert [state.check('1.2.3.4') for _ in range(2)] == [ALLOWED, ALLOWED]
+    assert [state.check('1.2.3.4') for _ in range(3)] == [LIMITED] * 3  # the third rejection blocks
+    assert state.check('1.2.3.4') == BLOCKED
+    assert state.is_blocked('1.2.3.4')
+
+def test_script_state_is_shared_between_workers(redis_server):
+    first = SharedRateLimitState(redis_server(), limit=3, window=3600)
+    second = SharedRateLimitState(redis_server(), limit=3, window=3600)
+    assert [first.check('1.2.3.4'), second.check('1.2.3.4'), first.check('1.2.3.4')] == [ALLOWED] * 3
+    assert second.check('1.2.3.4') == LIMITED
+    second.block('5.6.7.8', ttl=60)
+    assert first.is_blocked('5.6.7.8') and first.check('5.6.7.8') == BLOCKED
+    first.unblock('5.6.7.8')
+    assert second.check('5.6.7.8') == ALLOWED
+
+def test_script_windows_follow_the_redis_clock(redis_server, monkeypatch):
+    client = redis_server()
+    state = SharedRateLimitState(client, limit=3, window=60)
+    monkeypatch.setattr(rate_limiter, 'time', SimpleNamespace(time=lambda: 0.0))  # a badly skewed worker clock
+    state.check('1.2.3.4')
+    assert int(client.hget('netscan:rl:count:1.2.3.4', 'w')) == client.time()[0] // 60
+
+def test_blocks_fall_back_to_the_worker_when_redis_is_down():
+    state = SharedRateLimitState(DownRedis(), limit=3, window=60)
+    state.block('1.2.3.4', ttl=60)
+    assert state.is_blocked('1.2.3.4') and state.check('1.2.3.4') == BLOCKED
+    state.unblock('1.2.3.4')
+    assert state.check('1.2.3.4') == ALLOWED
+    assert state.errors > 0
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+
+from cache import InMemorySharedTier
+from singleflight import SingleFlight
+
+class SlowSharedTier(InMemorySharedTier):
+    """Shared tier whose every call blocks like an unreachable Redis"""
+
+    def get(self, key):
+        time.sleep(0.2)
+        return super().get(key)
+
+    def set(self, key, payload, nx=False, px=None):
+        time.sleep(0.2)
+        return super().set(key, payload, nx=nx, px=px)
+
+def test_do_async_keeps_shared_store_calls_off_the_loop():
+    flight = SingleFlight(shared=SlowSharedTier())
+
+    async def compute():
+        return 'result'
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        result = await flight.do_async('key', compute, check=lambda: flight.shared.get('cached'))
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(main())
+    assert result == 'result'
+    assert ticks >= 20  # the loop kept running through ~0.4s of blocking store calls
+
+def test_in_process_tier_lock_primitives():
+    shared = InMemorySharedTier()
+    assert shared.set('lock', 'a', nx=True, px=1000)
+    assert shared.set('lock', 'b', nx=True, px=1000) is None
+    assert shared.compare_and_delete('lock', 'b') == 0
+    assert shared.compare_and_delete('lock', 'a') == 1
+    assert shared.get('lock') is None
+    shared.setex('gone', -1, 'x')
+    assert shared.get('gone') is None
+
+def test_shared_lock_is_held_and_released_through_redis():
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    server = fakeredis.FakeServer()
+    leader = SingleFlight(shared=fakeredis.FakeRedis(server=server))
+    other = SingleFlight(shared=fakeredis.FakeRedis(server=server))
+    token = leader._acquire_shared('8.8.8.8')
+    assert token and other._acquire_shared('8.8.8.8') is None
+    assert other._shared_lock_held('8.8.8.8')
+    other._release_shared('8.8.8.8', 'not-the-token')  # RELEASE_SCRIPT leaves another owner's lock
+    assert leader._shared_lock_held('8.8.8.8')
+    leader._release_shared('8.8.8.8', token)
+    assert not other._shared_lock_held('8.8.8.8')
@@ -0,0 +1,24 @@
+import threading
+
+from tor_exits import TorExitIndex
+
+def test_concurrent_persists_leave_a_complete_list(tmp_path):
+    cache_path = tmp_path / 'tor' / 'exits.txt'
+    indexes = []
+    for _ in range(4):
+        index = TorExitIndex(cache_path=str(cache_path))
+        index._swap(range(1, 2001), {1}, 0)
+        indexes.append(index)
+
+    threads = [threading.Thread(target=index._persist) for index in indexes for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    lines = cache_path.read_text().splitlines()
+    assert len(lines) == 2001 and lines[-1] == '::1'
+    assert [path.name for path in cache_path.parent.iterdir()] == ['exits.txt']
+
+    reloaded = TorExitIndex(cache_path=str(cache_path))
+    assert reloaded.load_from_disk() and reloaded.is_exit('0.0.0.1')
@@ -0,0 +1,35 @@
+import pytest
+
+from security import CIDR, HOSTNAME, INVALID, IPV4, IPV6, classify_ip_entry, validate_ip_input, validate_ip_list
+
+def test_entries_are_classified_and_normalized():
+    assert classify_ip_entry(' 8.8.8.8 ') == (IPV4, '8.8.8.8', None)
+    assert classify_ip_entry('2001:DB8::0:1') == (IPV6, '2001:db8::1', None)
+    assert classify_ip_entry('10.0.0.5/8') == (CIDR, '10.0.0.0/8', None)
+    assert classify_ip_entry('Example.COM.') == (HOSTNAME, 'example.com', None)
+    assert classify_ip_entry('fe80::1%eth0')[0] == IPV6
+    for text in ('1.2.3.999', '010.1.1.1', 'gg::1', '1.2.3.4/33', 'a;b', 'updates.example.com'):
+        assert classify_ip_entry(text)[0] == INVALID
+
+def test_scoped_ipv6_gets_the_injection_check():
+    for text in ('::1%<script>', '::1%select', 'fe80::1%', 'fe80::1%a b'):
+        kind, _, reason = classify_ip_entry(text)
+        assert kind == INVALID and reason
+
+def test_list_is_deduplicated_with_per_line_reasons():
+    accepted, rejected, counts = validate_ip_list(
+        ['8.8.8.8', ' 8.8.8.8', '', '# comment', '2001:db8::1', '2001:DB8:0::1', '10.0.0.0/8', 'bad!'],
+        accept=(IPV4, IPV6, HOSTNAME)
+    )
+    assert accepted == [(1, IPV4, '8.8.8.8'), (5, IPV6, '2001:db8::1')]
+    assert [(line, reason.split()[0]) for line, _, reason in rejected] == [
+        (2, 'Duplicate'), (6, 'Duplicate'), (7, 'Entries'), (8, 'Invalid')
+    ]
+    assert counts['duplicate'] == 2 and counts[INVALID] == 1
+
+def test_single_and_list_validation_share_the_hostname_rule():
+    for text in ('010.1.1.1', '1.2.3.999', '1.2.3', '-bad!', 'x' * 254):
+        assert classify_ip_entry(text)[0] == INVALID
+        with pytest.raises(ValueError):
+            validate_ip_input(text)
+    assert validate_ip_input(' dns.google ') == 'dns.google'
@@ -0,0 +1,9 @@
+def test_weather_tiles_are_cell_centers(netscan):
+    assert netscan.weather_tile(37.42, -122.08) == (37.45, -122.05)
+    assert netscan.weather_tile(37.44, -122.01) == (37.45, -122.05)
+
+def test_weather_tiles_stay_on_the_globe(netscan):
+    assert netscan.weather_tile(0, 180) == netscan.weather_tile(0, -180) == (0.05, -179.95)
+    assert netscan.weather_tile(0, 359.99) == (0.05, -0.05)
+    assert netscan.weather_tile(90, 179.99) == (90.0, 179.95)
+    assert netscan.weather_tile(-90, 0) == (-89.95, 0.05)
@@ -0,0 +1,52 @@
+import ipaddress
+
+import ipwhois
+import pytest
+
+ALLOCATIONS = [
+    # (registration block, BGP route, origin ASN, network name)
+    ("8.8.8.0/24", "8.8.8.0/24", "15169", "GOGL"),
+    ("8.0.0.0/9", "8.0.0.0/12", "3356", "LVLT-ORG-8-8"),
+    ("203.0.0.0/14", "203.0.0.0/16", "64500", "EXAMPLE-BLOCK"),
+]
+
+@pytest.fixture
+def rdap(monkeypatch):
+    """RDAP answers from ALLOCATIONS (most specific route first), counting the queries"""
+    queries = []
+
+    def lookup_rdap(self, depth=0, **kwargs):
+        queries.append(self.address_str)
+        address = ipaddress.ip_address(self.address_str)
+        for block, route, asn, name in ALLOCATIONS:
+            if address in ipaddress.ip_network(route):
+                return {"asn": asn, "asn_cidr": route, "network": {"cidr": block, "name": name}}
+        raise ValueError("no allocation")
+
+    monkeypatch.setattr(ipwhois.IPWhois, 'lookup_rdap', lookup_rdap)
+    return queries
+
+def test_addresses_in_a_cached_route_are_served_by_longest_prefix(netscan, rdap):
+    assert netscan.get_enhanced_whois_data('8.8.8.8')['asn'] == '15169'
+    assert netscan.get_enhanced_whois_data('8.8.8.4')['asn'] == '15169'
+    assert rdap == ['8.8.8.8']
+
+def test_broad_parent_is_not_served_for_a_more_specific_child(netscan, rdap):
+    assert netscan.get_enhanced_whois_data('8.0.0.1')['asn'] == '3356'
+    whois = netscan.get_enhanced_whois_data('8.8.8.8')
+    assert (whois['asn'], whois['network_name']) == ('15169', 'GOGL')
+    assert rdap == ['8.0.0.1', '8.8.8.8']
+
+def test_registration_block_is_narrowed_to_the_route(netscan, rdap):
+    netscan.get_enhanced_whois_data('203.0.1.1')
+    netscan.get_enhanced_whois_data('203.0.200.1')  # same route
+    netscan.get_enhanced_whois_data('203.1.0.1')  # same block, outside the route
+    assert rdap == ['203.0.1.1', '203.1.0.1']
+    assert netscan.whois_cache_networks('203.0.1.1', {"asn_cidr": "203.0.0.0/16", "network_cidr": "203.0.0.0/14"}) \
+        == {ipaddress.ip_network("203.0.0.0/16")}
+
+def test_expired_networks_are_purged_on_schedule(netscan, rdap, monkeypatch):
+    netscan.whois_cache.insert("198.51.100.0/24", {"asn": "64501"}, ttl=-1)
+    monkeypatch.setattr(netscan, 'whois_purged_at', 0)
+    netscan.get_enhanced_whois_data('8.8.8.8')
+    assert len(netscan.whois_cache) == 1
@@ -0,0 +1,178 @@
+import ipaddress
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+TOR_EXIT_LIST_URL = "https://check.torproject.org/exit-addresses"
+
+def parse_exit_addresses(text):
+    """Parse the Tor bulk exit list into integer sets keyed by IP version"""
+    v4, v6 = set(), set()
+    for line in text.splitlines():
+        if not line.startswith("ExitAddress "):
+            continue
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        try:
+            address = ipaddress.ip_address(parts[1])
+        except ValueError:
+            continue
+        (v4 if address.version == 4 else v6).add(int(address))
+    return v4, v6
+
+class TorExitIndex:
+    """In-memory Tor exit node index refreshed in the background and persisted to disk"""
+
+    def __init__(self, url=TOR_EXIT_LIST_URL, refresh_interval=1800, cache_path=None, timeout=10, http=None):
+        self.url = url
+        self.http = http or requests  # anything with a requests-style get()
+        self.refresh_interval = refresh_interval
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self._v4 = frozenset()
+        self._v6 = frozenset()
+        self.updated_at = None
+        self.last_error = None
+        self.refresh_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.start_on_first_use = False
+
+    def is_exit(self, ip):
+        """O(1) membership check for a single address"""
+        if self.start_on_first_use and self._thread is None:
+            self.start()
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        nodes = self._v4 if address.version == 4 else self._v6
+        return int(address) in nodes
+
+    def _swap(self, v4, v6, updated_at):
+        # Replace both sets at once so readers never need a lock
+        self._v4, self._v6 = frozenset(v4), frozenset(v6)
+        self.updated_at = updated_at
+
+    def load_from_disk(self):
+        """Load the last persisted list, returning True when one was found"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            v4, v6 = set(), set()
+            with open(self.cache_path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    address = ipaddress.ip_address(line)
+                    (v4 if address.version == 4 else v6).add(int(address))
+            self._swap(v4, v6, os.path.getmtime(self.cache_path))
+            print(f"🧅 Loaded {len(v4) + len(v6)} Tor exit nodes from {self.cache_path}")
+            return True
+        except Exception as e:
+            print(f"⚠️  Could not load Tor exit list from disk: {e}")
+            return False
+
+    def _persist(self):
+        if not self.cache_path:
+            return
+        tmp_path = None
+        try:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Every worker refreshes on its own: each writes a private temp file, then renames it
+            with tempfile.NamedTemporaryFile('w', dir=directory or '.', prefix='.tor-exits-', delete=False) as f:
+                tmp_path = f.name
+                for value in sorted(self._v4):
+                    f.write(f"{ipaddress.IPv4Address(value)}\n")
+                for value in sorted(self._v6):
+                    f.write(f"{ipaddress.IPv6Address(value)}\n")
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"⚠️  Could not persist Tor exit list: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def refresh(self):
+        """Download and swap in a fresh exit list, keeping the old one on failure"""
+        try:
+            response = self.http.get(self.url, timeout=self.timeout)
+            if response.status_code != 200:
+                raise ValueError(f"HTTP {response.status_code}")
+            v4, v6 = parse_exit_addresses(response.text)
+            if not v4 and not v6:
+                raise ValueError("empty exit list")
+            self._swap(v4, v6, time.time())
+            self.refresh_count += 1
+            self.last_error = None
+            self._persist()
+            print(f"🧅 Tor exit list refreshed: {len(v4) + len(v6)} nodes")
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"⚠️  Tor exit list refresh failed: {e}")
+            return False
+
+    def age(self):
+        return time.time() - self.updated_at if self.updated_at else None
+
+    def _run(self):
+        while not self._stop.is_set():
+            age = self.age()
+            if age is None or age >= self.refresh_interval:
+                if not self.refresh():
+                    # Retry failures sooner than a full interval
+                    self._stop.wait(min(300, self.refresh_interval))
+                    continue
+                age = 0
+            self._stop.wait(self.refresh_interval - age)
+
+    def start(self):
+        """Load the persisted list and start the background refresher"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self.load_from_disk()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='tor-exit-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        age = self.age()
+        return {
+            'ipv4_nodes': len(self._v4),
+            'ipv6_nodes': len(self._v6),
+            'updated_at': self.updated_at,
+            'age_seconds': round(age, 1) if age is not None else None,
+            'refresh_interval': self.refresh_interval,
+            'refresh_count': self.refresh_count,
+            'last_error': self.last_error
+        }
+
+# Global index instance
+tor_exit_index = None
+
+def init_tor_index(config, http=None, start=True):
+    """Initialize the global Tor exit node index, starting it now or on the first lookup"""
+    global tor_exit_index
+    tor_exit_index = TorExitIndex(
+        url=config.get('TOR_EXIT_LIST_URL', TOR_EXIT_LIST_URL),
+        refresh_interval=config.get('TOR_REFRESH_INTERVAL', 1800),
+        cache_path=config.get('TOR_EXIT_CACHE_PATH'),
+        http=http
+    )
+    if start:
+        tor_exit_index.start()
+    else:
+        tor_exit_index.start_on_first_use = True
+    return tor_exit_index
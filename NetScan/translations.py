@@ -0,0 +1,291 @@
+# UI strings per language, imported on the first page render (see app.get_translations)
+TRANSLATIONS = {
+    'en': {
+        'title': 'NetScan Pro - Advanced Network Intelligence Platform',
+        'subtitle': 'Advanced Network Intelligence & Threat Analysis Platform',
+        'search_placeholder': 'Enter IP address for comprehensive network intelligence analysis...',
+        'analyze_btn': 'Analyze Network',
+        'basic_info': 'Basic Information',
+        'geographic_intel': 'Geographic Intelligence',
+        'time_intel': 'Time Intelligence',
+        'network_intel': 'Network Intelligence',
+        'security_intel': 'Security & Threat Intelligence',
+        'performance_analysis': 'Performance Analysis',
+        'weather_info': 'Weather Information',
+        'currency_info': 'Currency Information',
+        'country': 'Country',
+        'city': 'City',
+        'timezone': 'Timezone',
+        'risk_score': 'Risk Score',
+        'export_report': 'Export Report',
+        'login': 'Login',
+        'register': 'Register',
+        'dashboard': 'Dashboard',
+        'bulk_analysis': 'Bulk Analysis',
+        'history': 'History'
+    },
+    'pt': {
+        'title': 'NetScan Pro - Plataforma Avançada de Inteligência de Rede',
+        'subtitle': 'Plataforma Avançada de Inteligência de Rede e Análise de Ameaças',
+        'search_placeholder': 'Digite o endereço IP para análise abrangente de inteligência de rede...',
+        'analyze_btn': 'Analisar Rede',
+        'basic_info': 'Informações Básicas',
+        'geographic_intel': 'Inteligência Geográfica',
+        'time_intel': 'Inteligência Temporal',
+        'network_intel': 'Inteligência de Rede',
+        'security_intel': 'Inteligência de Segurança e Ameaças',
+        'performance_analysis': 'Análise de Performance',
+        'weather_info': 'Informações Meteorológicas',
+        'currency_info': 'Informações de Moeda',
+        'country': 'País',
+        'city': 'Cidade',
+        'timezone': 'Fuso Horário',
+        'risk_score': 'Pontuação de Risco',
+        'export_report': 'Exportar Relatório',
+        'login': 'Entrar',
+        'register': 'Registrar',
+        'dashboard': 'Painel',
+        'bulk_analysis': 'Análise em Lote',
+        'history': 'Histórico'
+    },
+    'es': {
+        'title': 'NetScan Pro - Plataforma Avanzada de Inteligencia de Red',
+        'subtitle': 'Plataforma Avanzada de Inteligencia de Red y Análisis de Amenazas',
+        'search_placeholder': 'Ingrese la dirección IP para análisis integral de inteligencia de red...',
+        'analyze_btn': 'Analizar Red',
+        'basic_info': 'Información Básica',
+        'geographic_intel': 'Inteligencia Geográfica',
+        'time_intel': 'Inteligencia Temporal',
+        'network_intel': 'Inteligencia de Red',
+        'security_intel': 'Inteligencia de Seguridad y Amenazas',
+        'performance_analysis': 'Análisis de Rendimiento',
+        'weather_info': 'Información Meteorológica',
+        'currency_info': 'Información de Moneda',
+        'country': 'País',
+        'city': 'Ciudad',
+        'timezone': 'Zona Horaria',
+        'risk_score': 'Puntuación de Riesgo',
+        'export_report': 'Exportar Informe',
+        'login': 'Iniciar Sesión',
+        'register': 'Registrarse',
+        'dashboard': 'Panel',
+        'bulk_analysis': 'Análisis en Lote',
+        'history': 'Historial'
+    },
+    'fr': {
+        'title': 'NetScan Pro - Plateforme Avancée d\'Intelligence Réseau',
+        'subtitle': 'Plateforme Avancée d\'Intelligence Réseau et d\'Analyse des Menaces',
+        'search_placeholder': 'Entrez l\'adresse IP pour une analyse complète de l\'intelligence réseau...',
+        'analyze_btn': 'Analyser le Réseau',
+        'basic_info': 'Informations de Base',
+        'geographic_intel': 'Intelligence Géographique',
+        'time_intel': 'Intelligence Temporelle',
+        'network_intel': 'Intelligence Réseau',
+        'security_intel': 'Intelligence de Sécurité et Menaces',
+        'performance_analysis': 'Analyse de Performance',
+        'weather_info': 'Informations Météorologiques',
+        'currency_info': 'Informations Monétaires',
+        'country': 'Pays',
+        'city': 'Ville',
+        'timezone': 'Fuseau Horaire',
+        'risk_score': 'Score de Risque',
+        'export_report': 'Exporter le Rapport',
+        'login': 'Connexion',
+        'register': 'S\'inscrire',
+        'dashboard': 'Tableau de Bord',
+        'bulk_analysis': 'Analyse en Lot',
+        'history': 'Historique'
+    },
+    'de': {
+        'title': 'NetScan Pro - Erweiterte Netzwerk-Intelligence-Plattform',
+        'subtitle': 'Erweiterte Netzwerk-Intelligence und Bedrohungsanalyse-Plattform',
+        'search_placeholder': 'IP-Adresse für umfassende Netzwerk-Intelligence-Analyse eingeben...',
+        'analyze_btn': 'Netzwerk Analysieren',
+        'basic_info': 'Grundinformationen',
+        'geographic_intel': 'Geografische Intelligence',
+        'time_intel': 'Zeit-Intelligence',
+        'network_intel': 'Netzwerk-Intelligence',
+        'security_intel': 'Sicherheits- und Bedrohungs-Intelligence',
+        'performance_analysis': 'Leistungsanalyse',
+        'weather_info': 'Wetterinformationen',
+        'currency_info': 'Währungsinformationen',
+        'country': 'Land',
+        'city': 'Stadt',
+        'timezone': 'Zeitzone',
+        'risk_score': 'Risiko-Score',
+        'export_report': 'Bericht Exportieren',
+        'login': 'Anmelden',
+        'register': 'Registrieren',
+        'dashboard': 'Dashboard',
+        'bulk_analysis': 'Massenanalyse',
+        'history': 'Verlauf'
+    },
+    'ja': {
+        'title': 'NetScan Pro - 高度なネットワークインテリジェンスプラットフォーム',
+        'subtitle': '高度なネットワークインテリジェンスと脅威分析プラットフォーム',
+        'search_placeholder': '包括的なネットワークインテリジェンス分析のためのIPアドレスを入力...',
+        'analyze_btn': 'ネットワーク分析',
+        'basic_info': '基本情報',
+        'geographic_intel': '地理的インテリジェンス',
+        'time_intel': '時間インテリジェンス',
+        'network_intel': 'ネットワークインテリジェンス',
+        'security_intel': 'セキュリティ・脅威インテリジェンス',
+        'performance_analysis': 'パフォーマンス分析',
+        'weather_info': '天気情報',
+        'currency_info': '通貨情報',
+        'country': '国',
+        'city': '都市',
+        'timezone': 'タイムゾーン',
+        'risk_score': 'リスクスコア',
+        'export_report': 'レポートエクスポート',
+        'login': 'ログイン',
+        'register': '登録',
+        'dashboard': 'ダッシュボード',
+        'bulk_analysis': 'バルク分析',
+        'history': '履歴'
+    },
+    'ko': {
+        'title': 'NetScan Pro - 고급 네트워크 인텔리전스 플랫폼',
+        'subtitle': '고급 네트워크 인텔리전스 및 위협 분석 플랫폼',
+        'search_placeholder': '포괄적인 네트워크 인텔리전스 분석을 위한 IP 주소 입력...',
+        'analyze_btn': '네트워크 분석',
+        'basic_info': '기본 정보',
+        'geographic_intel': '지리적 인텔리전스',
+        'time_intel': '시간 인텔리전스',
+        'network_intel': '네트워크 인텔리전스',
+        'security_intel': '보안 및 위협 인텔리전스',
+        'performance_analysis': '성능 분석',
+        'weather_info': '날씨 정보',
+        'currency_info': '통화 정보',
+        'country': '국가',
+        'city': '도시',
+        'timezone': '시간대',
+        'risk_score': '위험 점수',
+        'export_report': '보고서 내보내기',
+        'login': '로그인',
+        'register': '등록',
+        'dashboard': '대시보드',
+        'bulk_analysis': '대량 분석',
+        'history': '기록'
+    },
+    'zh': {
+        'title': 'NetScan Pro - 高级网络情报平台',
+        'subtitle': '高级网络情报和威胁分析平台',
+        'search_placeholder': '输入IP地址进行全面网络情报分析...',
+        'analyze_btn': '分析网络',
+        'basic_info': '基本信息',
+        'geographic_intel': '地理情报',
+        'time_intel': '时间情报',
+        'network_intel': '网络情报',
+        'security_intel': '安全和威胁情报',
+        'performance_analysis': '性能分析',
+        'weather_info': '天气信息',
+        'currency_info': '货币信息',
+        'country': '国家',
+        'city': '城市',
+        'timezone': '时区',
+        'risk_score': '风险评分',
+        'export_report': '导出报告',
+        'login': '登录',
+        'register': '注册',
+        'dashboard': '仪表板',
+        'bulk_analysis': '批量分析',
+        'history': '历史'
+    },
+    'sv': {
+        'title': 'NetScan Pro - Avancerad Nätverksintelligensplattform',
+        'subtitle': 'Avancerad Nätverksintelligens och Hotanalysplattform',
+        'search_placeholder': 'Ange IP-adress för omfattande nätverksintelligensanalys...',
+        'analyze_btn': 'Analysera Nätverk',
+        'basic_info': 'Grundläggande Information',
+        'geographic_intel': 'Geografisk Intelligens',
+        'time_intel': 'Tidsintelligens',
+        'network_intel': 'Nätverksintelligens',
+        'security_intel': 'Säkerhets- och Hotintelligens',
+        'performance_analysis': 'Prestandaanalys',
+        'weather_info': 'Väderinformation',
+        'currency_info': 'Valutainformation',
+        'country': 'Land',
+        'city': 'Stad',
+        'timezone': 'Tidszon',
+        'risk_score': 'Riskpoäng',
+        'export_report': 'Exportera Rapport',
+        'login': 'Logga In',
+        'register': 'Registrera',
+        'dashboard': 'Instrumentpanel',
+        'bulk_analysis': 'Massanalys',
+        'history': 'Historik'
+    },
+    'ru': {
+        'title': 'NetScan Pro - Продвинутая Платформа Сетевой Разведки',
+        'subtitle': 'Продвинутая Платформа Сетевой Разведки и Анализа Угроз',
+        'search_placeholder': 'Введите IP-адрес для комплексного анализа сетевой разведки...',
+        'analyze_btn': 'Анализировать Сеть',
+        'basic_info': 'Основная Информация',
+        'geographic_intel': 'Географическая Разведка',
+        'time_intel': 'Временная Разведка',
+        'network_intel': 'Сетевая Разведка',
+        'security_intel': 'Разведка Безопасности и Угроз',
+        'performance_analysis': 'Анализ Производительности',
+        'weather_info': 'Информация о Погоде',
+        'currency_info': 'Информация о Валюте',
+        'country': 'Страна',
+        'city': 'Город',
+        'timezone': 'Часовой Пояс',
+        'risk_score': 'Оценка Риска',
+        'export_report': 'Экспорт Отчета',
+        'login': 'Вход',
+        'register': 'Регистрация',
+        'dashboard': 'Панель',
+        'bulk_analysis': 'Массовый Анализ',
+        'history': 'История'
+    },
+    'nl': {
+        'title': 'NetScan Pro - Geavanceerd Netwerk Intelligence Platform',
+        'subtitle': 'Geavanceerd Netwerk Intelligence en Dreigingsanalyse Platform',
+        'search_placeholder': 'Voer IP-adres in voor uitgebreide netwerk intelligence analyse...',
+        'analyze_btn': 'Netwerk Analyseren',
+        'basic_info': 'Basisinformatie',
+        'geographic_intel': 'Geografische Intelligence',
+        'time_intel': 'Tijd Intelligence',
+        'network_intel': 'Netwerk Intelligence',
+        'security_intel': 'Beveiligings- en Dreigingsintelligence',
+        'performance_analysis': 'Prestatie-analyse',
+        'weather_info': 'Weerinformatie',
+        'currency_info': 'Valuta-informatie',
+        'country': 'Land',
+        'city': 'Stad',
+        'timezone': 'Tijdzone',
+        'risk_score': 'Risicoscore',
+        'export_report': 'Rapport Exporteren',
+        'login': 'Inloggen',
+        'register': 'Registreren',
+        'dashboard': 'Dashboard',
+        'bulk_analysis': 'Bulk Analyse',
+        'history': 'Geschiedenis'
+    },
+    'hi': {
+        'title': 'NetScan Pro - उन्नत नेटवर्क इंटेलिजेंस प्लेटफ़ॉर्म',
+        'subtitle': 'उन्नत नेटवर्क इंटेलिजेंस और खतरा विश्लेषण प्लेटफ़ॉर्म',
+        'search_placeholder': 'व्यापक नेटवर्क इंटेलिजेंस विश्लेषण के लिए IP पता दर्ज करें...',
+        'analyze_btn': 'नेटवर्क का विश्लेषण करें',
+        'basic_info': 'बुनियादी जानकारी',
+        'geographic_intel': 'भौगोलिक इंटेलिजेंस',
+        'time_intel': 'समय इंटेलिजेंस',
+        'network_intel': 'नेटवर्क इंटेलिजेंस',
+        'security_intel': 'सुरक्षा और खतरा इंटेलिजेंस',
+        'performance_analysis': 'प्रदर्शन विश्लेषण',
+        'weather_info': 'मौसम की जानकारी',
+        'currency_info': 'मुद्रा की जानकारी',
+        'country': 'देश',
+        'city': 'शहर',
+        'timezone': 'समय क्षेत्र',
+        'risk_score': 'जोखिम स्कोर',
+        'export_report': 'रिपोर्ट निर्यात करें',
+        'login': 'लॉगिन',
+        'register': 'पंजीकरण',
+        'dashboard': 'डैशबोर्ड',
+        'bulk_analysis': 'बल्क विश्लेषण',
+        'history': 'इतिहास'
+    }
+}